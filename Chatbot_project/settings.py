@@ -133,6 +133,41 @@ STATICFILES_DIRS = [
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# On-disk artifacts for search indices (BM25 postings, caches, ...)
+INDEX_CACHE_DIR = BASE_DIR / "index_cache"
+
+# Search result cache: "lru" (per process), "django" (uses CACHES[ALIAS]), "none",
+# or a dotted path to a backend class with get(key) / set(key, value, timeout)
+SEARCH_RESULT_CACHE = {
+    "BACKEND": "lru",
+    "MAX_ENTRIES": 1024,
+    "TIMEOUT": 3600,
+    "ALIAS": "default",
+}
+
+# Near-duplicate query cache: reuse hits of a recent query within RADIUS cosine
+SEMANTIC_QUERY_CACHE = {
+    "RADIUS": 0.97,
+    "CAPACITY": 256,
+}
+
+# Upload ingestion runs in `manage.py run_ingest_worker`, not in the request
+INGEST_WORKER = {
+    "CONCURRENCY": 2,
+    "POLL_INTERVAL": 2.0,
+    "STALE_AFTER": 900,   # requeue running jobs without progress or heartbeat for this long (seconds)
+}
+
+# crawl_site: concurrent fetch/parse/embed stages (politeness delay is per host, per crawl)
+CRAWLER = {
+    "CONCURRENCY": 4,
+    "PARSE_WORKERS": 1,
+    "QUEUE_SIZE": 16,
+    "INDEX_EVERY_PAGES": 10,   # FAISS/BM25 updated once per this many stored pages
+    "BOILERPLATE_FRACTION": 0.5,   # skip paragraphs repeated on more than this share of pages
+    "BOILERPLATE_MIN_PAGES": 5,
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -0,0 +1,406 @@
+# ss_app/logic/bm25_index.py
+"""
+Sparse postings-list BM25 index.
+
+- One postings list (document positions + term frequencies) per term
+- Queries only touch the postings of query terms, so latency scales with the
+  number of matching documents rather than with corpus size
+- Top-k selection via np.argpartition (no full sort over all scores)
+- Incremental add_documents(); new postings are buffered and merged lazily
+- remove_documents() tombstones documents (skipped at query time, excluded from
+  df/avgdl); re-adding a removed id indexes it again under a new position.
+  Once tombstones make up COMPACT_DEAD_FRACTION of the documents, compact()
+  rewrites postings and document arrays without them, so churn (re-crawled
+  pages) does not grow the index or the saved file
+- save()/load() persist to a single .npz file (atomic replace, no pickle)
+- PersistedBM25: lazily loaded, cross-process-fresh handle used by the app;
+  its load/modify/save cycles hold an flock, and unsaved changes are replayed
+  onto a file another process saved meanwhile, so no writer's documents are lost
+
+Tokenization is left to the caller: documents and queries are token lists.
+"""
+import fcntl
+import math
+import os
+from collections import Counter
+from contextlib import contextmanager
+from threading import Lock, RLock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+COMPACT_DEAD_FRACTION = 0.25   # tombstoned share of documents that triggers compact()
+COMPACT_MIN_DEAD = 64          # never compact for fewer tombstones than this
+
+
+class _Postings:
+    __slots__ = ("docs", "tfs", "pending_docs", "pending_tfs")
+
+    def __init__(self):
+        self.docs = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.float32)
+        self.pending_docs: List[int] = []
+        self.pending_tfs: List[int] = []
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.pending_docs:
+            self.docs = np.concatenate([self.docs, np.asarray(self.pending_docs, dtype=np.int32)])
+            self.tfs = np.concatenate([self.tfs, np.asarray(self.pending_tfs, dtype=np.float32)])
+            self.pending_docs = []
+            self.pending_tfs = []
+        return self.docs, self.tfs
+
+
+class SparseBM25Index:
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}        # term -> postings slot
+        self.postings: List[_Postings] = []
+        self.doc_ids: List[int] = []           # internal position -> object id
+        self.doc_lens: List[int] = []
+        self._pos_of: Dict[int, int] = {}      # object id -> live internal position
+        self._doc_lens_arr: Optional[np.ndarray] = None
+        self.dead: List[bool] = []             # internal position -> tombstoned
+        self._dead_arr: Optional[np.ndarray] = None
+        self.n_dead = 0
+        self.total_len = 0
+        self.lock = RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_ids) - self.n_dead
+
+    def add_documents(self, items: Iterable[Tuple[int, Sequence[str]]]) -> int:
+        """Add (object_id, tokens) pairs; ids already indexed are skipped. Returns count added."""
+        added = 0
+        with self.lock:
+            for obj_id, tokens in items:
+                obj_id = int(obj_id)
+                if obj_id in self._pos_of:
+                    continue
+                pos = len(self.doc_ids)
+                self.doc_ids.append(obj_id)
+                self.doc_lens.append(len(tokens))
+                self.dead.append(False)
+                self._pos_of[obj_id] = pos
+                self.total_len += len(tokens)
+                for term, tf in Counter(tokens).items():
+                    slot = self.vocab.get(term)
+                    if slot is None:
+                        slot = len(self.postings)
+                        self.vocab[term] = slot
+                        self.postings.append(_Postings())
+                    p = self.postings[slot]
+                    p.pending_docs.append(pos)
+                    p.pending_tfs.append(tf)
+                added += 1
+            if added:
+                self._doc_lens_arr = None
+                self._dead_arr = None
+        return added
+
+    def remove_documents(self, object_ids: Iterable[int]) -> int:
+        """Tombstone indexed documents (unknown ids are ignored). Returns count removed."""
+        removed = 0
+        with self.lock:
+            for obj_id in object_ids:
+                pos = self._pos_of.pop(int(obj_id), None)
+                if pos is None:
+                    continue
+                self.dead[pos] = True
+                self.total_len -= self.doc_lens[pos]
+                removed += 1
+            if removed:
+                self.n_dead += removed
+                self._dead_arr = None
+                if self.n_dead >= COMPACT_MIN_DEAD and self.n_dead >= COMPACT_DEAD_FRACTION * len(self.doc_ids):
+                    self.compact()
+        return removed
+
+    def compact(self):
+        """Drop tombstoned documents from postings and document arrays (renumbers positions)."""
+        with self.lock:
+            if not self.n_dead:
+                return
+            dead = np.asarray(self.dead, dtype=bool)
+            # positions keep their order, so postings stay sorted
+            new_pos = (np.cumsum(~dead) - 1).astype(np.int32)
+            vocab: Dict[str, int] = {}
+            postings: List[_Postings] = []
+            for term, slot in self.vocab.items():
+                docs, tfs = self.postings[slot].arrays()
+                live = ~dead[docs]
+                if not live.any():
+                    continue   # term only occurred in removed documents
+                p = _Postings()
+                p.docs = new_pos[docs[live]]
+                p.tfs = tfs[live]
+                vocab[term] = len(postings)
+                postings.append(p)
+            keep = np.flatnonzero(~dead).tolist()
+            self.vocab = vocab
+            self.postings = postings
+            self.doc_ids = [self.doc_ids[i] for i in keep]
+            self.doc_lens = [self.doc_lens[i] for i in keep]
+            self.dead = [False] * len(keep)
+            self.n_dead = 0
+            self._pos_of = {obj_id: pos for pos, obj_id in enumerate(self.doc_ids)}
+            self._doc_lens_arr = None
+            self._dead_arr = None
+
+    def search(
+        self, query_tokens: Sequence[str], top_k: int, min_coverage: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to top_k (object_id, score) pairs with score > 0, best first.
+
+        min_coverage drops documents that match less than that idf-weighted fraction
+        of the distinct query terms (terms unknown to the corpus count as unmatched).
+        """
+        with self.lock:
+            n_docs = len(self)
+            if not n_docs or top_k <= 0:
+                return []
+            q_counts = Counter(query_tokens)
+            q_terms = [(self.vocab[t], c) for t, c in q_counts.items() if t in self.vocab]
+            if not q_terms:
+                return []
+
+            if self._doc_lens_arr is None:
+                self._doc_lens_arr = np.asarray(self.doc_lens, dtype=np.float32)
+            if self.n_dead and self._dead_arr is None:
+                self._dead_arr = np.asarray(self.dead, dtype=bool)
+            # compact() rebinds doc_ids (add_documents only appends): this list
+            # stays valid for the positions read below after the lock is released
+            doc_ids = self.doc_ids
+            avgdl = self.total_len / n_docs if self.total_len else 1.0
+            k1, b = self.k1, self.b
+
+            cand_docs = []
+            cand_scores = []
+            cand_idfs = []
+            # unknown terms get the idf of a term with df == 0
+            idf_total = (len(q_counts) - len(q_terms)) * math.log(1.0 + (n_docs + 0.5) / 0.5)
+            for slot, q_count in q_terms:
+                docs, tfs = self.postings[slot].arrays()
+                if self.n_dead:
+                    live = ~self._dead_arr[docs]
+                    docs, tfs = docs[live], tfs[live]
+                df = docs.shape[0]
+                if not df:
+                    idf_total += math.log(1.0 + (n_docs + 0.5) / 0.5)
+                    continue
+                # non-negative (Lucene-style) idf, so very common terms never subtract
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                idf_total += idf
+                norm = k1 * (1.0 - b + b * self._doc_lens_arr[docs] / avgdl)
+                cand_docs.append(docs)
+                cand_scores.append(q_count * idf * tfs * (k1 + 1.0) / (tfs + norm))
+                cand_idfs.append(np.full(df, idf, dtype=np.float32))
+
+        if not cand_docs:
+            return []
+        docs = np.concatenate(cand_docs)
+        scores = np.concatenate(cand_scores)
+        uniq, inverse = np.unique(docs, return_inverse=True)
+        totals = np.bincount(inverse, weights=scores)
+
+        if min_coverage > 0.0 and idf_total > 0.0:
+            coverage = np.bincount(inverse, weights=np.concatenate(cand_idfs)) / idf_total
+            keep = np.flatnonzero(coverage >= min_coverage)
+            uniq, totals = uniq[keep], totals[keep]
+            if not uniq.shape[0]:
+                return []
+
+        if totals.shape[0] > top_k:
+            best = np.argpartition(-totals, top_k - 1)[:top_k]
+        else:
+            best = np.arange(totals.shape[0])
+        best = best[np.argsort(-totals[best], kind="stable")]
+        return [(doc_ids[int(uniq[i])], float(totals[i])) for i in best]
+
+    # --- persistence ---
+
+    def save(self, path: str):
+        """Write the index to path (.npz) atomically."""
+        with self.lock:
+            terms = [""] * len(self.vocab)
+            for term, slot in self.vocab.items():
+                terms[slot] = term
+            docs_parts, tfs_parts, offsets = [], [], [0]
+            for p in self.postings:
+                d, t = p.arrays()
+                docs_parts.append(d)
+                tfs_parts.append(t)
+                offsets.append(offsets[-1] + d.shape[0])
+            payload = {
+                "terms": np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                "offsets": np.asarray(offsets, dtype=np.int64),
+                "post_docs": np.concatenate(docs_parts) if docs_parts else np.empty(0, dtype=np.int32),
+                "post_tfs": np.concatenate(tfs_parts) if tfs_parts else np.empty(0, dtype=np.float32),
+                "doc_ids": np.asarray(self.doc_ids, dtype=np.int64),
+                "doc_lens": np.asarray(self.doc_lens, dtype=np.int32),
+                "dead": np.asarray(self.dead, dtype=bool),
+                "params": np.asarray([self.k1, self.b], dtype=np.float64),
+            }
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, **payload)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SparseBM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = (float(x) for x in data["params"])
+            idx = cls(k1=k1, b=b)
+            blob = data["terms"].tobytes().decode("utf-8")
+            terms = blob.split("\n") if blob else []
+            offsets = data["offsets"]
+            post_docs = data["post_docs"]
+            post_tfs = data["post_tfs"]
+            doc_ids = data["doc_ids"].tolist()
+            doc_lens = data["doc_lens"].tolist()
+            dead = data["dead"].tolist() if "dead" in data.files else [False] * len(doc_ids)
+
+        idx.vocab = {t: i for i, t in enumerate(terms)}
+        for i in range(len(terms)):
+            p = _Postings()
+            p.docs = post_docs[offsets[i]:offsets[i + 1]]
+            p.tfs = post_tfs[offsets[i]:offsets[i + 1]]
+            idx.postings.append(p)
+        idx.doc_ids = doc_ids
+        idx.doc_lens = doc_lens
+        idx.dead = dead
+        idx.n_dead = int(sum(dead))
+        idx._pos_of = {obj_id: pos for pos, obj_id in enumerate(doc_ids) if not dead[pos]}
+        idx.total_len = int(sum(n for n, d in zip(doc_lens, dead) if not d))
+        return idx
+
+
+class PersistedBM25:
+    """
+    Process-wide handle on a SparseBM25Index persisted under INDEX_CACHE_DIR.
+
+    get() reuses the in-process copy, reloads it when another process has saved a
+    newer file, and rebuilds via build_fn() when the file is missing or its size
+    disagrees with count_fn() (e.g. rows were written while nobody persisted).
+    Changes made here since the last save are kept as a log: a reload or a save
+    that finds a newer file replays them onto it, under an exclusive flock on a
+    sidecar .lock file, so concurrent writers merge instead of overwriting.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        build_fn: Callable[[], Iterable[Tuple[int, Sequence[str]]]],
+        count_fn: Callable[[], int],
+    ):
+        self.filename = filename
+        self.build_fn = build_fn
+        self.count_fn = count_fn
+        self._index: Optional[SparseBM25Index] = None
+        self._stamp = None
+        self._pending: List[Tuple[str, Any]] = []   # ("add", items) / ("remove", ids) not saved yet
+        self._lock = Lock()
+
+    def path(self) -> str:
+        # resolved lazily so settings are only read once Django is configured
+        from .utils import index_cache_path
+        return index_cache_path(self.filename)
+
+    @staticmethod
+    def _file_stamp(path: str):
+        """(inode, mtime): saves replace the file, so either changes with every save."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    @contextmanager
+    def _file_lock(self):
+        fd = os.open(f"{self.path()}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _replay(self, index: SparseBM25Index):
+        for op, arg in self._pending:
+            if op == "add":
+                index.add_documents(arg)
+            else:
+                index.remove_documents(arg)
+
+    def _load_newer(self, path: str, stamp) -> bool:
+        """Swap in the saved file plus our unsaved changes (caller holds both locks)."""
+        try:
+            index = SparseBM25Index.load(path)
+        except Exception:
+            return False
+        self._replay(index)
+        self._index = index
+        self._stamp = stamp
+        return True
+
+    def _save(self, index: SparseBM25Index):
+        path = self.path()
+        index.save(path)
+        self._stamp = self._file_stamp(path)
+        self._pending = []
+
+    def get(self) -> SparseBM25Index:
+        path = self.path()
+        index = self._index
+        if index is not None and self._file_stamp(path) == self._stamp:
+            return index
+
+        with self._lock:
+            if self._index is not None and self._file_stamp(path) == self._stamp:
+                return self._index
+            with self._file_lock():
+                stamp = self._file_stamp(path)
+                loaded = stamp is not None and self._load_newer(path, stamp)
+                if not loaded or len(self._index) != self.count_fn():
+                    index = SparseBM25Index()
+                    index.add_documents(self.build_fn())
+                    self._index = index
+                    self._save(index)
+            return self._index
+
+    def _apply(self, op: str, arg, persist: bool) -> int:
+        self.get()
+        with self._lock:
+            index = self._index
+            changed = index.add_documents(arg) if op == "add" else index.remove_documents(arg)
+            if changed:
+                self._pending.append((op, arg))
+        if changed and persist:
+            self.persist()
+        return changed
+
+    def add(self, items: Iterable[Tuple[int, Sequence[str]]], persist: bool = True) -> int:
+        """Incrementally index (object_id, tokens) pairs; optionally persist right away."""
+        return self._apply("add", [(int(obj_id), list(tokens)) for obj_id, tokens in items], persist)
+
+    def remove(self, object_ids: Iterable[int], persist: bool = True) -> int:
+        """Drop documents from the index (e.g. before re-adding changed ones)."""
+        return self._apply("remove", [int(x) for x in object_ids], persist)
+
+    def persist(self):
+        """
+        Write the in-process index to disk (no-op if it was never loaded). If another
+        process saved since we loaded, its file plus our unsaved changes is written.
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            with self._file_lock():
+                path = self.path()
+                stamp = self._file_stamp(path)
+                if stamp is not None and stamp != self._stamp:
+                    self._load_newer(path, stamp)
+                self._save(self._index)
@@ -0,0 +1,53 @@
+# ss_app/logic/boilerplate.py
+"""
+Crawl-wide boilerplate detection (repeated footers, cookie banners, navigation).
+
+A paragraph is boilerplate when its exact text hash was seen on more than
+`fraction` of the pages observed so far (after `min_pages` pages). Only exact
+duplicates count: near-duplicate matching also swallowed real content written
+from a template (how-to steps, "... page number N" paragraphs), and chrome that
+varies per page (a year, a page title) is rare enough to just be embedded.
+
+Pages answered with 304 are observed too, from the hashes stored with the page,
+so a re-crawl where little changed still sees the whole site.
+
+Django-free; observe() is called from the crawler's embed thread and its
+coordinator, hence the lock.
+"""
+from threading import Lock
+from typing import Dict, List, Sequence, Set
+
+
+class BoilerplateDetector:
+    def __init__(self, fraction: float = 0.5, min_pages: int = 5):
+        self.fraction = fraction
+        self.min_pages = max(1, min_pages)
+        self.pages = 0
+        self._page_count: Dict[str, int] = {}   # hash -> pages it appeared on
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.fraction < 1
+
+    def _is_boilerplate(self, count: int) -> bool:
+        return self.pages >= self.min_pages and count > self.fraction * self.pages
+
+    def observe(self, hashes: Sequence[str]) -> List[bool]:
+        """Count one page's paragraph hashes; returns a per-paragraph boilerplate mask."""
+        if not self.enabled:
+            return [False] * len(hashes)
+        with self._lock:
+            self.pages += 1
+            for h in set(hashes):
+                self._page_count[h] = self._page_count.get(h, 0) + 1
+            return [self._is_boilerplate(self._page_count[h]) for h in hashes]
+
+    def boilerplate_hashes(self) -> Set[str]:
+        """Hashes of every paragraph that is boilerplate now."""
+        with self._lock:
+            return {h for h, n in self._page_count.items() if self._is_boilerplate(n)}
+
+    def boilerplate_hash_count(self) -> int:
+        """Number of distinct paragraph texts (exact hashes) that are boilerplate now."""
+        return len(self.boilerplate_hashes())
@@ -1,5 +1,10 @@
 # ss_app/logic/chatbot_core.py
-from typing import List, Dict, Any, Optional
+import re
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import BoundedSemaphore
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from django.db import close_old_connections
 from .session_helpers import (
     init_session_history_if_needed,
     append_user_message,
@@ -8,90 +13,358 @@ from .session_helpers import (
 )
 from .embedding_model import default_embedder
 from .index_manager import faiss_manager
+from .bm25_index import PersistedBM25
+from . import result_cache, query_cache
+from .docstore import ticket_docs
+from .result_cache import MISS
 from ss_app.models import Ticket
-import numpy as np
 
 DEFAULT_TOP_K = 3
 DEFAULT_THRESHOLD = 0.80
-FETCH_FACTOR = 5
 
 NAMESPACE_TICKETS = "tickets"
 
+# Hybrid (lexical + semantic) retrieval
+LEXICAL_FIELDS = ("short_description", "description", "rca", "solution")
+LEXICAL_MIN_COVERAGE = 0.5      # idf-weighted share of query terms a keyword hit must match
+LEXICAL_FETCH = 10              # lexical candidates considered for fusion
+RRF_K = 60                      # reciprocal-rank-fusion damping constant
+HYBRID_LATENCY_BUDGET = 2.0     # seconds for both branches together
+
+TICKET_BM25_FILE = "bm25_tickets.npz"
+
+# Keeps error codes (ORA-00942), hostnames (db01.corp.local) and paths intact
+_TICKET_TOKEN_RE = re.compile(r"[a-z0-9](?:[a-z0-9_.:/\-]*[a-z0-9])?")
+_TICKET_PART_RE = re.compile(r"[a-z0-9]+")
+
+SEARCH_POOL_WORKERS = 4
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_POOL_WORKERS, thread_name_prefix="ticket-search")
+# branches that missed their budget keep running: a free slot means a free worker
+_search_slots = BoundedSemaphore(SEARCH_POOL_WORKERS)
+
 
 # No SQL fallback – FAISS only.
 
 
-def _normalize_vector_safe(vec: Any) -> Optional[np.ndarray]:
-    try:
-        arr = np.array(vec, dtype="float32")
-    except Exception:
-        return None
-    if arr.ndim != 1:
-        arr = arr.reshape(-1)
-    norm = np.linalg.norm(arr)
-    if norm == 0 or np.isnan(norm):
-        return None
-    return (arr / norm).astype("float32")
+def _ticket_tokens(text: str) -> List[str]:
+    """Lowercased tokens; compound tokens also contribute their alphanumeric parts."""
+    out = []
+    for tok in _TICKET_TOKEN_RE.findall((text or "").lower()):
+        out.append(tok)
+        parts = _TICKET_PART_RE.findall(tok)
+        if len(parts) > 1:
+            out.extend(parts)
+    return out
 
 
-def semantic_search(
+def _ticket_lexical_text(fields) -> str:
+    return " ".join(f for f in fields if f)
+
+
+def _ticket_token_rows():
+    rows = Ticket.objects.order_by("id").values_list("id", *LEXICAL_FIELDS).iterator(chunk_size=2000)
+    return ((row[0], _ticket_tokens(_ticket_lexical_text(row[1:]))) for row in rows)
+
+
+_ticket_bm25 = PersistedBM25(TICKET_BM25_FILE, _ticket_token_rows, lambda: Ticket.objects.count())
+
+
+def index_tickets_lexical(tickets, persist: bool = True) -> int:
+    """Add Ticket instances to the ticket keyword index (call after ingest)."""
+    return _ticket_bm25.add(
+        ((t.id, _ticket_tokens(_ticket_lexical_text(getattr(t, f) for f in LEXICAL_FIELDS))) for t in tickets),
+        persist=persist,
+    )
+
+
+def reindex_tickets_lexical(tickets, persist: bool = True) -> int:
+    """Replace the keyword-index entries of tickets whose text changed (upserts)."""
+    tickets = list(tickets)
+    _ticket_bm25.remove((t.id for t in tickets), persist=False)
+    return index_tickets_lexical(tickets, persist=persist)
+
+
+def persist_ticket_lexical():
+    """Flush the in-process ticket keyword index to disk (after index_tickets_lexical(persist=False))."""
+    _ticket_bm25.persist()
+
+
+def lexical_candidates(query: str, top_k: int = LEXICAL_FETCH) -> List[Tuple[int, float]]:
+    """Keyword (BM25) ticket hits as (ticket_id, bm25_score), best first."""
+    tokens = _ticket_tokens(query)
+    if not tokens:
+        return []
+    return _ticket_bm25.get().search(tokens, top_k, min_coverage=LEXICAL_MIN_COVERAGE)
+
+
+def _query_guard(query: str) -> frozenset:
+    """
+    Tokens that must match exactly for a near-duplicate cache hit: anything with a
+    digit (error codes, hostnames, versions) can flip the answer while barely
+    moving the embedding.
+    """
+    return frozenset(t for t in _ticket_tokens(query) if any(c.isdigit() for c in t))
+
+
+def sync_ticket_index(namespace: str = NAMESPACE_TICKETS):
+    """Build / catch up the ticket FAISS namespace (a stat() when already current)."""
+    faiss_manager.safe_sync_from_db(
+        namespace,
+        Ticket.objects.filter(embedding__isnull=False).values_list("id", "embedding")
+    )
+
+
+def semantic_candidates(
     query: str,
     embedding_model=default_embedder,
     top_k: int = DEFAULT_TOP_K,
     threshold: float = DEFAULT_THRESHOLD,
     namespace: str = NAMESPACE_TICKETS,
-):
-    # Embed query
-    q_emb = embedding_model.generate_embedding(query)
-    if not q_emb:
-        return []
-
-    q_arr = _normalize_vector_safe(q_emb)
+    q_arr: Optional[np.ndarray] = None,
+    collapse_duplicates: bool = False,
+) -> List[Tuple[int, float]]:
+    """
+    FAISS ticket hits >= threshold as (ticket_id, similarity), best first.
+    collapse_duplicates returns one ticket per identical embedding (same text).
+    """
+    # Embed query (normalized float32 ndarray, passed to FAISS as-is)
+    if q_arr is None:
+        q_arr = embedding_model.generate_embedding(query)
     if q_arr is None:
         return []
 
     # Ensure FAISS index is ready
-    faiss_manager.safe_build_from_db_if_empty(
-        namespace,
-        lambda: list(
-            Ticket.objects.filter(embedding__isnull=False)
-            .values_list("id", "embedding")
-        )
-    )
+    sync_ticket_index(namespace)
 
-    # Run FAISS search
-    candidates = faiss_manager.safe_search(
+    # Threshold-bounded FAISS search: only hits >= threshold come back
+    return faiss_manager.safe_range_search(
         namespace,
         q_arr,
-        top_k=top_k * FETCH_FACTOR
+        threshold,
+        top_k=top_k,
+        normalized=True,
+        collapse_duplicates=collapse_duplicates,
     )
 
-    results: List[Dict[str, Any]] = []
 
-    if candidates:
-        ids = [c[0] for c in candidates]
-        tickets = {t.id: t for t in Ticket.objects.filter(id__in=ids)}
+def _hydrate_tickets(ranked: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Attach display fields to (ticket_id, extra) pairs, preserving order."""
+    if not ranked:
+        return []
+    # display fields come from the docstore: no DB query once it is warm
+    docs = ticket_docs.get_many(obj_id for obj_id, _ in ranked)
 
-        for obj_id, score in candidates:
-            t = tickets.get(obj_id)
-            if not t:
-                continue
+    results: List[Dict[str, Any]] = []
+    for obj_id, extra in ranked:
+        d = docs.get(obj_id)
+        if not d:
+            continue
+        results.append({
+            "id": obj_id,
+            "short_description": d["short_description"],
+            "solution": d["solution"],
+            "rca": d["rca"],
+            **extra,
+        })
+    return results
 
-            results.append({
-                "id": t.id,
-                "short_description": t.short_description,
-                "solution": t.solution,
-                "rca": t.rca,
-                "score": round(float(score), 4),
-            })
 
-    if not results:
+def semantic_search(
+    query: str,
+    embedding_model=default_embedder,
+    top_k: int = DEFAULT_TOP_K,
+    threshold: float = DEFAULT_THRESHOLD,
+    namespace: str = NAMESPACE_TICKETS,
+    collapse_duplicates: bool = False,
+):
+    q_arr = embedding_model.generate_embedding(query)
+    if q_arr is None:
         return []
 
-    # Apply threshold
-    filtered = [r for r in results if r["score"] >= threshold]
-    filtered = sorted(filtered, key=lambda x: x["score"], reverse=True)
-    return filtered[:top_k]
+    # paraphrase of a recent query -> reuse its hits, no FAISS/DB work
+    params = ("semantic", top_k, threshold, collapse_duplicates, result_cache.model_key(embedding_model))
+    guard = _query_guard(query)
+    version = query_cache.corpus_version(namespace)
+    cached = query_cache.lookup(namespace, q_arr, params, guard, version=version)
+    if cached is not MISS:
+        return cached
+
+    candidates = semantic_candidates(
+        query, embedding_model, top_k, threshold, namespace, q_arr=q_arr, collapse_duplicates=collapse_duplicates
+    )
+
+    # Nothing qualifies -> skip hydration entirely
+    # (candidates arrive best-first and already above threshold)
+    hits = _hydrate_tickets([(obj_id, {"score": round(float(score), 4)}) for obj_id, score in candidates])
+    query_cache.store(namespace, q_arr, params, hits, guard, version=version)
+    return hits
+
+
+def _hybrid_params(top_k, threshold, embedding_model, collapse_duplicates):
+    return ("hybrid", top_k, threshold, collapse_duplicates, result_cache.model_key(embedding_model))
+
+
+def _semantic_branch(query, embedding_model, top_k, threshold, namespace, guard, version, collapse_duplicates):
+    """
+    Hybrid search's semantic side: embed, then either a near-duplicate cache hit
+    (returned as the final payload) or fresh FAISS candidates.
+    Returns (q_arr, candidates, cached_payload_or_MISS).
+    """
+    q_arr = embedding_model.generate_embedding(query)
+    if q_arr is None:
+        return None, [], MISS
+    params = _hybrid_params(top_k, threshold, embedding_model, collapse_duplicates)
+    cached = query_cache.lookup(namespace, q_arr, params, guard, version=version)
+    if cached is not MISS:
+        return q_arr, [], cached
+    candidates = semantic_candidates(
+        query, embedding_model, top_k, threshold, namespace, q_arr=q_arr, collapse_duplicates=collapse_duplicates
+    )
+    return q_arr, candidates, MISS
+
+
+def _run_in_pool(fn, *args):
+    # pool threads hold their own DB connections; drop stale ones around each task
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
+
+
+def _submit_branch(fn, *args) -> Optional[Future]:
+    """Run a search branch on the pool, or return None while every worker is still busy."""
+    if not _search_slots.acquire(blocking=False):
+        return None
+    try:
+        future = _search_pool.submit(_run_in_pool, fn, *args)
+    except BaseException:
+        _search_slots.release()
+        raise
+    future.add_done_callback(lambda _: _search_slots.release())
+    return future
+
+
+def _run_inline(fn, *args) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Dict[str, List[Tuple[int, float]]], k: int = RRF_K
+) -> List[Tuple[int, float, Dict[str, float]]]:
+    """Fuse ranked (id, score) lists; returns (id, rrf_score, {list_name: score}) best first."""
+    fused: Dict[int, float] = {}
+    sources: Dict[int, Dict[str, float]] = {}
+    for name, hits in ranked_lists.items():
+        for rank, (obj_id, score) in enumerate(hits, start=1):
+            fused[obj_id] = fused.get(obj_id, 0.0) + 1.0 / (k + rank)
+            sources.setdefault(obj_id, {})[name] = score
+    order = sorted(fused, key=lambda i: fused[i], reverse=True)
+    return [(i, fused[i], sources[i]) for i in order]
+
+
+def hybrid_search(
+    query: str,
+    embedding_model=default_embedder,
+    top_k: int = DEFAULT_TOP_K,
+    threshold: float = DEFAULT_THRESHOLD,
+    namespace: str = NAMESPACE_TICKETS,
+    latency_budget: float = HYBRID_LATENCY_BUDGET,
+    collapse_duplicates: bool = False,
+):
+    """
+    Run FAISS (>= threshold) and keyword BM25 ticket search concurrently and merge
+    them with reciprocal-rank fusion. A branch that misses the latency budget is
+    dropped for this query, as is the semantic branch while all pool workers are
+    still busy with earlier branches that missed theirs. Exact error
+    codes/hostnames thus surface even when their embedding similarity is below
+    the cutoff.
+    collapse_duplicates keeps one ticket per identical text (FAISS collapses
+    shared embeddings; keyword hits repeating a shown ticket's fields are skipped).
+    Complete results are cached per corpus version (see result_cache).
+    """
+    cache_key = result_cache.make_key(
+        namespace, query, top_k, threshold, embedding_model, variant="collapsed" if collapse_duplicates else ""
+    )
+    cached = result_cache.get_cached(cache_key)
+    if cached is not MISS:
+        return cached
+
+    # model and index (re)loading is not query work: do it before the latency budget
+    # starts, otherwise a fresh process would always drop the semantic branch
+    embedding_model.warm_up()
+    sync_ticket_index(namespace)
+    _ticket_bm25.get()
+
+    guard = _query_guard(query)
+    version = query_cache.corpus_version(namespace)
+    # a pool saturated by slow queries skips the semantic branch (degraded, not cached)
+    # rather than queueing it behind them; the cheap keyword branch then runs here
+    sem_f = _submit_branch(
+        _semantic_branch, query, embedding_model, top_k, threshold, namespace, guard, version,
+        collapse_duplicates,
+    )
+    lex_f = _submit_branch(lexical_candidates, query, max(top_k, LEXICAL_FETCH))
+    if lex_f is None:
+        lex_f = _run_inline(lexical_candidates, query, max(top_k, LEXICAL_FETCH))
+    wait([f for f in (sem_f, lex_f) if f is not None], timeout=latency_budget)
+
+    q_arr = None
+    ranked_lists: Dict[str, List[Tuple[int, float]]] = {}
+    if sem_f is not None and sem_f.done() and sem_f.exception() is None:
+        q_arr, candidates, near_dup = sem_f.result()
+        if near_dup is not MISS:
+            # near-duplicate of a recent query: its fused, hydrated hits are final
+            return near_dup
+        ranked_lists["semantic"] = candidates
+    if lex_f.done() and lex_f.exception() is None:
+        ranked_lists["lexical"] = lex_f.result() or []
+
+    fused = reciprocal_rank_fusion(ranked_lists)
+    if not collapse_duplicates:
+        fused = fused[:top_k]
+    hits = _hydrate_tickets([
+        (obj_id, {
+            "score": round(float(src["semantic"]), 4) if "semantic" in src else None,
+            "lexical_score": round(float(src["lexical"]), 4) if "lexical" in src else None,
+            "rrf_score": round(rrf, 6),
+            "match": "both" if len(src) > 1 else next(iter(src)),
+        })
+        for obj_id, rrf, src in fused
+    ])
+    if collapse_duplicates:
+        hits = _collapse_hits(hits)[:top_k]
+
+    # a branch that missed the budget gives a degraded answer; don't pin it
+    if len(ranked_lists) == 2:
+        result_cache.set_cached(cache_key, hits)
+        if q_arr is not None:
+            params = _hybrid_params(top_k, threshold, embedding_model, collapse_duplicates)
+            query_cache.store(namespace, q_arr, params, hits, guard, version=version)
+    return hits
+
+
+def _collapse_hits(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop hits whose display fields repeat an earlier (better ranked) hit."""
+    seen = set()
+    out = []
+    for h in hits:
+        text = (h["short_description"], h["rca"], h["solution"])
+        if text not in seen:
+            seen.add(text)
+            out.append(h)
+    return out
+
+
+def _match_label(hit: Dict[str, Any]) -> str:
+    if hit.get("score") is None:
+        return "Keyword match"
+    return f"Similarity: {hit['score']}"
 
 
 def chatbot_search(
@@ -101,16 +374,18 @@ def chatbot_search(
     top_k: int = DEFAULT_TOP_K,
     threshold: float = DEFAULT_THRESHOLD,
     namespace: str = NAMESPACE_TICKETS,
+    collapse_duplicates: bool = False,
 ):
     init_session_history_if_needed(request)
     append_user_message(request, query)
 
-    hits = semantic_search(
+    hits = hybrid_search(
         query,
         embedding_model=embedding_model,
         top_k=top_k,
         threshold=threshold,
         namespace=namespace,
+        collapse_duplicates=collapse_duplicates,
     )
 
     request.session["last_query"] = query
@@ -134,7 +409,7 @@ def chatbot_search(
         f"Short Description: {h['short_description']}\n"
         f"RCA: {h['rca']}\n"
         f"Solution: {h['solution']}\n"
-        f"(Similarity: {h['score']})"
+        f"({_match_label(h)})"
         for i, h in enumerate(hits)
     ])
 
@@ -0,0 +1,147 @@
+# ss_app/logic/crawl_frontier.py
+"""
+Crawl frontier: FIFO of URLs still to fetch plus the set of every URL ever queued.
+
+URLs are canonicalized before dedupe (lower-cased scheme/host, default port,
+fragment and trailing slash dropped, query parameters sorted), so trivially
+different spellings of one page are fetched once. Queue and dedupe are O(1).
+
+PersistentCrawlFrontier mirrors the frontier into CrawlFrontierEntry rows
+(batched inserts/updates) so an interrupted crawl_site resumes where it stopped:
+pending rows are queued again, every stored URL counts as seen.
+"""
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+from django.utils import timezone
+
+from ss_app.models import CrawlFrontierEntry
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+FLUSH_EVERY = 200   # buffered frontier changes written per batch
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """Canonical form of an http(s) URL, or None for other schemes / malformed URLs."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if port and port != _DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    # sort raw "k=v" pairs: keeps the original encoding and bare keys ("?flag")
+    query = "&".join(sorted(p for p in parts.query.split("&") if p))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+class CrawlFrontier:
+    """In-memory frontier (deque + seen set)."""
+
+    def __init__(self, seeds: Iterable[str] = ()):
+        self._queue: Deque[str] = deque()
+        self._seen: Set[str] = set()
+        for url in seeds:
+            self.add(url)
+
+    def add(self, url: str) -> bool:
+        """Queue url unless its canonical form was seen before; True if queued."""
+        canon = canonicalize_url(url)
+        if canon is None or canon in self._seen:
+            return False
+        self._seen.add(canon)
+        self._queue.append(canon)
+        self._on_added(canon)
+        return True
+
+    def pop(self) -> Optional[str]:
+        return self._queue.popleft() if self._queue else None
+
+    def mark_done(self, url: str, failed: bool = False):
+        """Record that a popped URL was crawled (or failed for good)."""
+
+    def flush(self):
+        """Write buffered changes (no-op in memory)."""
+
+    def _on_added(self, url: str):
+        pass
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self._seen
+
+    @property
+    def seen_count(self) -> int:
+        return len(self._seen)
+
+
+class PersistentCrawlFrontier(CrawlFrontier):
+    """
+    Frontier backed by CrawlFrontierEntry rows for one seed URL.
+    Resumes when the seed has pending rows; a finished (or restart=True) crawl
+    starts over from the seed.
+    """
+
+    def __init__(self, seed: str, restart: bool = False, flush_every: int = FLUSH_EVERY):
+        super().__init__()
+        self.seed = canonicalize_url(seed) or seed
+        self.flush_every = max(1, flush_every)
+        self._new: List[str] = []
+        self._finished: Dict[str, List[str]] = {
+            CrawlFrontierEntry.STATE_DONE: [],
+            CrawlFrontierEntry.STATE_FAILED: [],
+        }
+
+        rows = CrawlFrontierEntry.objects.filter(seed=self.seed)
+        if restart or not rows.filter(state=CrawlFrontierEntry.STATE_PENDING).exists():
+            rows.delete()
+            self.resumed = 0
+            self.add(self.seed)
+            return
+
+        self._seen.update(rows.values_list("url", flat=True).iterator(chunk_size=5000))
+        self._queue.extend(
+            rows.filter(state=CrawlFrontierEntry.STATE_PENDING)
+            .order_by("id")
+            .values_list("url", flat=True)
+            .iterator(chunk_size=5000)
+        )
+        self.resumed = len(self._queue)
+
+    def _on_added(self, url: str):
+        self._new.append(url)
+        if len(self._new) >= self.flush_every:
+            self.flush()
+
+    def mark_done(self, url: str, failed: bool = False):
+        state = CrawlFrontierEntry.STATE_FAILED if failed else CrawlFrontierEntry.STATE_DONE
+        self._finished[state].append(url)
+        if sum(len(v) for v in self._finished.values()) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        # inserts first, so a URL finished in the same batch already has its row
+        if self._new:
+            CrawlFrontierEntry.objects.bulk_create(
+                [CrawlFrontierEntry(seed=self.seed, url=u) for u in self._new],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+            self._new = []
+        now = timezone.now()
+        for state, urls in self._finished.items():
+            for start in range(0, len(urls), 1000):
+                CrawlFrontierEntry.objects.filter(seed=self.seed, url__in=urls[start:start + 1000]).update(
+                    state=state, updated_at=now
+                )
+            urls.clear()
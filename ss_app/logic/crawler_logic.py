@@ -1,17 +1,133 @@
 # ss_app/logic/crawler_logic.py
-import time
+"""
+Concurrent same-domain crawler.
+
+iter_crawl() runs the crawl as stages connected by bounded queues:
+  fetch  (CONCURRENCY threads sharing one pooled requests.Session; each request
+          first waits for its host's slot: at most one request start per
+          `delay` seconds per host, so slow responses overlap but load does not)
+  parse  (PARSE_WORKERS threads: BeautifulSoup -> title, paragraphs, links)
+  embed  (one thread: one generate_batch call per page, new paragraphs only)
+and yields embedded pages on the calling thread, which owns the frontier
+(crawl_frontier.py: canonical-URL dedupe, optionally persisted for resuming)
+and is the only one touching the DB (crawl_site stores pages, FAISS and BM25).
+Queue bounds (QUEUE_SIZE) keep fast fetchers from running ahead of embedding.
+iter_crawl takes an optional session / embed_fn, so it can be exercised against
+a local HTTP server without a model or database.
+
+Re-crawls are incremental: the caller's known_pages lookup supplies each URL's
+stored ETag / Last-Modified (sent as If-None-Match / If-Modified-Since; a 304
+yields NotModifiedPage and re-queues the stored links) and paragraph hashes
+(only paragraphs whose sha1 is new get embedded). crawl_site then diffs the
+page: new paragraphs are inserted and indexed, vanished ones deleted from the DB,
+FAISS and BM25, unchanged ones kept (order updated).
+
+Site chrome is dropped before embedding: a crawl-wide BoilerplateDetector
+(boilerplate.py: exact text hash) marks paragraphs seen on more than
+BOILERPLATE_FRACTION of the pages, 304 pages included via the hashes stored with
+them; copies stored before that became clear are deleted when the crawl ends.
+
+Writes are batched: a page's new paragraphs go in with one bulk_create that
+already carries their embeddings, and FAISS/BM25 and the display docstores
+(docstore.py) are updated (and the web corpus version bumped) once per
+INDEX_EVERY_PAGES stored pages.
+"""
+import hashlib
+import queue
 import re
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
+
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
 import urllib3
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
 from ss_app.sub_models.webcrawl_models import Page, Paragraph
-from ss_app.logic.embedding_model import default_embedder, EMBED_DIM
+from ss_app.logic.boilerplate import BoilerplateDetector
+from ss_app.logic.crawl_frontier import CrawlFrontier, PersistentCrawlFrontier, canonicalize_url
+from ss_app.logic.docstore import (
+    doc_rows, web_page_docs, web_paragraph_docs, WEB_PAGE_DOC_FIELDS, WEB_PARAGRAPH_DOC_FIELDS,
+)
+from ss_app.logic.embedding_model import default_embedder
 from ss_app.logic.index_manager import faiss_manager
+from ss_app.logic.result_cache import bump_corpus_version, record_changed_ids, CORPUS_WEB
+from ss_app.logic.retriever_logic import (
+    bm25_add_paragraphs,
+    bm25_persist,
+    bm25_remove_paragraphs,
+    precompute_sentences,
+)
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+NAMESPACE_WEB = "web_paragraphs"
+MIN_PARAGRAPH_CHARS = 40
+REQUEST_TIMEOUT = 15
+LIVENESS_CHECK_SECONDS = 5.0   # coordinator re-checks its stage threads this often while waiting
+
+DEFAULT_CONFIG = {
+    "CONCURRENCY": 4,       # fetch threads (and pooled connections)
+    "PARSE_WORKERS": 1,     # HTML parsing threads
+    "QUEUE_SIZE": 16,       # pages buffered between two stages
+    "INDEX_EVERY_PAGES": 10,  # stored pages per FAISS/BM25 update
+    "BOILERPLATE_FRACTION": 0.5,  # paragraphs on more than this share of pages are skipped (>= 1 disables)
+    "BOILERPLATE_MIN_PAGES": 5,   # pages seen before anything counts as boilerplate
+}
+
+_STOP = object()
+
+
+class KnownPage(NamedTuple):
+    """What is stored for a URL from an earlier crawl."""
+    etag: str
+    last_modified: str
+    hashes: FrozenSet[str]  # text_hash of its stored paragraphs
+    links: List[str]
+    page_hashes: Tuple[str, ...] = ()   # every paragraph hash of the last fetch, chrome included
+
+
+class CrawledPage(NamedTuple):
+    url: str
+    title: str
+    texts: List[str]        # qualifying paragraphs in page order (duplicates dropped)
+    hashes: List[str]       # sha1 per text
+    new_idx: List[int]      # positions of texts that were not known, i.e. embedded
+    vectors: np.ndarray     # (len(new_idx), dim), normalized float32
+    links: List[str]
+    etag: str
+    last_modified: str
+    boilerplate: int = 0    # paragraphs dropped as site chrome (not in texts)
+    page_hashes: Tuple[str, ...] = ()   # hashes before dropping chrome (Page.paragraph_hashes)
+
+
+class NotModifiedPage(NamedTuple):
+    url: str
+
+
+class CrawlError(NamedTuple):
+    url: str
+    message: str
+
+
+KnownPagesFn = Callable[[List[str]], Dict[str, KnownPage]]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _config() -> Dict[str, Any]:
+    cfg = dict(DEFAULT_CONFIG)
+    cfg.update(getattr(settings, "CRAWLER", {}) or {})
+    return cfg
+
 
 def _clean(text: str) -> str:
     if not text:
@@ -20,97 +136,486 @@ def _clean(text: str) -> str:
     return " ".join(text.split()).strip()
 
 
-def _embed_paragraph(para: Paragraph, text: str):
-    emb = default_embedder.generate_embedding(text)
-    if not emb:
-        emb = [0.0] * EMBED_DIM
-    if len(emb) < EMBED_DIM:
-        emb += [0.0] * (EMBED_DIM - len(emb))
-    elif len(emb) > EMBED_DIM:
-        emb = emb[:EMBED_DIM]
-    para.embedding = emb
-    para.save(update_fields=["embedding"])
-    return emb
+class HostRateLimiter:
+    """Space requests to the same host at least `delay` seconds apart, across threads."""
 
+    def __init__(self, delay: float):
+        self.delay = max(0.0, delay)
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
 
-def crawl_site(start_url: str, max_pages: int = 20, delay: float = 0.5):
-    parsed = urlparse(start_url)
-    base_domain = parsed.netloc
+    def wait(self, host: str, stop: Optional[threading.Event] = None):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.delay
+        pause = slot - time.monotonic()
+        if pause > 0:
+            if stop is not None:
+                stop.wait(pause)
+            else:
+                time.sleep(pause)
 
-    to_visit = [start_url]
-    visited = set()
-
-    pages_crawled = 0
-    paras_created = 0
-    errors = []
-
-    faiss_manager.safe_get_or_create("web_paragraphs")
 
+def make_session(pool_size: int) -> requests.Session:
     session = requests.Session()
     session.headers.update({"User-Agent": "DjangoKB/1.0"})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-    while to_visit and pages_crawled < max_pages:
-        url = to_visit.pop(0)
-        if url in visited:
+
+def _parse(url: str, html: str):
+    """HTML -> (title, qualifying paragraph texts, their hashes, absolute links without fragments)."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text().strip() if soup.title else url
+    texts, hashes, seen = [], [], set()
+    for p in soup.find_all("p"):
+        text = _clean(p.get_text())
+        if not text or len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        h = text_hash(text)
+        if h in seen:
             continue
+        seen.add(h)
+        texts.append(text)
+        hashes.append(h)
+    links = [urljoin(url, a["href"]).split("#")[0] for a in soup.find_all("a", href=True)]
+    return title, texts, hashes, links
 
+
+def _put(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    while not stop.is_set():
         try:
-            resp = session.get(url, timeout=15, verify=False)
-        except Exception as e:
-            errors.append(f"REQUEST_FAIL {url} -> {e}")
-            visited.add(url)
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
             continue
+    return False
 
-        if resp.status_code != 200:
-            errors.append(f"HTTP_{resp.status_code} {url}")
-            visited.add(url)
+
+def _get(q: "queue.Queue", stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
             continue
+    return _STOP
+
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        title = soup.title.get_text().strip() if soup.title else url
+def iter_crawl(
+    start_url: str,
+    max_pages: int = 20,
+    delay: float = 0.5,
+    concurrency: Optional[int] = None,
+    parse_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+    frontier: Optional[CrawlFrontier] = None,
+    known_pages: Optional[KnownPagesFn] = None,
+    boilerplate: Optional[BoilerplateDetector] = None,
+) -> Iterator[Union[CrawledPage, NotModifiedPage, CrawlError]]:
+    """
+    Crawl start_url's domain concurrently, yielding CrawledPage / NotModifiedPage /
+    CrawlError items as pages finish (not in discovery order). delay is the
+    per-host minimum interval between requests; None arguments fall back to
+    settings.CRAWLER. At most max_pages pages are visited (fetched or 304).
+    known_pages(urls) is called on this thread for each batch of URLs about to be
+    fetched. A URL is marked done in the frontier once the caller asks for the
+    next item, i.e. after it stored it. boilerplate, if given, filters each
+    fetched page's paragraphs before embedding; 304 pages are counted from
+    KnownPage.page_hashes.
+    """
+    cfg = _config()
+    concurrency = max(1, concurrency or cfg["CONCURRENCY"])
+    parse_workers = max(1, parse_workers or cfg["PARSE_WORKERS"])
+    queue_size = max(1, queue_size or cfg["QUEUE_SIZE"])
+    embed_fn = embed_fn or default_embedder.generate_batch
+    base_domain = urlparse(canonicalize_url(start_url) or start_url).netloc
+    frontier = frontier if frontier is not None else CrawlFrontier([start_url])
+    own_session = session is None
+    session = session or make_session(concurrency)
+    limiter = HostRateLimiter(delay)
 
-        page, _ = Page.objects.get_or_create(url=url, defaults={"title": title})
+    stop = threading.Event()
+    fetch_q: "queue.Queue" = queue.Queue()              # bounded by the in-flight cap below
+    parse_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    embed_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    out_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
 
-        created_ids = []
-        created_vecs = []
+    def fetcher():
+        while True:
+            item = _get(fetch_q, stop)
+            if item is _STOP:
+                return
+            try:
+                fetch(*item)
+            except Exception as e:
+                # every popped URL must produce a result, or the coordinator waits for it forever
+                _put(out_q, CrawlError(item[0], f"FETCH_FAIL {item[0]} -> {e}"), stop)
+
+    def fetch(url, known):
+        headers = {}
+        if known is not None:
+            if known.etag:
+                headers["If-None-Match"] = known.etag
+            if known.last_modified:
+                headers["If-Modified-Since"] = known.last_modified
+        limiter.wait(urlparse(url).netloc, stop)
+        try:
+            resp = session.get(url, timeout=REQUEST_TIMEOUT, verify=False, headers=headers)
+        except Exception as e:
+            _put(out_q, CrawlError(url, f"REQUEST_FAIL {url} -> {e}"), stop)
+            return
+        if resp.status_code == 304 and headers:
+            _put(out_q, NotModifiedPage(url), stop)
+            return
+        if resp.status_code != 200:
+            _put(out_q, CrawlError(url, f"HTTP_{resp.status_code} {url}"), stop)
+            return
+        validators = (resp.headers.get("ETag", ""), resp.headers.get("Last-Modified", ""))
+        _put(parse_q, (url, known, validators, resp.text), stop)
 
-        order = 0
-        for p in soup.find_all("p"):
-            text = _clean(p.get_text())
-            if not text or len(text) < 40:
+    def parser():
+        while True:
+            item = _get(parse_q, stop)
+            if item is _STOP:
+                return
+            url, known, validators, html = item
+            try:
+                parsed = _parse(url, html)
+            except Exception as e:
+                _put(out_q, CrawlError(url, f"PARSE_FAIL {url} -> {e}"), stop)
                 continue
+            _put(embed_q, (url, known, validators, parsed), stop)
+
+    def embedder():
+        while True:
+            item = _get(embed_q, stop)
+            if item is _STOP:
+                return
+            try:
+                page = embed(*item)
+            except Exception as e:
+                page = CrawlError(item[0], f"EMBED_FAIL {item[0]} -> {e}")
+            _put(out_q, page, stop)
+
+    def embed(url, known, validators, parsed) -> CrawledPage:
+        (etag, last_modified), (title, texts, hashes, links) = validators, parsed
+        dropped = 0
+        page_hashes = tuple(hashes)
+        if boilerplate is not None and texts:
+            mask = boilerplate.observe(hashes)
+            dropped = sum(mask)
+            if dropped:
+                texts = [t for t, bp in zip(texts, mask) if not bp]
+                hashes = [h for h, bp in zip(hashes, mask) if not bp]
+        known_hashes = known.hashes if known is not None else frozenset()
+        new_idx = [i for i, h in enumerate(hashes) if h not in known_hashes]
+        if new_idx:
+            vectors = embed_fn([texts[i] for i in new_idx])
+        else:
+            vectors = np.empty((0, 0), dtype=np.float32)
+        return CrawledPage(url, title, texts, hashes, new_idx, vectors, links, etag, last_modified, dropped,
+                           page_hashes)
+
+    threads = (
+        [threading.Thread(target=fetcher, name=f"crawl-fetch-{i}", daemon=True) for i in range(concurrency)]
+        + [threading.Thread(target=parser, name=f"crawl-parse-{i}", daemon=True) for i in range(parse_workers)]
+        + [threading.Thread(target=embedder, name="crawl-embed", daemon=True)]
+    )
+    for t in threads:
+        t.start()
+
+    in_flight: Dict[str, Optional[KnownPage]] = {}
+    crawled = 0
+    max_in_flight = concurrency + 2 * queue_size
+    try:
+        while crawled < max_pages:
+            # schedule: never more in flight than could still be needed
+            batch = []
+            while len(frontier) and len(in_flight) + len(batch) < min(max_in_flight, max_pages - crawled):
+                batch.append(frontier.pop())
+            if batch:
+                known = known_pages(batch) if known_pages else {}
+                for url in batch:
+                    in_flight[url] = known.get(url)
+                    fetch_q.put((url, in_flight[url]))
+            if not in_flight:
+                break
+            try:
+                result = out_q.get(timeout=LIVENESS_CHECK_SECONDS)
+            except queue.Empty:
+                dead = [t.name for t in threads if not t.is_alive()]
+                if not dead:
+                    continue
+                # a stage thread is gone: its in-flight URLs will never come back
+                for url in list(in_flight):
+                    yield CrawlError(url, f"WORKER_DIED {url} -> {', '.join(dead)}")
+                    frontier.mark_done(url, failed=True)
+                break
+            known_page = in_flight.pop(result.url, None)
+            if isinstance(result, CrawledPage):
+                links = result.links
+            elif isinstance(result, NotModifiedPage):
+                links = known_page.links if known_page is not None else []
+                if boilerplate is not None and known_page is not None:
+                    # unchanged pages still count towards what the site repeats
+                    boilerplate.observe(known_page.page_hashes or tuple(known_page.hashes))
+            else:
+                links = []
+            for link in links:
+                # compare canonical to canonical: "host:80" and "HOST" are the seed's domain too
+                canon = canonicalize_url(link)
+                if canon is not None and urlparse(canon).netloc == base_domain:
+                    frontier.add(canon)
+            if not isinstance(result, CrawlError):
+                crawled += 1
+            yield result
+            frontier.mark_done(result.url, failed=isinstance(result, CrawlError))
+    finally:
+        frontier.flush()
+        stop.set()
+        # fetchers still inside session.get finish in the background (daemon threads)
+        for t in threads:
+            t.join(timeout=1.0)
+        if own_session:
+            session.close()
+
 
-            para = Paragraph.objects.create(page=page, text=text, order=order)
-            order += 1
+def _known_pages(urls: List[str]) -> Dict[str, KnownPage]:
+    """Validators, paragraph hashes and links of already stored pages (two queries per batch)."""
+    pages = {
+        row[0]: row
+        for row in Page.objects.filter(url__in=urls).values_list(
+            "url", "id", "etag", "last_modified", "links", "paragraph_hashes"
+        )
+    }
+    if not pages:
+        return {}
+    hashes: Dict[int, set] = {row[1]: set() for row in pages.values()}
+    for page_id, h, text in Paragraph.objects.filter(page_id__in=list(hashes)).values_list("page_id", "text_hash", "text"):
+        hashes[page_id].add(h or text_hash(text))
+    return {
+        url: KnownPage(etag, last_modified, frozenset(hashes[page_id]), links or [], tuple(page_hashes or ()))
+        for url, (_, page_id, etag, last_modified, links, page_hashes) in pages.items()
+    }
+
+
+class _WebIndexBatch:
+    """
+    Pending FAISS/BM25/docstore changes of the crawl, applied every `every` pages.
+    Vectors only go to an already populated in-process index: an empty one is
+    built from the DB (including these rows) by its first search.
+    """
+
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self.pages = 0
+        self.ids: List[int] = []
+        self.vecs: List[np.ndarray] = []
+        self.texts: List[str] = []
+        self.removed: List[int] = []
+        self.paragraphs: List[Paragraph] = []   # created rows, for the display docstore
+        self.stored_pages: Dict[int, Page] = {}
 
-            vec = _embed_paragraph(para, text)
-            created_ids.append(para.id)
-            created_vecs.append(vec)
-            paras_created += 1
+    def page_stored(self, errors: List[str]):
+        self.pages += 1
+        if self.pages >= self.every:
+            self.flush(errors)
 
-        # update FAISS safely
-        if created_ids:
+    def flush(self, errors: List[str]):
+        self.pages = 0
+        if self.stored_pages:
+            # titles can change without paragraph changes
+            web_page_docs.put_many(doc_rows(self.stored_pages.values(), WEB_PAGE_DOC_FIELDS))
+            self.stored_pages = {}
+        if not (self.ids or self.removed):
+            return
+        if self.removed:
+            faiss_manager.safe_remove(NAMESPACE_WEB, self.removed)
             try:
-                faiss_manager.safe_add("web_paragraphs", created_ids, created_vecs)
+                bm25_remove_paragraphs(self.removed, persist=False)
             except Exception as e:
-                errors.append(f"FAISS_ADD_FAIL {url} -> {e}")
+                errors.append(f"BM25_REMOVE_FAIL -> {e}")
+            record_changed_ids(CORPUS_WEB, self.removed)
+            web_paragraph_docs.discard(self.removed)
+        if self.ids:
+            web_paragraph_docs.put_many(doc_rows(self.paragraphs, WEB_PARAGRAPH_DOC_FIELDS))
+            # update FAISS safely
+            if faiss_manager.get(NAMESPACE_WEB).index.ntotal:
+                try:
+                    faiss_manager.safe_add(NAMESPACE_WEB, self.ids, np.vstack(self.vecs), normalized=True)
+                except Exception as e:
+                    errors.append(f"FAISS_ADD_FAIL -> {e}")
+            try:
+                bm25_add_paragraphs(zip(self.ids, self.texts), persist=False)
+            except Exception as e:
+                errors.append(f"BM25_ADD_FAIL -> {e}")
+        bump_corpus_version(CORPUS_WEB)
+        self.ids, self.vecs, self.texts, self.removed, self.paragraphs = [], [], [], [], []
+
+
+def _store_page(page_result: CrawledPage, index: _WebIndexBatch, stats: Dict[str, int]) -> int:
+    """
+    Diff one crawled page against its stored paragraphs: bulk-insert new ones,
+    delete vanished ones, keep unchanged ones. All writes, validators included,
+    commit in one transaction, so a failure leaves the page as it was (and
+    re-fetched next time); index changes are queued on index only after commit.
+    Returns the number of paragraphs created.
+    """
+    with transaction.atomic():
+        page, _ = Page.objects.get_or_create(url=page_result.url, defaults={"title": page_result.title})
+
+        existing: Dict[str, Paragraph] = {}
+        stale: List[int] = []
+        for para in Paragraph.objects.filter(page=page).only("id", "order", "text", "text_hash"):
+            h = para.text_hash or text_hash(para.text)
+            if h in existing:
+                stale.append(para.id)     # duplicate rows left by earlier non-diffing crawls
+            else:
+                para.text_hash = h
+                existing[h] = para
 
-        visited.add(url)
-        pages_crawled += 1
+        keep = set(page_result.hashes)
+        removed = stale + [p.id for h, p in existing.items() if h not in keep]
+        vec_of = {i: row for row, i in enumerate(page_result.new_idx)}
 
-        # internal links
-        for a in soup.find_all("a", href=True):
-            link = urljoin(url, a["href"])
-            parsed2 = urlparse(link)
-            if parsed2.netloc == base_domain:
-                link = link.split("#")[0]
-                if link not in visited and link not in to_visit:
-                    to_visit.append(link)
+        new_rows, reordered = [], []
+        for order, (text, h) in enumerate(zip(page_result.texts, page_result.hashes)):
+            para = existing.get(h)
+            if para is not None:
+                if para.order != order or para.text_hash is None:
+                    para.order = order
+                    reordered.append(para)
+            else:
+                new_rows.append((order, text, h))
 
-        time.sleep(delay)
+        vecs = [page_result.vectors[vec_of[order]] for order, _, _ in new_rows if order in vec_of]
+        if len(vecs) < len(new_rows):
+            # some were stored when the page was scheduled and deleted since: embed all here
+            mat = default_embedder.generate_batch([text for _, text, _ in new_rows])
+        else:
+            mat = np.vstack(vecs) if vecs else None
+
+        created = Paragraph.objects.bulk_create(
+            [
+                Paragraph(page=page, text=text, order=order, text_hash=h, embedding=vec.tolist(),
+                          **precompute_sentences(text))
+                for (order, text, h), vec in zip(new_rows, mat if mat is not None else [])
+            ],
+            batch_size=500,
+        )
+
+        if reordered:
+            Paragraph.objects.bulk_update(reordered, ["order", "text_hash"], batch_size=500)
+        if removed:
+            Paragraph.objects.filter(id__in=removed).delete()
+
+        page.title = page_result.title
+        page.etag = page_result.etag[:255]
+        page.last_modified = page_result.last_modified[:64]
+        page.links = page_result.links
+        page.paragraph_hashes = list(page_result.page_hashes)
+        page.fetched_at = timezone.now()
+        page.save(update_fields=["title", "etag", "last_modified", "links", "paragraph_hashes", "fetched_at"])
+
+    if removed:
+        index.removed.extend(removed)
+    if created:
+        index.ids.extend(p.id for p in created)
+        index.vecs.append(mat)
+        index.texts.extend(p.text for p in created)
+        index.paragraphs.extend(created)
+    index.stored_pages[page.id] = page
+
+    stats["paragraphs_unchanged"] += len(page_result.texts) - len(created)
+    stats["paragraphs_deleted"] += len(removed)
+    return len(created)
+
+
+def _remove_boilerplate(start_url: str, detector: BoilerplateDetector, index: _WebIndexBatch) -> int:
+    """Delete this site's stored copies of paragraphs that turned out to be boilerplate."""
+    hashes = list(detector.boilerplate_hashes())
+    if not hashes:
+        return 0
+    parts = urlparse(canonicalize_url(start_url) or start_url)
+    site = Paragraph.objects.filter(page__url__startswith=f"{parts.scheme}://{parts.netloc}/")
+    ids: List[int] = []
+    for start in range(0, len(hashes), 1000):
+        ids += site.filter(text_hash__in=hashes[start:start + 1000]).values_list("id", flat=True)
+    if ids:
+        Paragraph.objects.filter(id__in=ids).delete()
+        index.removed.extend(ids)
+    return len(ids)
+
+
+def crawl_site(start_url: str, max_pages: int = 20, delay: float = 0.5,
+               concurrency: Optional[int] = None, parse_workers: Optional[int] = None,
+               queue_size: Optional[int] = None, persist_frontier: bool = False,
+               restart: bool = False):
+    """
+    Crawl start_url's domain (see iter_crawl) and store paragraphs + embeddings +
+    FAISS/BM25 entries. delay is the per-host politeness interval in seconds.
+    persist_frontier keeps the frontier in the DB: a later call with the same
+    start_url resumes an unfinished crawl (restart=True discards it).
+    """
+    t0 = time.perf_counter()
+    pages_crawled = 0
+    paras_created = 0
+    errors = []
+    stats = {"pages_not_modified": 0, "paragraphs_unchanged": 0, "paragraphs_deleted": 0}
+
+    cfg = _config()
+    index = _WebIndexBatch(cfg["INDEX_EVERY_PAGES"])
+    detector = BoilerplateDetector(cfg["BOILERPLATE_FRACTION"], cfg["BOILERPLATE_MIN_PAGES"])
+    stats.update({"embeddings_skipped_boilerplate": 0, "boilerplate_paragraphs_removed": 0,
+                  "boilerplate_paragraph_hashes": 0})
+    frontier = PersistentCrawlFrontier(start_url, restart=restart) if persist_frontier else CrawlFrontier([start_url])
+
+    try:
+        for result in iter_crawl(start_url, max_pages=max_pages, delay=delay, concurrency=concurrency,
+                                 parse_workers=parse_workers, queue_size=queue_size, frontier=frontier,
+                                 known_pages=_known_pages, boilerplate=detector):
+            if isinstance(result, CrawlError):
+                errors.append(result.message)
+                continue
+            pages_crawled += 1
+            if isinstance(result, NotModifiedPage):
+                Page.objects.filter(url=result.url).update(fetched_at=timezone.now())
+                stats["pages_not_modified"] += 1
+                continue
+            try:
+                paras_created += _store_page(result, index, stats)
+            except Exception as e:
+                # rolled back: validators unchanged, so the next crawl fetches it again
+                errors.append(f"STORE_FAIL {result.url} -> {e}")
+                continue
+            stats["embeddings_skipped_boilerplate"] += result.boilerplate
+            index.page_stored(errors)
+        stats["boilerplate_paragraphs_removed"] = _remove_boilerplate(start_url, detector, index)
+        stats["boilerplate_paragraph_hashes"] = detector.boilerplate_hash_count()
+    finally:
+        # rows already committed must reach the indices even if the crawl aborts
+        index.flush(errors)
+
+    # one write of the lexical index per crawl
+    if paras_created or stats["paragraphs_deleted"] or stats["boilerplate_paragraphs_removed"]:
+        try:
+            bm25_persist()
+        except Exception as e:
+            errors.append(f"BM25_PERSIST_FAIL -> {e}")
 
+    seconds = time.perf_counter() - t0
     return {
         "pages_crawled": pages_crawled,
         "paragraphs_created": paras_created,
         "errors": errors,
+        **stats,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages_crawled / seconds, 2) if seconds > 0 else 0.0,
+        "frontier_pending": len(frontier),
+        "resumed_from": getattr(frontier, "resumed", 0),
     }
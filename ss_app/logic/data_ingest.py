@@ -2,100 +2,744 @@
 """
 Data ingestion utilities: read Excel rows, parse resolution notes, create Ticket rows,
 generate embeddings, store in DB (ArrayField), and update FAISS in-memory index.
+Ticket exports (Excel/CSV) are streamed in fixed-size batches: batched embeddings,
+bulk_create + checkpoint per batch (resumable), FAISS/keyword index updates per batch.
+PDF documents stream through an extract -> embed -> store pipeline (ingest_pdf_document);
+uploads are deduplicated by file hash and extraction output is cached per hash.
+ingest_pdf_paths bulk-loads PDF files (ingest_pdfs command) with per-file extraction
+in a process pool feeding one shared embedding/insert stage.
+Stored rows also go to the display docstores (docstore.py) used to hydrate search hits.
+Both report progress(done, total) and are run by the ingest job worker (ingest_jobs.py).
 """
-import re
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from django.contrib.auth.models import User
-from ss_app.models import Ticket, PDFDocument, PDFChunk
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from openpyxl import load_workbook
+from ss_app.models import Ticket, PDFDocument, PDFChunk, IngestCheckpoint
 from .embedding_model import default_embedder, EMBED_DIM
 from .index_manager import faiss_manager
+from .pdf_core import iter_blocks, iter_chunks, embed_texts
+from .pdf_extract import CACHE_FORMAT as PDF_CACHE_FORMAT
+from .pdf_workers import extract_and_chunk, init_worker
+from .notes_parser import parse_notes_column, parse_resolution_notes  # noqa: F401 (re-export)
+from .chatbot_core import index_tickets_lexical, persist_ticket_lexical, reindex_tickets_lexical
+from .result_cache import bump_corpus_version, record_changed_ids, CORPUS_TICKETS, CORPUS_PDF
+from .docstore import doc_rows, pdf_chunk_docs, ticket_docs, PDF_CHUNK_DOC_FIELDS, TICKET_DOC_FIELDS
+from .utils import index_cache_path, iter_in_background
 
-def parse_resolution_notes(notes: str):
-    category, issue, rca, solution = "", "", "", ""
-    cat_match = re.search(
-        r"(?:category|classification)\s*[:\-]?\s*(.*?)(?=\s*(?:issue|issue\s*description|rca|cause|solution|score|data\s*fix)\s*[:\-]|$)",
-        str(notes), re.IGNORECASE | re.DOTALL
-    )
-    issue_match = re.search(
-        r"(?:issue|issue\s*description)\s*[:\-]?\s*(.*?)(?=\s*(?:rca|cause|solution|score|data\s*fix|category|classification)\s*[:\-]|$)",
-        str(notes), re.IGNORECASE | re.DOTALL
-    )
-    rca_match = re.search(
-        r"(?:rca|cause)\s*[:\-]?\s*(.*?)(?=\s*(?:solution|score|data\s*fix|category|classification|issue)\s*[:\-]|$)",
-        str(notes), re.IGNORECASE | re.DOTALL
-    )
-    sol_match = re.search(
-        r"(?:solution|data\s*fix)\s*[:\-]?\s*(.*?)(?=\s*(?:score|category|classification|issue|rca|cause)\s*[:\-]|$)",
-        str(notes), re.IGNORECASE | re.DOTALL
-    )
-    if cat_match:
-        category = cat_match.group(1).strip()
-    if issue_match:
-        issue = issue_match.group(1).strip()
-    if rca_match:
-        rca = rca_match.group(1).strip()
-    if sol_match:
-        solution = sol_match.group(1).strip()
-    elif notes:
-        solution = str(notes).strip()
-    return category, issue, rca, solution
-
-def ingest_excel_file(file_obj, uploaded_by_user):
-    """
-    file_obj: Django uploaded file (Excel). uploaded_by_user: User instance.
-    Returns: dict with counts and summary.
-    """
-    df = pd.read_excel(file_obj).fillna("")
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+NAMESPACE_TICKETS = "tickets"
+NAMESPACE_TICKETS_SESSION = "tickets_session_"
+NAMESPACE_PDF = "pdf_chunks"
+NAMESPACE_PDF_SESSION = "pdf_session_"
+
+STREAM_BATCH_SIZE = 2000   # rows read, embedded and committed per step
+EMBED_BATCH_SIZE = 64       # texts per model forward pass
+INSERT_BATCH_SIZE = 1000    # rows per bulk_create statement
+PDF_BATCH_SIZE = 256        # chunks embedded/inserted per step
+PDF_PIPELINE_DEPTH = 2      # batches queued between pdf pipeline stages
+
+# progress(done, total) callback; total may be None when it cannot be estimated
+ProgressFn = Optional[Callable[[int, Optional[int]], None]]
+
+TICKET_FIELDS = ("short_description", "description", "keywords", "solution", "category", "issue", "rca")
+# export columns (normalized) that identify a ticket across uploads, first present wins
+NATURAL_KEY_COLUMNS = ("number", "ticket_number", "ticket_no", "incident_number", "ticket_id", "incident_id")
+LOOKUP_BATCH_SIZE = 1000    # natural keys per existing-row lookup query
+CONTENT_KEY_PREFIX = "content:"   # natural key of rows without a ticket number
+
+def _prepare_ticket_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column-wise (vectorized) preparation of an export: normalized headers, parsed
+    resolution notes, Ticket field columns as str, and the embedding text.
+    """
+    df = df.fillna("")
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
 
     if "resolution_notes" in df.columns:
-        parsed = df["resolution_notes"].apply(lambda x: parse_resolution_notes(x))
-        df[["category", "issue", "rca", "solution"]] = pd.DataFrame(parsed.tolist(), index=df.index)
+        parsed = parse_notes_column(df["resolution_notes"].tolist())
+        df[["category", "issue", "rca", "solution"]] = pd.DataFrame(parsed, index=df.index,
+                                                                   columns=["category", "issue", "rca", "solution"])
+
+    out = pd.DataFrame(index=df.index)
+    for col in ("short_description", "description", "solution", "category", "issue", "rca"):
+        out[col] = df[col].astype(str) if col in df.columns else ""
+
+    # short_description falls back to description
+    out["short_description"] = out["short_description"].where(out["short_description"] != "", out["description"])
 
     # --------------------------------------------------------
     # ❌ REMOVE keyword extraction completely (your request)
     # --------------------------------------------------------
-    df["keywords"] = ""
-
-    created = []
-    new_ids = []
-    new_vectors = []
-
-    for _, row in df.iterrows():
-        t = Ticket.objects.create(
-            short_description = row.get("short_description") or row.get("description") or "",
-            description = row.get("description") or "",
-            keywords = "",  # keywords removed
-            solution = row.get("solution") or "",
-            category = row.get("category") or "",
-            issue = row.get("issue") or "",
-            rca = row.get("rca") or "",
-            uploaded_by = uploaded_by_user
+    out["keywords"] = ""
+
+    # --------------------------------------------------------
+    # ✅ EMBEDDING TEXT (ONLY short_description + description)
+    # --------------------------------------------------------
+    short, desc = out["short_description"], out["description"]
+    both = (short + " " + desc).where((short != "") & (desc != ""), short + desc)
+    out["embed_text"] = both.str.strip()
+
+    # upsert identity + change detection
+    out["content_hash"] = [_content_hash(row) for row in out[list(TICKET_FIELDS)].itertuples(index=False, name=None)]
+    key_col = next((c for c in NATURAL_KEY_COLUMNS if c in df.columns), None)
+    keys = df[key_col].astype(str).str.strip() if key_col else pd.Series("", index=df.index)
+    # without a ticket number only fully identical rows are the same ticket: tickets
+    # sharing a description but differing in rca/solution must stay separate rows
+    out["natural_key"] = keys.where(keys != "", CONTENT_KEY_PREFIX + out["content_hash"])
+    return out
+
+
+def _content_hash(values) -> str:
+    """sha256 over the TICKET_FIELDS values (str), the upsert change detector."""
+    return hashlib.sha256("\x1f".join(values).encode("utf-8")).hexdigest()
+
+
+def _backfill_ticket_keys() -> int:
+    """
+    Give tickets stored before upserts existed (no natural_key) and tickets keyed by
+    the earlier embedded-text hash ("text:...") a content key, so re-uploading an
+    export without ticket numbers matches them instead of duplicating them.
+    Returns the number of tickets updated (0, after one query, once done).
+    """
+    stale = Ticket.objects.filter(Q(natural_key__isnull=True) | Q(natural_key__startswith="text:"))
+    updated = 0
+    batch: List[Ticket] = []
+    for row in stale.order_by("id").values_list("id", *TICKET_FIELDS).iterator(chunk_size=LOOKUP_BATCH_SIZE):
+        chash = _content_hash(str(v) if v is not None else "" for v in row[1:])
+        batch.append(Ticket(id=row[0], natural_key=CONTENT_KEY_PREFIX + chash, content_hash=chash))
+        if len(batch) >= LOOKUP_BATCH_SIZE:
+            updated += Ticket.objects.bulk_update(batch, ["natural_key", "content_hash"])
+            batch = []
+    if batch:
+        updated += Ticket.objects.bulk_update(batch, ["natural_key", "content_hash"])
+    return updated
+
+
+def _embed_texts_batched(texts: List[str], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """Embed non-empty texts in model batches; empty texts get zero vectors."""
+    mat = np.zeros((len(texts), EMBED_DIM), dtype=np.float32)
+    todo = [i for i, t in enumerate(texts) if t]
+    for start in range(0, len(todo), batch_size):
+        rows = todo[start:start + batch_size]
+        mat[rows] = default_embedder.generate_batch([texts[i] for i in rows])
+    return mat
+
+
+def _add_to_populated_indices(base: str, session_prefix: str, ids: List[int], mat: np.ndarray):
+    """
+    Append freshly inserted vectors to the in-memory indices of this process that are
+    already populated; empty ones are built from the DB (with these rows) on first use.
+    """
+    for ns in list(faiss_manager.indices.keys()):
+        if ns != base and not ns.startswith(session_prefix):
+            continue
+        if faiss_manager.get(ns).index.ntotal == 0:
+            continue
+        faiss_manager.safe_add(ns, ids, mat, normalized=True)
+
+
+def _add_to_ticket_indices(ids: List[int], mat: np.ndarray):
+    _add_to_populated_indices(NAMESPACE_TICKETS, NAMESPACE_TICKETS_SESSION, ids, mat)
+
+
+def _replace_in_ticket_indices(ids: List[int], mat: np.ndarray):
+    """Swap the vectors of re-embedded tickets in this process's populated indices."""
+    for ns in list(faiss_manager.indices.keys()):
+        if ns != NAMESPACE_TICKETS and not ns.startswith(NAMESPACE_TICKETS_SESSION):
+            continue
+        if faiss_manager.get(ns).index.ntotal == 0:
+            continue
+        faiss_manager.safe_remove(ns, ids)
+        faiss_manager.safe_add(ns, ids, mat, normalized=True)
+
+
+def _plan_upsert(df: pd.DataFrame):
+    """
+    Split a prepared batch against existing tickets by natural key.
+    Returns (frame without in-batch duplicate keys, existing id per row or None,
+    row needs (re-)embedding, row is unchanged).
+    """
+    df = df.drop_duplicates("natural_key", keep="last")
+    keys = df["natural_key"].tolist()
+    existing = {}
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        rows = (
+            Ticket.objects.filter(natural_key__in=keys[start:start + LOOKUP_BATCH_SIZE])
+            .order_by("id")
+            .values_list("natural_key", "id", "content_hash", "short_description", "description")
         )
+        for key, tid, chash, short, desc in rows:
+            existing[key] = (tid, chash, short or "", desc or "")   # newest row wins
+
+    ids, embed, unchanged = [], [], []
+    for key, chash, short, desc in zip(keys, df["content_hash"], df["short_description"], df["description"]):
+        hit = existing.get(key)
+        if hit is None:
+            ids.append(None)
+            embed.append(True)
+            unchanged.append(False)
+            continue
+        ids.append(hit[0])
+        unchanged.append(hit[1] == chash)
+        # only the embedded fields decide whether a new vector is needed
+        embed.append(hit[1] != chash and (hit[2], hit[3]) != (short, desc))
+    return df, ids, np.asarray(embed, dtype=bool), np.asarray(unchanged, dtype=bool)
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else float(count)
+
+
+def _file_sha256(file_obj) -> str:
+    """Hash an uploaded/opened file in fixed-size blocks, then rewind it."""
+    h = hashlib.sha256()
+    if hasattr(file_obj, "chunks"):
+        for block in file_obj.chunks():
+            h.update(block)
+    else:
+        for block in iter(lambda: file_obj.read(1 << 20), b""):
+            h.update(block)
+    file_obj.seek(0)
+    return h.hexdigest()
+
+
+def iter_excel_batches(file_obj, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of up to batch_size rows from the first sheet (openpyxl read-only)."""
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"column_{i}" for i, c in enumerate(header)]
+        batch = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        wb.close()
+
+
+def iter_csv_batches(file_obj, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of up to batch_size rows via pandas' chunked CSV reader."""
+    yield from pd.read_csv(file_obj, chunksize=batch_size, dtype=str, keep_default_na=False)
+
+
+def iter_xls_batches(file_obj, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Legacy .xls (BIFF) workbooks: openpyxl cannot stream them, so the sheet is read
+    with pandas (xlrd) and sliced; the format caps a sheet at 65536 rows anyway.
+    """
+    df = pd.read_excel(file_obj, dtype=object)
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size].reset_index(drop=True)
+
+
+def _is_csv(file_obj) -> bool:
+    return (getattr(file_obj, "name", "") or "").lower().endswith(".csv")
+
+
+def _is_xls(file_obj) -> bool:
+    return (getattr(file_obj, "name", "") or "").lower().endswith(".xls")
+
+
+def iter_ticket_batches(file_obj, batch_size: int) -> Iterator[pd.DataFrame]:
+    if _is_csv(file_obj):
+        return iter_csv_batches(file_obj, batch_size)
+    if _is_xls(file_obj):
+        return iter_xls_batches(file_obj, batch_size)
+    return iter_excel_batches(file_obj, batch_size)
+
 
-        # --------------------------------------------------------
-        # ✅ NEW EMBEDDING LOGIC (ONLY short_description + description)
-        # --------------------------------------------------------
-        combined_text = " ".join(
-            filter(None, [
-                t.short_description,
-                t.description
-            ])
-        ).strip()
-
-        emb = default_embedder.generate_embedding(combined_text) if combined_text else [0.0] * EMBED_DIM
-        t.embedding = emb
-        t.save(update_fields=["embedding"])
-
-        new_ids.append(t.id)
-        new_vectors.append(emb)
-        created.append(t.id)
-
-    # update FAISS
-    if new_ids:
+def estimate_ticket_rows(file_obj) -> Optional[int]:
+    """
+    Cheap data-row estimate for progress/ETA: the sheet's recorded dimension for
+    Excel, a line count for CSV (quoted multi-line cells over-count). Rewinds file_obj.
+    """
+    try:
+        if _is_csv(file_obj):
+            lines = sum(block.count(b"\n") for block in iter(lambda: file_obj.read(1 << 20), b""))
+            return max(lines - 1, 0)
+        if _is_xls(file_obj):
+            return None
+        wb = load_workbook(file_obj, read_only=True, data_only=True)
         try:
-            faiss_manager.safe_add("tickets", new_ids, new_vectors)
-        except Exception:
-            faiss_manager.add("tickets", new_ids, new_vectors)
+            max_row = wb.active.max_row
+        finally:
+            wb.close()
+        return max(max_row - 1, 0) if max_row else None
+    except Exception:
+        return None
+    finally:
+        file_obj.seek(0)
+
+
+def ingest_excel_file(file_obj, uploaded_by_user, batch_size: int = STREAM_BATCH_SIZE,
+                      progress: ProgressFn = None, upsert: bool = True):
+    """
+    file_obj: Django uploaded file (Excel or CSV). uploaded_by_user: User instance.
+
+    Streams the export in fixed-size row batches through
+    parse -> embed -> insert -> index, so peak memory is bounded by batch_size.
+    Each batch's writes commit together with an IngestCheckpoint update;
+    re-running the same file (same sha256) resumes after the last committed batch.
+    progress(rows_done, rows_total_estimate) is called after every batch.
+
+    upsert=True matches rows to existing tickets by natural key (export ticket
+    number, else the hash of all ticket fields, so only identical rows match;
+    legacy tickets get that key on the first upsert): unchanged rows are skipped without embedding,
+    changed rows are updated in bulk (re-embedded and replaced in the indices only
+    when short_description/description changed), new rows are inserted.
+    upsert=False inserts every row.
+    Returns: dict with inserted/updated/skipped counts and per-stage timings/throughput.
+    """
+    timings = {"parse": 0.0, "embed": 0.0, "insert": 0.0, "index": 0.0}
+    counts = {"inserted": 0, "updated": 0, "reembedded": 0, "skipped": 0}
+    total = estimate_ticket_rows(file_obj) if progress else None
+
+    checkpoint, _ = IngestCheckpoint.objects.get_or_create(
+        source_hash=_file_sha256(file_obj),
+        defaults={"filename": getattr(file_obj, "name", "") or "", "uploaded_by": uploaded_by_user},
+    )
+    resume_from = checkpoint.rows_committed
+    if checkpoint.completed:
+        return {"created_count": 0, **counts, "rows_seen": resume_from, "resumed_from": resume_from,
+                "already_ingested": True, "timings": timings, "throughput": {}}
+    if upsert:
+        _backfill_ticket_keys()
+
+    lexical_dirty = False
+    rows_seen = 0
+    batches = iter_ticket_batches(file_obj, batch_size)
+    while True:
+        t0 = time.perf_counter()
+        raw = next(batches, None)
+        if raw is None:
+            timings["parse"] += time.perf_counter() - t0
+            break
+        batch_start = rows_seen
+        rows_seen += len(raw)
+        if rows_seen <= resume_from:
+            # committed before a crash/restart: only advance the reader
+            timings["parse"] += time.perf_counter() - t0
+            if progress:
+                progress(rows_seen, total)
+            continue
+        if batch_start < resume_from:
+            raw = raw.iloc[resume_from - batch_start:]
+        df = _prepare_ticket_frame(raw)
+        if upsert:
+            n_rows = len(df)
+            df, existing_ids, needs_embed, unchanged = _plan_upsert(df)
+            counts["skipped"] += int(unchanged.sum()) + (n_rows - len(df))
+        else:
+            existing_ids = [None] * len(df)
+            needs_embed = np.ones(len(df), dtype=bool)
+            unchanged = np.zeros(len(df), dtype=bool)
+        timings["parse"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        texts = df["embed_text"].tolist()
+        embed_rows = np.flatnonzero(needs_embed)
+        emb = _embed_texts_batched([texts[i] for i in embed_rows])
+        vec_of = {int(i): emb[j] for j, i in enumerate(embed_rows)}
+        timings["embed"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        records = df[list(TICKET_FIELDS) + ["natural_key", "content_hash"]].to_dict("records")
+        new_tickets, new_rows = [], []
+        changed_text, changed_vec, vec_rows = [], [], []
+        for i, (rec, tid) in enumerate(zip(records, existing_ids)):
+            if unchanged[i]:
+                continue
+            if tid is None:
+                new_tickets.append(Ticket(**rec, embedding=vec_of[i].tolist(), uploaded_by=uploaded_by_user))
+                new_rows.append(i)
+            elif i in vec_of:
+                changed_vec.append(Ticket(id=tid, **rec, embedding=vec_of[i].tolist()))
+                vec_rows.append(i)
+            else:
+                changed_text.append(Ticket(id=tid, **rec))
+        with transaction.atomic():
+            for start in range(0, len(new_tickets), INSERT_BATCH_SIZE):
+                Ticket.objects.bulk_create(new_tickets[start:start + INSERT_BATCH_SIZE])
+            update_fields = list(TICKET_FIELDS) + ["natural_key", "content_hash"]
+            if changed_text:
+                Ticket.objects.bulk_update(changed_text, update_fields, batch_size=INSERT_BATCH_SIZE)
+            if changed_vec:
+                Ticket.objects.bulk_update(changed_vec, update_fields + ["embedding"], batch_size=INSERT_BATCH_SIZE)
+            checkpoint.rows_committed = rows_seen
+            checkpoint.batches_committed += 1
+            checkpoint.save(update_fields=["rows_committed", "batches_committed", "updated_at"])
+        counts["inserted"] += len(new_tickets)
+        counts["updated"] += len(changed_text) + len(changed_vec)
+        counts["reembedded"] += len(changed_vec)
+        timings["insert"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        if new_tickets:
+            _add_to_ticket_indices([t.id for t in new_tickets], np.stack([vec_of[i] for i in new_rows]))
+            # keep the keyword index used by hybrid ticket search in step
+            index_tickets_lexical(new_tickets, persist=False)
+        if changed_vec:
+            ids = [t.id for t in changed_vec]
+            _replace_in_ticket_indices(ids, np.stack([vec_of[i] for i in vec_rows]))
+            # other processes replay these ids from the change log on their next sync
+            record_changed_ids(CORPUS_TICKETS, ids)
+        if changed_text or changed_vec:
+            reindex_tickets_lexical(changed_text + changed_vec, persist=False)
+        if new_tickets or changed_text or changed_vec:
+            ticket_docs.put_many(doc_rows(new_tickets + changed_text + changed_vec, TICKET_DOC_FIELDS))
+            lexical_dirty = True
+            bump_corpus_version(CORPUS_TICKETS)
+        timings["index"] += time.perf_counter() - t0
+        if progress:
+            progress(rows_seen, max(total or 0, rows_seen))
+
+    t0 = time.perf_counter()
+    if lexical_dirty:
+        persist_ticket_lexical()
+    timings["index"] += time.perf_counter() - t0
+
+    checkpoint.completed = True
+    checkpoint.save(update_fields=["completed", "updated_at"])
+
+    processed = rows_seen - resume_from
+    return {
+        "created_count": counts["inserted"],
+        **counts,
+        "rows_seen": rows_seen,
+        "resumed_from": resume_from,
+        "timings": {stage: round(sec, 3) for stage, sec in timings.items()},
+        "throughput": {stage: _rate(processed, sec) for stage, sec in timings.items()},
+    }
+
+
+def _remove_from_populated_indices(base: str, session_prefix: str, ids: List[int]):
+    for ns in list(faiss_manager.indices.keys()):
+        if ns == base or ns.startswith(session_prefix):
+            faiss_manager.safe_remove(ns, ids)
+
+
+def _discard_pdf_chunks(pdf_doc: PDFDocument) -> int:
+    """Drop chunks left by an interrupted earlier run, so a retried job starts clean."""
+    ids = list(PDFChunk.objects.filter(document=pdf_doc).values_list("id", flat=True))
+    if ids:
+        PDFChunk.objects.filter(id__in=ids).delete()
+        _remove_from_populated_indices(NAMESPACE_PDF, NAMESPACE_PDF_SESSION, ids)
+        pdf_chunk_docs.discard(ids)
+        record_changed_ids(CORPUS_PDF, ids)
+        bump_corpus_version(CORPUS_PDF)
+    return len(ids)
+
+
+def pdf_extract_cache_path(file_hash: str) -> str:
+    """On-disk extraction cache for a PDF's sha256 (see pdf_extract.iter_page_results)."""
+    return index_cache_path("pdf_extract", f"{file_hash}.v{PDF_CACHE_FORMAT}.jsonl.gz")
+
+
+def register_pdf_upload(file_obj, user) -> Tuple[PDFDocument, bool]:
+    """
+    Store an uploaded PDF as a PDFDocument unless identical bytes were uploaded before.
+    Returns (document, created); for a duplicate the existing document is returned
+    and nothing is written. Documents stored before uploads were hashed are
+    matched too (see _match_unhashed_pdf).
+    """
+    file_hash = _file_sha256(file_obj)
+    existing = PDFDocument.objects.filter(file_hash=file_hash).first()
+    if existing is None:
+        existing = _match_unhashed_pdf(file_obj, file_hash)
+    if existing is not None:
+        return existing, False
+    pdf_doc = PDFDocument(uploaded_by=user, title=file_obj.name, pdf_file=file_obj, file_hash=file_hash)
+    try:
+        with transaction.atomic():
+            pdf_doc.save()
+    except IntegrityError:
+        # same file uploaded concurrently: keep the first, drop our stored copy
+        pdf_doc.pdf_file.delete(save=False)
+        return PDFDocument.objects.get(file_hash=file_hash), False
+    return pdf_doc, True
+
+
+def _match_unhashed_pdf(file_obj, file_hash: str) -> Optional[PDFDocument]:
+    """
+    Legacy document (file_hash NULL) with the same bytes as file_obj, if any.
+    Only files of the same size are read and hashed; their hash is stored, so
+    each legacy file is hashed at most once.
+    """
+    size = getattr(file_obj, "size", None)
+    for doc in PDFDocument.objects.filter(file_hash__isnull=True).order_by("id"):
+        try:
+            if size is not None and doc.pdf_file.size != size:
+                continue
+            if _ensure_file_hash(doc) == file_hash:
+                return doc
+        except (OSError, ValueError, IntegrityError):
+            continue   # missing file, or identical to an already hashed document
+    return None
+
+
+def _ensure_file_hash(pdf_doc: PDFDocument) -> str:
+    """file_hash of documents stored before uploads were hashed, computed once."""
+    if not pdf_doc.file_hash:
+        with pdf_doc.pdf_file.open("rb") as fh:
+            pdf_doc.file_hash = _file_sha256(fh)
+        PDFDocument.objects.filter(pk=pdf_doc.pk).update(file_hash=pdf_doc.file_hash)
+    return pdf_doc.file_hash
+
+
+def _iter_pdf_chunk_batches(pdf_path: str, batch_size: int, extract_stats: dict,
+                            cache_path: Optional[str] = None) -> Iterator[list]:
+    """
+    Stage 1: extract pages, chunk and group. Batches start at EMBED_BATCH_SIZE and
+    double up to batch_size, so the first chunks become searchable quickly.
+    """
+    size = min(EMBED_BATCH_SIZE, batch_size)
+    batch = []
+    for chunk in iter_chunks(iter_blocks(pdf_path, stats=extract_stats, cache_path=cache_path)):
+        batch.append(chunk)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+            size = min(size * 2, batch_size)
+    if batch:
+        yield batch
+
+
+def _iter_embedded(batches, timings: dict):
+    """Stage 2: embed each chunk batch."""
+    for batch in batches:
+        t0 = time.perf_counter()
+        mat = embed_texts([c.text for c in batch])
+        timings["embed"] += time.perf_counter() - t0
+        yield batch, mat
+
+
+def ingest_pdf_document(pdf_doc: PDFDocument, progress: ProgressFn = None, batch_size: int = PDF_BATCH_SIZE):
+    """
+    Extract -> chunk -> embed -> store an already saved PDFDocument as a pipeline.
+
+    Extraction+chunking and embedding run in background threads connected by
+    bounded queues (PDF_PIPELINE_DEPTH batches), so extraction of later pages
+    overlaps embedding and only a few batches are ever held in memory. This
+    thread bulk_creates each batch and adds it to the populated pdf indices right
+    away; other processes catch up through the corpus version bump.
+    Extraction output is cached by file hash, so re-chunking/re-embedding a
+    document (e.g. after a retry or a chunking change) skips PDF parsing.
+    The chunk total is unknown until extraction ends, so progress reports None.
+    Returns: dict with the chunk count and per-stage timings/throughput.
+    """
+    timings = {"embed": 0.0, "insert": 0.0, "index": 0.0}
+    extract_stats = {}
+    t_start = time.perf_counter()
+    first_searchable = None
+    total = 0
+
+    cache_path = pdf_extract_cache_path(_ensure_file_hash(pdf_doc))
+    discarded = _discard_pdf_chunks(pdf_doc)
+    if progress:
+        progress(0, None)
+
+    batches = iter_in_background(
+        _iter_pdf_chunk_batches(pdf_doc.pdf_file.path, batch_size, extract_stats, cache_path),
+        maxsize=PDF_PIPELINE_DEPTH, name="pdf-extract",
+    )
+    for batch, mat in iter_in_background(_iter_embedded(batches, timings),
+                                         maxsize=PDF_PIPELINE_DEPTH, name="pdf-embed"):
+        t0 = time.perf_counter()
+        rows = PDFChunk.objects.bulk_create(
+            [
+                PDFChunk(document=pdf_doc, text=c.text, embedding=vec.tolist(),
+                         token_start=c.token_start, token_end=c.token_end)
+                for c, vec in zip(batch, mat)
+            ]
+        )
+        timings["insert"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _add_to_populated_indices(NAMESPACE_PDF, NAMESPACE_PDF_SESSION, [c.id for c in rows], mat)
+        pdf_chunk_docs.put_many(doc_rows(rows, PDF_CHUNK_DOC_FIELDS))
+        # invalidate cached pdf_search results
+        bump_corpus_version(CORPUS_PDF)
+        timings["index"] += time.perf_counter() - t0
+
+        total += len(batch)
+        if first_searchable is None:
+            first_searchable = time.perf_counter() - t_start
+        if progress:
+            progress(total, None)
+
+    _mark_pdf_ingested(pdf_doc)
+    wall = time.perf_counter() - t_start
+    return {
+        "chunk_count": total,
+        "discarded_chunks": discarded,
+        "extraction": extract_stats,
+        "timings": {stage: round(sec, 3) for stage, sec in timings.items()},
+        "throughput": {stage: _rate(total, sec) for stage, sec in timings.items()},
+        "wall_seconds": round(wall, 3),
+        "first_searchable_seconds": round(first_searchable, 3) if first_searchable is not None else None,
+        "chunks_per_sec": _rate(total, wall),
+    }
+
+
+def _mark_pdf_ingested(pdf_doc: PDFDocument):
+    pdf_doc.ingested_at = timezone.now()
+    PDFDocument.objects.filter(pk=pdf_doc.pk).update(ingested_at=pdf_doc.ingested_at)
+
+
+def _iter_pool_chunks(pending: List[PDFDocument], workers: int, errors: list, extraction: dict):
+    """Extract+chunk documents in a process pool; yield (doc, chunk rows) as files finish."""
+    todo = deque(pending)
+    inflight = {}
+    # spawn: the parent runs torch/DB threads, which must not be forked mid-flight
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_worker) as pool:
+        while todo or inflight:
+            while todo and len(inflight) < 2 * workers:
+                doc = todo.popleft()
+                fut = pool.submit(extract_and_chunk, doc.pdf_file.path, pdf_extract_cache_path(doc.file_hash))
+                inflight[fut] = doc
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                doc = inflight.pop(fut)
+                try:
+                    chunks, stats = fut.result()
+                except Exception as exc:
+                    errors.append(f"{doc.title}: {exc}")
+                    continue
+                extraction["pages"] += stats.get("pages", 0)
+                extraction["cached_docs"] += bool(stats.get("cached"))
+                yield doc, chunks
+
+
+def _iter_pool_batches(doc_chunks, batch_size: int, timings: dict):
+    """
+    Regroup per-document chunks into embedding batches that may span documents and
+    embed them. Items are (doc, chunk row or None for an empty document, doc chunk count).
+    """
+    def batches():
+        buf = []
+        for doc, chunks in doc_chunks:
+            if not chunks:
+                buf.append((doc, None, 0))
+            for row in chunks:
+                buf.append((doc, row, len(chunks)))
+                if len(buf) >= batch_size:
+                    yield buf
+                    buf = []
+        if buf:
+            yield buf
+
+    for batch in batches():
+        t0 = time.perf_counter()
+        mat = embed_texts([row[0] for _, row, _ in batch if row is not None])
+        timings["embed"] += time.perf_counter() - t0
+        yield batch, mat
+
+
+def ingest_pdf_paths(paths: Iterable[str], workers: Optional[int] = None, batch_size: int = PDF_BATCH_SIZE,
+                     user: Optional[User] = None, log: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Bulk-ingest PDF files from disk.
+
+    Files are registered like uploads (content-hash dedupe); documents already
+    fully ingested are skipped and interrupted ones are redone, so re-running
+    resumes. Extraction+chunking of different files runs in a process pool;
+    chunks of all files share batched embedding (background thread) and
+    bulk_create (this thread). The corpus version is bumped once at the end;
+    running app processes catch their pdf_chunks index up on their next search.
+    Returns: dict with doc/chunk counts, errors, timings and docs/sec, chunks/sec.
+    """
+    t_start = time.perf_counter()
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    timings = {"register": 0.0, "embed": 0.0, "insert": 0.0, "index": 0.0}
+    extraction = {"pages": 0, "cached_docs": 0}
+    errors: List[str] = []
+    skipped = 0
+
+    t0 = time.perf_counter()
+    pending, seen = [], set()
+    for path in paths:
+        try:
+            with open(path, "rb") as fh:
+                doc, _ = register_pdf_upload(File(fh, name=os.path.basename(path)), user)
+        except OSError as exc:
+            errors.append(f"{path}: {exc}")
+            continue
+        if doc.ingested_at is not None or doc.pk in seen:
+            skipped += 1
+            continue
+        seen.add(doc.pk)
+        pending.append(doc)
+    timings["register"] = time.perf_counter() - t0
+
+    started, inserted = set(), {}
+    docs_done = chunks_done = 0
+    stream = iter_in_background(
+        _iter_pool_chunks(pending, workers, errors, extraction), maxsize=2 * workers, name="pdf-pool"
+    )
+    for batch, mat in iter_in_background(_iter_pool_batches(stream, batch_size, timings),
+                                         maxsize=PDF_PIPELINE_DEPTH, name="pdf-embed"):
+        t0 = time.perf_counter()
+        objs, finished = [], []
+        for doc, row, n in batch:
+            if doc.pk not in started:
+                started.add(doc.pk)
+                _discard_pdf_chunks(doc)
+            if row is None:
+                finished.append(doc)
+                continue
+            objs.append(PDFChunk(document=doc, text=row[0], token_start=row[1], token_end=row[2]))
+            inserted[doc.pk] = inserted.get(doc.pk, 0) + 1
+            if inserted[doc.pk] == n:
+                finished.append(doc)
+        for obj, vec in zip(objs, mat):
+            obj.embedding = vec.tolist()
+        PDFChunk.objects.bulk_create(objs)
+        pdf_chunk_docs.put_many(doc_rows(objs, PDF_CHUNK_DOC_FIELDS))
+        for doc in finished:
+            _mark_pdf_ingested(doc)
+            docs_done += 1
+            if log:
+                log(f"{doc.title}: {inserted.get(doc.pk, 0)} chunks")
+        chunks_done += len(objs)
+        timings["insert"] += time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if chunks_done:
+        bump_corpus_version(CORPUS_PDF)
+    timings["index"] = time.perf_counter() - t0
 
-    return {"created_count": len(created), "ids": created}
+    wall = time.perf_counter() - t_start
+    return {
+        "docs_ingested": docs_done,
+        "docs_skipped": skipped,
+        "docs_failed": len(errors),
+        "chunk_count": chunks_done,
+        "embedded_chunks_total": PDFChunk.objects.filter(embedding__isnull=False).count(),
+        "errors": errors,
+        "extraction": extraction,
+        "timings": {stage: round(sec, 3) for stage, sec in timings.items()},
+        "wall_seconds": round(wall, 3),
+        "docs_per_sec": _rate(docs_done, wall),
+        "chunks_per_sec": _rate(chunks_done, wall),
+    }
@@ -0,0 +1,239 @@
+# ss_app/logic/docstore.py
+"""
+Display-field document stores for hydrating search hits without DB queries.
+
+One append-only record file per store under INDEX_CACHE_DIR/docstore, read
+through mmap:
+
+- record = header (object id int64, payload length uint32, crc32) + payload,
+  the store's fields as a compact JSON array; a zero-length payload is a
+  tombstone. The last record for an id wins, so updates are plain appends.
+- writers append whole batches with one O_APPEND write, so any process
+  (crawler, ingest worker, upload view) can write while others read; readers
+  stat() the file on each lookup and scan only the new tail into an
+  id -> offset map.
+- ids without a (valid) record are fetched from the DB once, by their display
+  fields only, and appended: a cold store fills itself, a warm one serves a
+  query with zero DB round trips.
+- when superseded records outweigh live ones the file is rewritten and
+  renamed into place; readers notice the new inode and rescan. Appends hold a
+  shared flock on a sidecar .lock file and compaction an exclusive one, so no
+  record (tombstones included) lands in the old file after it was copied.
+"""
+import fcntl
+import json
+import mmap
+import os
+import struct
+import zlib
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ss_app.models import Ticket, PDFChunk
+from ss_app.sub_models.webcrawl_models import Page, Paragraph
+
+from .utils import index_cache_path
+
+_HEADER = struct.Struct("<qII")   # object id, payload length, crc32 of payload
+WRITE_CHUNK = 4 << 20             # bytes per append (always whole records)
+COMPACT_MIN_BYTES = 8 << 20       # files smaller than this are never compacted
+COMPACT_GARBAGE_RATIO = 0.5       # compact once this share of the file is superseded
+
+Row = Tuple[Any, ...]             # (object id, *field values)
+
+
+class DocStore:
+    def __init__(self, name: str, fields: Sequence[str],
+                 fetch_rows: Optional[Callable[[List[int]], Iterable[Row]]] = None):
+        self.name = name
+        self.fields = tuple(fields)
+        self.fetch_rows = fetch_rows
+        self._lock = Lock()
+        self._reset(None)
+
+    @property
+    def path(self) -> str:
+        return index_cache_path("docstore", f"{self.name}.bin")
+
+    def _flock(self, mode: int) -> int:
+        """Open and flock the sidecar lock file; close the returned fd to release."""
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, mode)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def _reset(self, inode: Optional[int]):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+        self._mm: Optional[mmap.mmap] = None
+        self._inode = inode
+        self._offsets: Dict[int, int] = {}
+        self._scanned = 0
+        self._live_bytes = 0
+
+    def _refresh(self):
+        """Map the file (again, if it grew or was replaced) and index records appended since."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._reset(None)
+            return
+        if st.st_ino != self._inode or st.st_size < self._scanned:
+            self._reset(st.st_ino)
+        if st.st_size <= self._scanned:
+            return
+        if self._mm is None or len(self._mm) < st.st_size:
+            with open(self.path, "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mm
+        mm, pos, end = self._mm, self._scanned, len(self._mm)
+        while pos + _HEADER.size <= end:
+            oid, length, _ = _HEADER.unpack_from(mm, pos)
+            if pos + _HEADER.size + length > end:
+                break   # record still being written
+            old = self._offsets.pop(oid, None)
+            if old is not None:
+                self._live_bytes -= _HEADER.size + _HEADER.unpack_from(mm, old)[1]
+            if length:
+                self._offsets[oid] = pos
+                self._live_bytes += _HEADER.size + length
+            pos += _HEADER.size + length
+        self._scanned = pos
+
+    def _read(self, oid: int) -> Optional[Dict[str, Any]]:
+        pos = self._offsets.get(oid)
+        if pos is None:
+            return None
+        _, length, crc = _HEADER.unpack_from(self._mm, pos)
+        payload = self._mm[pos + _HEADER.size:pos + _HEADER.size + length]
+        if zlib.crc32(payload) != crc:
+            return None   # torn write: refetched and appended again
+        return dict(zip(self.fields, json.loads(payload)))
+
+    def _append(self, records: Iterable[bytes]):
+        # shared: appenders don't exclude each other (O_APPEND), only compaction
+        lock_fd = self._flock(fcntl.LOCK_SH)
+        try:
+            self._append_locked(records)
+        finally:
+            os.close(lock_fd)
+
+    def _append_locked(self, records: Iterable[bytes]):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            buf: List[bytes] = []
+            size = 0
+            for rec in records:
+                buf.append(rec)
+                size += len(rec)
+                if size >= WRITE_CHUNK:
+                    os.write(fd, b"".join(buf))
+                    buf, size = [], 0
+            if buf:
+                os.write(fd, b"".join(buf))
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _encode(oid: int, payload: bytes) -> bytes:
+        return _HEADER.pack(oid, len(payload), zlib.crc32(payload)) + payload
+
+    def put_many(self, rows: Iterable[Row]):
+        """Store (or replace) records; rows are (object_id, *values in field order)."""
+        n = len(self.fields)
+        self._append(
+            self._encode(int(row[0]), json.dumps(list(row[1:n + 1]), ensure_ascii=False,
+                                                 separators=(",", ":")).encode("utf-8"))
+            for row in rows
+        )
+        with self._lock:
+            self._refresh()
+            if self._scanned >= COMPACT_MIN_BYTES and \
+                    self._scanned - self._live_bytes > COMPACT_GARBAGE_RATIO * self._scanned:
+                self._compact()
+
+    def discard(self, object_ids: Iterable[int]):
+        """Tombstone records of deleted objects."""
+        self._append(self._encode(int(oid), b"") for oid in object_ids)
+
+    def get_many(self, object_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """{object_id: {field: value}}; ids without a record are fetched once and stored."""
+        out: Dict[int, Dict[str, Any]] = {}
+        missing: List[int] = []
+        with self._lock:
+            self._refresh()
+            for oid in object_ids:
+                oid = int(oid)
+                rec = self._read(oid) if self._mm is not None else None
+                if rec is None:
+                    missing.append(oid)
+                else:
+                    out[oid] = rec
+        if missing and self.fetch_rows is not None:
+            rows = list(self.fetch_rows(missing))
+            if rows:
+                self.put_many(rows)
+            for row in rows:
+                out[int(row[0])] = dict(zip(self.fields, row[1:]))
+        return out
+
+    def _compact(self):
+        """Rewrite live records only (caller holds self._lock)."""
+        lock_fd = self._flock(fcntl.LOCK_EX)
+        try:
+            # no append is in flight now: index everything written so far
+            self._refresh()
+            mm = self._mm
+            if mm is None:
+                return
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as fh:
+                for pos in sorted(self._offsets.values()):
+                    length = _HEADER.unpack_from(mm, pos)[1]
+                    fh.write(mm[pos:pos + _HEADER.size + length])
+            os.replace(tmp, self.path)
+        finally:
+            os.close(lock_fd)
+        self._reset(None)
+        self._refresh()
+
+    def clear(self):
+        with self._lock:
+            lock_fd = self._flock(fcntl.LOCK_EX)
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            finally:
+                os.close(lock_fd)
+            self._reset(None)
+
+
+def _values_in(model, fields: Sequence[str]) -> Callable[[List[int]], Iterable[Row]]:
+    def fetch(ids: List[int]) -> Iterable[Row]:
+        for start in range(0, len(ids), 1000):
+            yield from model.objects.filter(id__in=ids[start:start + 1000]).values_list("id", *fields)
+    return fetch
+
+
+TICKET_DOC_FIELDS = ("short_description", "rca", "solution")
+PDF_CHUNK_DOC_FIELDS = ("text",)
+WEB_PARAGRAPH_DOC_FIELDS = ("page_id", "text", "sentence_bounds", "sentence_token_ids", "sentence_token_offsets")
+WEB_PAGE_DOC_FIELDS = ("url", "title")
+
+ticket_docs = DocStore("tickets", TICKET_DOC_FIELDS, _values_in(Ticket, TICKET_DOC_FIELDS))
+pdf_chunk_docs = DocStore("pdf_chunks", PDF_CHUNK_DOC_FIELDS, _values_in(PDFChunk, PDF_CHUNK_DOC_FIELDS))
+web_paragraph_docs = DocStore(
+    "web_paragraphs", WEB_PARAGRAPH_DOC_FIELDS, _values_in(Paragraph, WEB_PARAGRAPH_DOC_FIELDS)
+)
+web_page_docs = DocStore("web_pages", WEB_PAGE_DOC_FIELDS, _values_in(Page, WEB_PAGE_DOC_FIELDS))
+
+
+def doc_rows(objs, fields: Sequence[str]) -> List[Row]:
+    """(id, *fields) rows from saved model instances, for put_many right after a write."""
+    return [(o.id, *(getattr(o, f) for f in fields)) for o in objs]
@@ -1,5 +1,5 @@
 
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 import numpy as np
 import os
 import torch
@@ -12,6 +12,9 @@ LOCAL_MODEL_PATH = r"C:\Users\venka\PycharmProjects\upchat\Chatbot_project\local
 
 
 
+# identifies the model in search cache keys (results of another model must not be reused)
+MODEL_NAME = LOCAL_MODEL_PATH.replace("\\", "/").rstrip("/").rsplit("/", 1)[-1]
+
 os.environ["HF_HUB_OFFLINE"] = "1"
 os.environ["TRANSFORMERS_OFFLINE"] = "1"
 os.environ["HF_DATASETS_OFFLINE"] = "1"
@@ -23,31 +26,43 @@ class EmbeddingModel:
         self.model = None
         self.tokenizer = None
         self.dim = EMBED_DIM
+        self.name = MODEL_NAME
 
-    def _ensure_loaded(self):
-        """Load model/tokenizer lazily to avoid Django import crashes."""
-        if self.model is not None:
-            return
-
+    @staticmethod
+    def _check_model_path():
         if not os.path.exists(LOCAL_MODEL_PATH):
             raise RuntimeError(
                 f"❌ Local embedding model not found:\n{LOCAL_MODEL_PATH}\n"
                 "Make sure the model files are downloaded properly."
             )
 
-        # ✅ FIX 2: load AutoConfig WITH trust_remote_code=True
-        config = AutoConfig.from_pretrained(
+    def _ensure_tokenizer(self):
+        """Load only the (fast) tokenizer; token counting does not need the model weights."""
+        if self.tokenizer is not None:
+            return
+        self._check_model_path()
+        self.tokenizer = AutoTokenizer.from_pretrained(
             LOCAL_MODEL_PATH,
             trust_remote_code=True,
             local_files_only=True,
         )
 
-        self.tokenizer = AutoTokenizer.from_pretrained(
+    def _ensure_loaded(self):
+        """Load model/tokenizer lazily to avoid Django import crashes."""
+        if self.model is not None:
+            return
+
+        self._check_model_path()
+
+        # ✅ FIX 2: load AutoConfig WITH trust_remote_code=True
+        config = AutoConfig.from_pretrained(
             LOCAL_MODEL_PATH,
             trust_remote_code=True,
             local_files_only=True,
         )
 
+        self._ensure_tokenizer()
+
         self.model = AutoModel.from_pretrained(
             LOCAL_MODEL_PATH,
             config=config,
@@ -63,8 +78,12 @@ class EmbeddingModel:
             return [0.0] * self.dim
         return (vec / norm).tolist()
 
-    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings using mean pooling."""
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Create embeddings using mean pooling.
+        Returns a C-contiguous float32 array of shape (n, dim) whose rows are
+        already L2-normalized, so index layers can consume it without copying.
+        """
         self._ensure_loaded()
 
         encoded = self.tokenizer(
@@ -93,21 +112,44 @@ class EmbeddingModel:
                 f"Model returned {arr.shape[1]} dims, expected {EMBED_DIM}"
             )
 
-        # L2 normalize
+        # L2 normalize in place (float32, contiguous)
+        arr = np.ascontiguousarray(arr, dtype=np.float32)
         norms = np.linalg.norm(arr, axis=1, keepdims=True)
         norms[norms == 0] = 1.0
-        arr = arr / norms
+        arr /= norms
 
-        return arr.tolist()
+        return arr
 
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        """Model tokens per text (no special tokens, no truncation), one batched tokenizer call."""
+        if not texts:
+            return []
+        self._ensure_tokenizer()
+        ids = self.tokenizer(list(texts), add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+        return [len(x) for x in ids]
+
+    def token_spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of each model token in text."""
+        self._ensure_tokenizer()
+        enc = self.tokenizer(
+            text, add_special_tokens=False, truncation=False, verbose=False, return_offsets_mapping=True
+        )
+        return [tuple(span) for span in enc["offset_mapping"]]
+
+    def warm_up(self):
+        """Load the model now (e.g. before a latency budget starts) instead of on first use."""
+        self._ensure_loaded()
+
+    def generate_embedding(self, text: str) -> Optional[np.ndarray]:
+        """Return a normalized float32 vector of shape (dim,), or None for empty input."""
         if not text or not isinstance(text, str):
             return None
         return self._embed_batch([text])[0]
 
-    def generate_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_batch(self, texts: List[str]) -> np.ndarray:
+        """Return a normalized float32 matrix of shape (len(texts), dim)."""
         if not texts:
-            return []
+            return np.empty((0, self.dim), dtype=np.float32)
         return self._embed_batch(texts)
 
 
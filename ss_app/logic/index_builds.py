@@ -0,0 +1,30 @@
+# ss_app/logic/index_builds.py
+"""
+Global FAISS namespaces that can be rebuilt blue/green (see
+FaissIndexManager.start_rebuild): used by the build_vector_indices command and
+the vector index status API.
+"""
+from typing import Any, Callable, Dict
+
+from ss_app.models import Ticket, PDFChunk
+from ss_app.sub_models.webcrawl_models import Paragraph
+
+from .index_manager import faiss_manager
+
+# namespace -> queryset of (id, embedding) rows it is built from
+REBUILD_SOURCES: Dict[str, Callable[[], Any]] = {
+    "tickets": lambda: Ticket.objects.filter(embedding__isnull=False).values_list("id", "embedding"),
+    "pdf_chunks": lambda: PDFChunk.objects.filter(embedding__isnull=False).values_list("id", "embedding"),
+    "web_paragraphs": lambda: Paragraph.objects.filter(embedding__isnull=False).values_list("id", "embedding"),
+}
+
+
+def rebuild_index(namespace: str, background: bool = True) -> Dict[str, Any]:
+    """Start a blue/green rebuild of a global namespace; raises KeyError for unknown names."""
+    queryset = REBUILD_SOURCES[namespace]()
+    return faiss_manager.start_rebuild(namespace, queryset, background=background)
+
+
+def index_status() -> Dict[str, Dict[str, Any]]:
+    """Rebuild progress and active index of every rebuildable namespace (this process)."""
+    return {ns: faiss_manager.rebuild_status(ns) for ns in REBUILD_SOURCES}
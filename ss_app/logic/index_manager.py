@@ -6,6 +6,24 @@ Changes made:
 - EMBED_DIM set to 768
 - Per-namespace locks to avoid race conditions
 - safe_get_or_create, safe_build_from_db_if_empty, safe_add, safe_search helpers
+- safe_sync_from_db: build when empty (aside, then swapped in), incremental catch-up
+  when the corpus version moved (rows written by another process, e.g. the ingest
+  worker); rows updated in place are replayed from the corpus change log, and a
+  count mismatch left after that triggers a background blue/green rebuild
+- remove / safe_remove: drop vectors by object id (postings compacted alongside)
+- deduplicated storage: each distinct vector is stored once with a posting list
+  of object ids; searches expand postings (or collapse_duplicates to one id per
+  vector), and `size` counts object ids while index.ntotal counts vectors
+- range_search / safe_range_search: threshold-bounded search capped at top_k
+- blue/green rebuilds: start_rebuild builds a fresh index off to the side (in a
+  background thread by default) and swaps the namespace's reference in one step;
+  searches hold the index object they started on, so in-flight queries finish on
+  the old generation and nothing waits for the build. rebuild_status reports
+  progress and the active generation / corpus version.
+- ndarray fast path: normalized=True lets EmbeddingModel output (contiguous,
+  L2-normalized float32) flow into FAISS without copies or renormalization.
+  The win is on ingestion; per query the conversions saved are small next to a
+  flat search (bench_vector_path)
 - validation of vector shapes prior to adding/searching with explicit errors
 - minimal API compatibility with previous usage: get, add, search remain,
   and new safe_* wrappers added for callers that want atomic semantics.
@@ -13,11 +31,18 @@ Changes made:
 from typing import Callable, Dict, List, Tuple, Any, Optional
 import numpy as np
 import faiss
-from threading import Lock, RLock
+from threading import Event, Lock, RLock, Thread
 import ast
+import hashlib
+import time
+
+from django.db import connection
+
+from .result_cache import changes_offset, corpus_for_namespace, get_corpus_version, read_changed_ids
 
 # Embed dim changed to 768 to match nomic-embed-text-v1.5
 EMBED_DIM = 768
+_KEY_SCALE = 2 ** 14   # vector-key quantization step (components of unit vectors fit int16)
 
 def _ensure_ndarray(vec: Any) -> np.ndarray:
     """Convert embeddings stored as list, tuple, or string to ndarray float32."""
@@ -30,6 +55,13 @@ def _ensure_ndarray(vec: Any) -> np.ndarray:
     arr = np.array(vec, dtype="float32")
     return arr
 
+def _as_matrix(vectors: np.ndarray) -> np.ndarray:
+    """View vectors as a C-contiguous float32 (n, dim) matrix; copies only if layout/dtype differ."""
+    mat = np.ascontiguousarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    return mat
+
 def _normalize_matrix(mat: np.ndarray) -> np.ndarray:
     """L2-normalize rows of a 2D numpy array, safe against zero vectors."""
     if mat.ndim == 1:
@@ -38,59 +70,207 @@ def _normalize_matrix(mat: np.ndarray) -> np.ndarray:
     norms[norms == 0.0] = 1.0
     return mat / norms
 
+def _vector_keys(mat: np.ndarray) -> List[bytes]:
+    """
+    Identity key per row of a normalized matrix. Components are quantized to
+    1/2**14 first, so the same text embedded in differently padded batches
+    (last-bit float noise) still maps to one key.
+    """
+    q = np.rint(mat * _KEY_SCALE).astype(np.int16)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in q]
+
 class InMemoryFaissIndex:
+    """
+    One FAISS row per distinct vector; postings[row] lists the object ids that
+    share it (identical ticket texts embed identically), so duplicates cost
+    neither index memory nor search time. Searches expand postings into
+    (object_id, score) pairs, or keep one id per vector with collapse_duplicates.
+    """
+
     def __init__(self, dim: int = EMBED_DIM):
         self.dim = dim
         self.index = faiss.IndexFlatIP(dim)  # inner-product; use normalized vectors
-        self.id_map: List[int] = []          # internal idx -> object id
+        self.postings: List[List[int]] = []  # FAISS row -> object ids sharing that vector
+        self._keys: List[bytes] = []         # FAISS row -> vector key
+        self._row_of_key: Dict[bytes, int] = {}
+        self._row_of_id: Dict[int, int] = {}
+        self.max_id = 0                      # highest object id added (for incremental sync)
+        self.version: Optional[int] = None   # corpus version last synced from the DB
+        self.changes_offset = 0              # corpus change-log position already applied
         self.lock = RLock()
 
-    def add(self, object_ids: List[int], vectors: np.ndarray):
-        """Add vectors to FAISS. Vectors shape must be (n, dim)."""
+    @property
+    def size(self) -> int:
+        """Number of object ids indexed (index.ntotal counts distinct vectors)."""
+        return len(self._row_of_id)
+
+    def add(self, object_ids: List[int], vectors: np.ndarray, normalized: bool = False):
+        """
+        Add vectors to FAISS. Vectors shape must be (n, dim).
+        Pass normalized=True for float32 rows that are already L2-normalized
+        (e.g. EmbeddingModel output); they are then added without a copy.
+        A vector already stored only gains a posting; re-adding an object id
+        replaces its previous vector.
+        """
         if vectors is None:
             raise ValueError("vectors is None")
         if isinstance(vectors, list):
-            vectors = np.vstack([_ensure_ndarray(v) for v in vectors]).astype("float32")
-        if vectors.ndim == 1:
-            vectors = vectors.reshape(1, -1)
-        if vectors.shape[1] != self.dim:
-            raise ValueError(f"Vector dim mismatch: expected {self.dim}, got {vectors.shape[1]}")
-        # normalize and ensure float32
-        vecs = vectors.astype("float32")
-        vecs = _normalize_matrix(vecs)
+            vectors = np.vstack([_ensure_ndarray(v) for v in vectors])
+        vecs = _as_matrix(vectors)
+        if vecs.shape[1] != self.dim:
+            raise ValueError(f"Vector dim mismatch: expected {self.dim}, got {vecs.shape[1]}")
+        if not normalized:
+            vecs = _normalize_matrix(vecs)
+        ids = [int(x) for x in object_ids]
+        keys = _vector_keys(vecs)
         with self.lock:
-            self.index.add(vecs)
-            self.id_map.extend([int(x) for x in object_ids])
+            self._drop({oid for oid in ids if oid in self._row_of_id})
+            fresh: List[int] = []   # batch positions of vectors not stored yet
+            for pos, (oid, key) in enumerate(zip(ids, keys)):
+                if oid in self._row_of_id:
+                    continue        # id repeated within the batch: first wins
+                row = self._row_of_key.get(key)
+                if row is None:
+                    row = len(self.postings)
+                    self._row_of_key[key] = row
+                    self._keys.append(key)
+                    self.postings.append([])
+                    fresh.append(pos)
+                self.postings[row].append(oid)
+                self._row_of_id[oid] = row
+            if fresh:
+                self.index.add(vecs if len(fresh) == vecs.shape[0] else vecs[fresh])
+            if ids:
+                self.max_id = max(self.max_id, max(ids))
 
-    def search(self, query_vec: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
-        """Return list of (object_id, score) where score is inner-product == cosine if vectors normalized."""
-        if query_vec is None:
-            return []
+    def _drop(self, drop) -> int:
+        removed = 0
+        emptied: List[int] = []
+        for oid in drop:
+            row = self._row_of_id.pop(oid, None)
+            if row is None:
+                continue
+            posting = self.postings[row]
+            posting.remove(oid)
+            removed += 1
+            if not posting:
+                emptied.append(row)
+        if emptied:
+            self._fill_rows(emptied)
+        return removed
+
+    def _fill_rows(self, emptied: List[int]):
+        """
+        Free emptied rows by moving the last live rows into them and truncating
+        the tail, so only the moved rows are re-mapped (not the whole index).
+        """
+        n = len(self.postings)
+        tail = n - len(emptied)
+        dead = set(emptied)
+        for row in emptied:
+            del self._row_of_key[self._keys[row]]
+        movers = [r for r in range(tail, n) if r not in dead]
+        holes = sorted(r for r in emptied if r < tail)
+        if movers:
+            # IndexFlat stores rows contiguously: copy the vectors in place
+            xb = faiss.rev_swig_ptr(self.index.get_xb(), n * self.dim).reshape(n, self.dim)
+            xb[holes] = xb[movers]
+            for src, dst in zip(movers, holes):
+                posting, key = self.postings[src], self._keys[src]
+                self.postings[dst], self._keys[dst] = posting, key
+                self._row_of_key[key] = dst
+                for oid in posting:
+                    self._row_of_id[oid] = dst
+        self.index.remove_ids(faiss.IDSelectorRange(tail, n))
+        del self.postings[tail:]
+        del self._keys[tail:]
+
+    def remove(self, object_ids) -> int:
+        """Remove the given object ids (a vector goes once its last id does); returns count removed."""
+        drop = {int(x) for x in object_ids}
+        if not drop:
+            return 0
+        with self.lock:
+            return self._drop(drop)
+
+    def _prepare_query(self, query_vec: Any, normalized: bool = False) -> np.ndarray:
+        """Validate a query vector and return it as a normalized (1, dim) float32 matrix."""
         if isinstance(query_vec, list) or isinstance(query_vec, tuple) or isinstance(query_vec, str):
             query_vec = _ensure_ndarray(query_vec)
-        if query_vec.ndim == 1:
-            query_vec = query_vec.reshape(1, -1)
-        if query_vec.shape[1] != self.dim:
-            raise ValueError(f"Query vector has wrong dim: expected {self.dim}, got {query_vec.shape[1]}")
-        # normalize
-        q = _normalize_matrix(query_vec.astype("float32"))
+        q = _as_matrix(query_vec)
+        if q.shape[1] != self.dim:
+            raise ValueError(f"Query vector has wrong dim: expected {self.dim}, got {q.shape[1]}")
+        return q if normalized else _normalize_matrix(q)
+
+    def _hydrate(self, rows, scores, top_k: int, collapse: bool) -> List[Tuple[int, float]]:
+        """Expand best-first FAISS rows into at most top_k (object_id, score) pairs."""
+        res: List[Tuple[int, float]] = []
+        for row, score in zip(rows, scores):
+            if row < 0:
+                continue
+            posting = self.postings[int(row)]
+            if collapse:
+                res.append((posting[0], float(score)))
+            else:
+                res.extend((oid, float(score)) for oid in posting)
+            if len(res) >= top_k:
+                break
+        return res[:top_k]
+
+    def search(
+        self, query_vec: np.ndarray, top_k: int = 5, normalized: bool = False, collapse_duplicates: bool = False
+    ) -> List[Tuple[int, float]]:
+        """
+        Return list of (object_id, score) where score is inner-product == cosine if vectors normalized.
+        collapse_duplicates keeps one object id (the first indexed) per distinct vector.
+        """
+        if query_vec is None or top_k <= 0:
+            return []
+        q = self._prepare_query(query_vec, normalized=normalized)
         with self.lock:
             if self.index.ntotal == 0:
                 return []
-            D, I = self.index.search(q, top_k)
-            res = []
-            for dist, idx in zip(D[0], I[0]):
-                if idx < 0:
-                    continue
-                obj_id = self.id_map[idx]
-                score = float(dist)
-                res.append((obj_id, score))
-            return res
+            # top_k distinct vectors always cover top_k object ids
+            D, I = self.index.search(q, min(top_k, self.index.ntotal))
+            return self._hydrate(I[0], D[0], top_k, collapse_duplicates)
+
+    def range_search(
+        self, query_vec: np.ndarray, threshold: float, top_k: int = 5, normalized: bool = False,
+        collapse_duplicates: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return at most top_k (object_id, score) pairs whose score is >= threshold, best first.
+        Uses FAISS range search, so nothing below the threshold is ever materialized.
+        """
+        if query_vec is None or top_k <= 0:
+            return []
+        q = self._prepare_query(query_vec, normalized=normalized)
+        with self.lock:
+            if self.index.ntotal == 0:
+                return []
+            # FAISS keeps inner-product hits strictly above the radius; nudge it down
+            # so that scores exactly equal to the threshold still qualify.
+            lims, D, I = self.index.range_search(q, float(threshold) - 1e-6)
+            scores = D[lims[0]:lims[1]]
+            positions = I[lims[0]:lims[1]]
+            keep = scores >= threshold
+            scores, positions = scores[keep], positions[keep]
+            if scores.shape[0] > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                scores, positions = scores[best], positions[best]
+            order = np.argsort(-scores, kind="stable")
+            return self._hydrate(positions[order], scores[order], top_k, collapse_duplicates)
 
     def clear(self):
         with self.lock:
             self.index = faiss.IndexFlatIP(self.dim)
-            self.id_map = []
+            self.postings = []
+            self._keys = []
+            self._row_of_key = {}
+            self._row_of_id = {}
+            self.max_id = 0
+            self.version = None
+            self.changes_offset = 0
 
 class FaissIndexManager:
     def __init__(self):
@@ -100,6 +280,10 @@ class FaissIndexManager:
         self.lock = RLock()
         # per-namespace locks for fine-grained concurrency
         self._ns_locks: Dict[str, RLock] = {}
+        # blue/green rebuilds: swaps per namespace, and last/running build status
+        self.generations: Dict[str, int] = {}
+        self._rebuilds: Dict[str, Dict[str, Any]] = {}
+        self._rebuild_done: Dict[str, Event] = {}   # set when the namespace's latest build ends
 
     def _get_ns_lock(self, namespace: str) -> RLock:
         with self.lock:
@@ -115,9 +299,16 @@ class FaissIndexManager:
                 self.indices[namespace] = InMemoryFaissIndex(dim=EMBED_DIM)
             return self.indices[namespace]
 
-    def add(self, namespace: str, object_ids: List[int], vectors: List[Any]):
-        """Add vectors to the namespace. Vectors can be numpy arrays, lists, or strings representing lists."""
+    def add(self, namespace: str, object_ids: List[int], vectors: Any, normalized: bool = False):
+        """
+        Add vectors to the namespace. Vectors can be an (n, dim) ndarray, or a list of
+        numpy arrays, lists, or strings representing lists (the ORM/JSON edge).
+        """
         idx = self.get(namespace)
+        if isinstance(vectors, np.ndarray):
+            # fast path: hand the matrix straight to the index (validated there)
+            idx.add(object_ids, vectors, normalized=normalized)
+            return
         # convert vectors to ndarray (validate shapes)
         arrs = []
         for v in vectors:
@@ -128,24 +319,48 @@ class FaissIndexManager:
                 raise ValueError(f"Attempt to add vector with dim {arr.shape[0]} to index dim {EMBED_DIM}")
             arrs.append(arr)
         mat = np.vstack(arrs).astype("float32")
-        idx.add(object_ids, mat)
+        idx.add(object_ids, mat, normalized=normalized)
 
-    def search(self, namespace: str, query_vec: Any, top_k: int = 5):
-        idx = self.get(namespace)
+    @staticmethod
+    def _coerce_query(query_vec: Any) -> Optional[np.ndarray]:
+        """Return query as a (1, EMBED_DIM) float32 array, or None if it is unusable."""
         # ensure ndarray and shape
         if isinstance(query_vec, list) or isinstance(query_vec, tuple) or isinstance(query_vec, str):
             try:
                 q = _ensure_ndarray(query_vec)
             except Exception:
-                return []
+                return None
         else:
-            q = np.array(query_vec, dtype="float32")
+            q = np.asarray(query_vec, dtype="float32")
         if q.ndim == 1:
             q = q.reshape(1, -1)
         if q.shape[1] != EMBED_DIM:
             # wrong dimension: return empty so callers fallback to SQL search
+            return None
+        return q
+
+    def search(
+        self, namespace: str, query_vec: Any, top_k: int = 5, normalized: bool = False,
+        collapse_duplicates: bool = False,
+    ):
+        idx = self.get(namespace)
+        q = self._coerce_query(query_vec)
+        if q is None:
+            return []
+        return idx.search(q, top_k=top_k, normalized=normalized, collapse_duplicates=collapse_duplicates)
+
+    def range_search(
+        self, namespace: str, query_vec: Any, threshold: float, top_k: int = 5, normalized: bool = False,
+        collapse_duplicates: bool = False,
+    ):
+        """Return up to top_k (object_id, score) hits with score >= threshold."""
+        idx = self.get(namespace)
+        q = self._coerce_query(query_vec)
+        if q is None:
             return []
-        return idx.search(q, top_k=top_k)
+        return idx.range_search(
+            q, threshold, top_k=top_k, normalized=normalized, collapse_duplicates=collapse_duplicates
+        )
 
     # --- Safe wrappers for concurrency & defensive checks ---
 
@@ -196,23 +411,234 @@ class FaissIndexManager:
                 mat = np.vstack(vectors).astype("float32")
                 idx.add(object_ids, mat)
 
-    def safe_add(self, namespace: str, object_ids: List[int], vectors: List[Any]):
+    @staticmethod
+    def _add_rows(idx: InMemoryFaissIndex, rows, chunk_size: int = 2000,
+                  progress: Optional[Callable[[int], None]] = None):
+        """
+        Add (object_id, embedding) rows in chunks, skipping missing/corrupt/wrong-shape embeddings.
+        progress, if given, gets the number of rows read so far after every chunk.
+        """
+        object_ids: List[int] = []
+        vectors: List[np.ndarray] = []
+        seen = 0
+        for obj_id, emb in rows:
+            seen += 1
+            if progress and seen % chunk_size == 0:
+                progress(seen)
+            if emb is None:
+                continue
+            try:
+                arr = _ensure_ndarray(emb).reshape(-1)
+            except Exception:
+                continue
+            if arr.shape[0] != EMBED_DIM:
+                continue
+            object_ids.append(int(obj_id))
+            vectors.append(arr)
+            if len(vectors) >= chunk_size:
+                idx.add(object_ids, np.vstack(vectors))
+                object_ids, vectors = [], []
+        if vectors:
+            idx.add(object_ids, np.vstack(vectors))
+        if progress:
+            progress(seen)
+
+    def safe_sync_from_db(self, namespace: str, queryset):
+        """
+        Keep the namespace in step with the DB rows of its corpus.
+
+        queryset: values_list("id", "embedding") over the rows to index.
+        Empty index -> full build into a new index, swapped in when complete.
+        Populated index whose corpus version moved (another process ingested) ->
+        replace rows listed in the corpus change log, then fetch only rows with
+        id > max_id; if the row count still disagrees afterwards, a blue/green
+        rebuild starts in the background (start_rebuild) and searches keep using
+        the caught-up index until it is swapped in. The live index is never
+        cleared, so no search sees a half-built one. While a rebuild runs a
+        populated index is served as is, and an empty one waits for the build.
+        A failed synchronous build raises.
+        """
+        corpus = corpus_for_namespace(namespace)
+        version = get_corpus_version(corpus)
+        idx = self.get(namespace)
+        if idx.index.ntotal and idx.version == version:
+            return
+
+        building = self._running_build(namespace)
+        if building is not None:
+            if idx.index.ntotal:
+                return   # the rebuild swaps in a fresh index; no catch-up meanwhile
+            building.wait()   # outside the namespace lock: swap() needs it
+            idx = self.get(namespace)
+            if idx.index.ntotal and idx.version == version:
+                return
+
+        ns_lock = self._get_ns_lock(namespace)
+        with ns_lock:
+            idx = self.get(namespace)
+            if idx.index.ntotal and idx.version == version:
+                return
+            if not idx.index.ntotal or idx.version is None:
+                self.start_rebuild(namespace, queryset, background=False)
+                return
+            since = idx.max_id
+            changed, idx.changes_offset = read_changed_ids(corpus, idx.changes_offset)
+            changed = [i for i in changed if i <= since]
+            if changed:
+                idx.remove(changed)
+                for start in range(0, len(changed), 1000):
+                    self._add_rows(idx, queryset.filter(id__in=changed[start:start + 1000]))
+            self._add_rows(idx, queryset.filter(id__gt=since).order_by("id").iterator(chunk_size=2000))
+            if idx.size != queryset.count():
+                # version stays stale: later syncs retry until the rebuild is swapped in
+                self.start_rebuild(namespace, queryset, background=True)
+                return
+            idx.version = version
+
+    def safe_add(self, namespace: str, object_ids: List[int], vectors: Any, normalized: bool = False):
         """Add vectors under the namespace with per-namespace locking and validation."""
         ns_lock = self._get_ns_lock(namespace)
         with ns_lock:
             # reuse add() which will validate shapes
-            return self.add(namespace, object_ids, vectors)
+            return self.add(namespace, object_ids, vectors, normalized=normalized)
 
-    def safe_search(self, namespace: str, query_vec: Any, top_k: int = 5):
-        """Search with per-namespace lock; returns [] on dim mismatch or empty index."""
+    def safe_remove(self, namespace: str, object_ids) -> int:
+        """Remove vectors by object id under the namespace lock; 0 for unknown namespaces."""
         ns_lock = self._get_ns_lock(namespace)
         with ns_lock:
-            return self.search(namespace, query_vec, top_k=top_k)
+            with self.lock:
+                idx = self.indices.get(namespace)
+            return idx.remove(object_ids) if idx is not None else 0
+
+    def safe_search(
+        self, namespace: str, query_vec: Any, top_k: int = 5, normalized: bool = False,
+        collapse_duplicates: bool = False,
+    ):
+        """
+        Search the namespace's current index; returns [] on dim mismatch or empty index.
+        Only the index's own lock is taken (not the namespace lock): builds and
+        rebuilds fill a separate index, so a search waits at most for one chunk
+        of an incremental catch-up; one that started before a swap finishes on
+        the index object it started on.
+        """
+        return self.search(
+            namespace, query_vec, top_k=top_k, normalized=normalized, collapse_duplicates=collapse_duplicates
+        )
+
+    def safe_range_search(
+        self, namespace: str, query_vec: Any, threshold: float, top_k: int = 5, normalized: bool = False,
+        collapse_duplicates: bool = False,
+    ):
+        """Threshold-bounded search (locking as safe_search); returns [] when nothing qualifies."""
+        return self.range_search(
+            namespace, query_vec, threshold, top_k=top_k, normalized=normalized,
+            collapse_duplicates=collapse_duplicates,
+        )
 
     def safe_pop(self, namespace: str) -> Optional[InMemoryFaissIndex]:
         """Atomically pop and return an index (used for cleanup on logout)."""
         with self.lock:
             return self.indices.pop(namespace, None)
 
+    # --- Blue/green rebuilds ---
+
+    def swap(self, namespace: str, new_idx: InMemoryFaissIndex) -> int:
+        """Make new_idx the namespace's index in one step; returns the new generation."""
+        with self._get_ns_lock(namespace):   # never in the middle of a sync/add
+            with self.lock:
+                self.indices[namespace] = new_idx
+                self.generations[namespace] = self.generations.get(namespace, 0) + 1
+                return self.generations[namespace]
+
+    def _running_build(self, namespace: str) -> Optional[Event]:
+        """Completion event of the namespace's rebuild if one is running, else None."""
+        with self.lock:
+            status = self._rebuilds.get(namespace)
+            if status is None or status["state"] != "building":
+                return None
+            return self._rebuild_done[namespace]
+
+    def start_rebuild(self, namespace: str, queryset, background: bool = True) -> Dict[str, Any]:
+        """
+        Build a fresh index from queryset (values_list("id", "embedding")) next to the
+        live one and swap it in when complete; searches keep using the live index
+        meanwhile. A rebuild already running for the namespace is not started again
+        (background=False then waits for it). A synchronous build re-raises its error.
+        Returns rebuild_status(namespace).
+        """
+        with self.lock:
+            running = self._rebuilds.get(namespace)
+            if running is None or running["state"] != "building":
+                running = None
+                status = {
+                    "state": "building", "done": 0, "total": None,
+                    "started_at": time.time(), "finished_at": None, "error": None,
+                }
+                self._rebuilds[namespace] = status
+                finished = self._rebuild_done[namespace] = Event()
+            else:
+                finished = self._rebuild_done[namespace]
+        if running is None:
+            if background:
+                Thread(
+                    target=self._run_rebuild, args=(namespace, queryset, status, finished, True),
+                    name=f"faiss-rebuild-{namespace}", daemon=True,
+                ).start()
+            else:
+                self._run_rebuild(namespace, queryset, status, finished, False)
+        elif not background:
+            finished.wait()
+        return self.rebuild_status(namespace)
+
+    def _run_rebuild(self, namespace: str, queryset, status: Dict[str, Any], finished: Event, own_thread: bool):
+        corpus = corpus_for_namespace(namespace)
+        try:
+            # read before the rows: anything written during the build moves the
+            # version / change log, so the next safe_sync_from_db catches it up
+            version = get_corpus_version(corpus)
+            offset = changes_offset(corpus)
+            status["total"] = queryset.count()
+            new_idx = InMemoryFaissIndex(dim=EMBED_DIM)
+
+            def progress(done: int):
+                status["done"] = done
+
+            self._add_rows(new_idx, queryset.order_by("id").iterator(chunk_size=2000), progress=progress)
+            new_idx.version = version
+            new_idx.changes_offset = offset
+            self.swap(namespace, new_idx)
+            status["state"] = "done"
+        except Exception as e:
+            status["state"] = "failed"
+            status["error"] = str(e)
+            if not own_thread:
+                raise
+        finally:
+            status["finished_at"] = time.time()
+            finished.set()
+            if own_thread:
+                connection.close()   # the builder thread's own DB connection
+
+    def rebuild_status(self, namespace: str) -> Dict[str, Any]:
+        """Last/running rebuild of a namespace (progress) and the index searches use now."""
+        with self.lock:
+            idx = self.indices.get(namespace)
+            build = dict(self._rebuilds.get(namespace) or {"state": "idle"})
+            generation = self.generations.get(namespace, 0)
+        if build.get("total"):
+            build["progress"] = round(min(1.0, build["done"] / build["total"]), 4)
+        if build.get("finished_at"):
+            build["seconds"] = round(build["finished_at"] - build["started_at"], 3)
+        return {
+            "namespace": namespace,
+            "rebuild": build,
+            "active": {
+                "generation": generation,
+                "corpus_version": idx.version if idx is not None else None,
+                "vectors": idx.index.ntotal if idx is not None else 0,
+                "objects": idx.size if idx is not None else 0,
+            },
+        }
+
 # Singleton for app usage
 faiss_manager = FaissIndexManager()
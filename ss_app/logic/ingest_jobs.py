@@ -0,0 +1,192 @@
+# ss_app/logic/ingest_jobs.py
+"""
+DB-backed ingestion job queue.
+
+Upload views only store the file and enqueue an IngestJob; the run_ingest_worker
+management command claims queued jobs (SELECT ... FOR UPDATE SKIP LOCKED, so
+several workers can share the table) and runs them with bounded concurrency.
+Progress is written to the job row and served by the ingest-job progress API.
+A running job's row is also touched by a heartbeat thread, so a job that goes
+long without progress (model load, a large PDF's extraction) is not mistaken
+for one whose worker died.
+"""
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ss_app.models import IngestJob, PDFDocument
+from .data_ingest import ingest_excel_file, ingest_pdf_document
+
+PROGRESS_MIN_INTERVAL = 1.0   # seconds between progress writes for one job
+HEARTBEAT_INTERVAL = 300.0    # seconds between liveness writes; keep well below the stale cutoff
+
+
+def enqueue_ticket_upload(uploaded_file, user) -> IngestJob:
+    """Store an Excel/CSV ticket export and queue it."""
+    return IngestJob.objects.create(
+        kind=IngestJob.KIND_TICKETS,
+        upload=uploaded_file,
+        filename=uploaded_file.name,
+        uploaded_by=user,
+    )
+
+
+def active_pdf_job(pdf_doc: PDFDocument) -> Optional[IngestJob]:
+    """The document's queued or running job, if any."""
+    return (
+        IngestJob.objects.filter(
+            pdf_document=pdf_doc, status__in=(IngestJob.STATUS_QUEUED, IngestJob.STATUS_RUNNING)
+        )
+        .order_by("id")
+        .first()
+    )
+
+
+def enqueue_pdf_document(pdf_doc: PDFDocument, user) -> IngestJob:
+    """
+    Queue an already saved PDFDocument for extraction/chunking/embedding.
+    Returns the document's queued/running job instead if it already has one.
+    """
+    active = active_pdf_job(pdf_doc)
+    if active is not None:
+        return active
+    return IngestJob.objects.create(
+        kind=IngestJob.KIND_PDF,
+        pdf_document=pdf_doc,
+        filename=pdf_doc.title,
+        uploaded_by=user,
+    )
+
+
+def claim_next_job() -> Optional[IngestJob]:
+    """Atomically move the oldest queued job to running and return it (None if the queue is empty)."""
+    with transaction.atomic():
+        job = (
+            IngestJob.objects.select_for_update(skip_locked=True)
+            .filter(status=IngestJob.STATUS_QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = IngestJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.error = ""
+        job.save(update_fields=["status", "started_at", "attempts", "error", "updated_at"])
+    return job
+
+
+def requeue_stale_jobs(stale_after: float) -> int:
+    """
+    Put running jobs whose row was not touched (progress or heartbeat) for
+    stale_after seconds back in the queue (their worker died). Ticket exports
+    resume from their IngestCheckpoint.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return IngestJob.objects.filter(status=IngestJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=IngestJob.STATUS_QUEUED, updated_at=timezone.now()
+    )
+
+
+def _progress_writer(job: IngestJob):
+    last = [0.0]
+
+    def report(done: int, total: Optional[int]):
+        now = time.monotonic()
+        if now - last[0] < PROGRESS_MIN_INTERVAL and (total is None or done < total):
+            return
+        last[0] = now
+        IngestJob.objects.filter(pk=job.pk).update(units_done=done, units_total=total, updated_at=timezone.now())
+
+    return report
+
+
+def _start_heartbeat(job: IngestJob, interval: float) -> threading.Event:
+    """Touch the running job's updated_at every interval seconds until the returned event is set."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                IngestJob.objects.filter(pk=job.pk, status=IngestJob.STATUS_RUNNING).update(
+                    updated_at=timezone.now()
+                )
+        finally:
+            connection.close()   # the heartbeat thread's own DB connection
+
+    threading.Thread(target=beat, name=f"ingest-heartbeat-{job.pk}", daemon=True).start()
+    return stop
+
+
+def run_job(job: IngestJob, heartbeat: float = HEARTBEAT_INTERVAL) -> IngestJob:
+    """
+    Execute a claimed job and record its outcome; never raises for ingest errors.
+    heartbeat: seconds between liveness writes (a third of the worker's stale cutoff).
+    """
+    close_old_connections()
+    stop_heartbeat = _start_heartbeat(job, heartbeat)
+    try:
+        report = _progress_writer(job)
+        if job.kind == IngestJob.KIND_TICKETS:
+            with job.upload.open("rb") as fh:
+                result = ingest_excel_file(fh, job.uploaded_by, progress=report)
+            done = result.get("rows_seen", 0)
+        elif job.kind == IngestJob.KIND_PDF:
+            if job.pdf_document is None:
+                raise ValueError("PDF document no longer exists")
+            result = ingest_pdf_document(job.pdf_document, progress=report)
+            done = result.get("chunk_count", 0)
+        else:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+
+        IngestJob.objects.filter(pk=job.pk).update(
+            status=IngestJob.STATUS_DONE, result=result, units_done=done, units_total=done,
+            finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+    except Exception as e:
+        IngestJob.objects.filter(pk=job.pk).update(
+            status=IngestJob.STATUS_FAILED, error=str(e), finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+    finally:
+        stop_heartbeat.set()
+        close_old_connections()
+    job.refresh_from_db()
+    return job
+
+
+def job_progress(job: IngestJob) -> Dict[str, Any]:
+    """JSON-ready status of a job: processed/total units, throughput and ETA."""
+    done = job.units_done
+    total = job.units_total
+    rate = None
+    eta = None
+    if job.started_at:
+        end = job.finished_at or timezone.now()
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0 and done:
+            rate = round(done / elapsed, 1)
+            if job.status == IngestJob.STATUS_RUNNING and total and total > done:
+                eta = round((total - done) / rate, 1)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "filename": job.filename,
+        "status": job.status,
+        "unit": job.unit,
+        "processed": done,
+        "total": total,
+        "percent": round(100.0 * done / total, 1) if total else None,
+        "throughput_per_s": rate,
+        "eta_seconds": eta,
+        "attempts": job.attempts,
+        "error": job.error or None,
+        "result": job.result,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
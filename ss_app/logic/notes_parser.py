@@ -0,0 +1,205 @@
+# ss_app/logic/notes_parser.py
+"""
+Single-pass parser for ticket "Resolution Notes".
+
+Notes look like "Category: ... Issue: ... RCA: ... Solution: ...". One compiled
+zero-width scan records every section keyword (and whether it is followed by a
+":"/"-" separator, i.e. acts as a section marker); each field is then sliced out
+of that one keyword list instead of running four lazy DOTALL searches per row.
+
+The output is identical to parse_resolution_notes_regex (the original per-field
+regexes, kept as the reference implementation):
+- a field starts after the leftmost occurrence of any of its start keywords
+  (even inside a word), skipping whitespace, one optional ":"/"-" and whitespace
+- it ends at the first marker of one of its end keywords at or after that point
+- solution falls back to the whole note when no solution keyword is present
+
+Deliberately free of Django imports so process-pool workers can import it cheaply.
+"""
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+PARSE_POOL_MIN_ROWS = 2000   # below this, pool start-up/pickling costs more than it saves
+PARSE_POOL_CHUNK = 500       # rows per task sent to a pool worker
+
+# keyword families; "issue" followed by "description" is its own marker kind
+_CATEGORY, _ISSUE, _ISSUE_DESC, _RCA, _SOLUTION, _SCORE = range(6)
+
+# ASCII notes (the common case) are lower-cased once and scanned with a group-free
+# pattern, which lets the regex engine skip ahead by first character; the separator
+# check then only runs at keyword hits. "rca" is matched as "r" + lookahead so the
+# "ca..." of an overlapping "cause"/"category" is still seen.
+_FAST_RE = re.compile(r"category|classification|issue|r(?=ca)|cause|solution|score|data\s*fix")
+_FAST_FAMILY = {
+    "cat": _CATEGORY, "cla": _CATEGORY,
+    "iss": _ISSUE,
+    "r": _RCA, "cau": _RCA,
+    "sol": _SOLUTION, "dat": _SOLUTION,
+    "sco": _SCORE,
+}
+_SEP_RE = re.compile(r"\s*[:\-]")
+_DESC_RE = re.compile(r"\s*description")
+
+# other notes keep IGNORECASE so Unicode case equivalents (e.g. "ſ") still match
+_SCAN_RE_I = re.compile(
+    r"(?P<cat>category|classification)(?P<sep>\s*[:\-])?"
+    r"|(?P<iss>issue)(?P<desc>\s*description)?(?P<isep>\s*[:\-])?"
+    r"|(?P<rca>r(?=ca(?P<rsep>\s*[:\-])?))"
+    r"|(?P<cau>cause)(?P<csep>\s*[:\-])?"
+    r"|(?P<sol>solution|data\s*fix)(?P<ssep>\s*[:\-])?"
+    r"|(?P<sco>score)(?P<osep>\s*[:\-])?",
+    re.IGNORECASE,
+)
+# keyword group -> (family, separator group)
+_GROUPS = {
+    "cat": (_CATEGORY, "sep"),
+    "iss": (_ISSUE, "isep"),
+    "rca": (_RCA, "rsep"),
+    "cau": (_RCA, "csep"),
+    "sol": (_SOLUTION, "ssep"),
+    "sco": (_SCORE, "osep"),
+}
+_SKIP_RE = re.compile(r"\s*[:\-]?\s*")
+
+# (start family, marker kinds that end the field), in output order
+_FIELDS = (
+    (_CATEGORY, frozenset((_ISSUE, _ISSUE_DESC, _RCA, _SOLUTION, _SCORE))),
+    (_ISSUE, frozenset((_RCA, _SOLUTION, _SCORE, _CATEGORY))),
+    (_RCA, frozenset((_SOLUTION, _SCORE, _CATEGORY, _ISSUE))),
+    (_SOLUTION, frozenset((_SCORE, _CATEGORY, _ISSUE, _RCA))),
+)
+
+
+def _scan(text: str) -> Iterator[Tuple[int, int, int, int]]:
+    """Yield (position, family, keyword end, marker kind or -1) for every keyword, in order."""
+    if text.isascii():
+        low = text.lower()
+        for m in _FAST_RE.finditer(low):
+            pos = m.start()
+            kw = m.group()
+            family = _FAST_FAMILY[kw[:3]]
+            kw_end = pos + 3 if kw == "r" else m.end()
+            kind, sep_at = family, kw_end
+            if family == _ISSUE:
+                desc = _DESC_RE.match(low, kw_end)
+                if desc:
+                    kind, sep_at = _ISSUE_DESC, desc.end()
+            yield pos, family, kw_end, kind if _SEP_RE.match(low, sep_at) else -1
+        return
+    for m in _SCAN_RE_I.finditer(text):
+        group = next(g for g in _GROUPS if m.start(g) >= 0)
+        family, sep = _GROUPS[group]
+        kw_end = m.start() + 3 if group == "rca" else m.end(group)
+        if m.start(sep) < 0:
+            kind = -1
+        else:
+            kind = _ISSUE_DESC if m.start("desc") >= 0 else family
+        yield m.start(), family, kw_end, kind
+
+
+def parse_resolution_notes(notes) -> Tuple[str, str, str, str]:
+    """Return (category, issue, rca, solution) parsed from one note."""
+    text = str(notes)
+    # family -> end of its leftmost keyword ("issue" alone, never "issue description")
+    first = {}
+    # (position, kind) of every keyword followed by a separator, in text order
+    markers: List[Tuple[int, int]] = []
+    for pos, family, kw_end, kind in _scan(text):
+        first.setdefault(family, kw_end)
+        if kind >= 0:
+            markers.append((pos, kind))
+
+    values = []
+    for family, stops in _FIELDS:
+        kw_end = first.get(family)
+        if kw_end is None:
+            values.append(None)
+            continue
+        start = _SKIP_RE.match(text, kw_end).end()
+        stop = len(text)
+        for pos, kind in markers:
+            if pos >= start and kind in stops:
+                stop = pos
+                break
+        values.append(text[start:stop].strip())
+
+    category, issue, rca, solution = (v or "" for v in values)
+    if values[3] is None and notes:
+        solution = str(notes).strip()
+    return category, issue, rca, solution
+
+
+def parse_resolution_notes_regex(notes) -> Tuple[str, str, str, str]:
+    """Original four-search implementation; reference for equivalence checks and benchmarks."""
+    category, issue, rca, solution = "", "", "", ""
+    cat_match = re.search(
+        r"(?:category|classification)\s*[:\-]?\s*(.*?)(?=\s*(?:issue|issue\s*description|rca|cause|solution|score|data\s*fix)\s*[:\-]|$)",
+        str(notes), re.IGNORECASE | re.DOTALL
+    )
+    issue_match = re.search(
+        r"(?:issue|issue\s*description)\s*[:\-]?\s*(.*?)(?=\s*(?:rca|cause|solution|score|data\s*fix|category|classification)\s*[:\-]|$)",
+        str(notes), re.IGNORECASE | re.DOTALL
+    )
+    rca_match = re.search(
+        r"(?:rca|cause)\s*[:\-]?\s*(.*?)(?=\s*(?:solution|score|data\s*fix|category|classification|issue)\s*[:\-]|$)",
+        str(notes), re.IGNORECASE | re.DOTALL
+    )
+    sol_match = re.search(
+        r"(?:solution|data\s*fix)\s*[:\-]?\s*(.*?)(?=\s*(?:score|category|classification|issue|rca|cause)\s*[:\-]|$)",
+        str(notes), re.IGNORECASE | re.DOTALL
+    )
+    if cat_match:
+        category = cat_match.group(1).strip()
+    if issue_match:
+        issue = issue_match.group(1).strip()
+    if rca_match:
+        rca = rca_match.group(1).strip()
+    if sol_match:
+        solution = sol_match.group(1).strip()
+    elif notes:
+        solution = str(notes).strip()
+    return category, issue, rca, solution
+
+
+def _parse_chunk(notes: List) -> List[Tuple[str, str, str, str]]:
+    return [parse_resolution_notes(n) for n in notes]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # one long-lived pool: streamed ingests call parse_notes_column once per batch.
+    # spawn, not fork: the parent has torch loaded and runs threads, and a forked
+    # child can inherit a lock some other thread held at fork time
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def parse_notes_column(notes: Iterable, parallel: Optional[bool] = None) -> List[Tuple[str, str, str, str]]:
+    """
+    Parse a whole column of notes, in order.
+
+    parallel=None uses a process pool only for at least PARSE_POOL_MIN_ROWS notes;
+    if the pool cannot be used (e.g. restricted environment) parsing stays in-process.
+    """
+    notes = list(notes)
+    if parallel is None:
+        parallel = len(notes) >= PARSE_POOL_MIN_ROWS
+    if not parallel or len(notes) <= PARSE_POOL_CHUNK:
+        return _parse_chunk(notes)
+    chunks = [notes[i:i + PARSE_POOL_CHUNK] for i in range(0, len(notes), PARSE_POOL_CHUNK)]
+    try:
+        out: List[Tuple[str, str, str, str]] = []
+        for part in _get_pool().map(_parse_chunk, chunks):
+            out.extend(part)
+        return out
+    except (OSError, RuntimeError):
+        return _parse_chunk(notes)
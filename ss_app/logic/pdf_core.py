@@ -1,146 +1,172 @@
 # ss_app/logic/pdf_core.py
 
-from typing import List, Dict
 import re
-import fitz
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 import numpy as np
 from nltk.tokenize import sent_tokenize
 from .embedding_model import default_embedder
 from .index_manager import faiss_manager
+from .pdf_extract import extract_text_from_pdf, iter_blocks  # noqa: F401 (re-export)
+from .result_cache import cached_search, MISS
+from . import query_cache
+from .docstore import pdf_chunk_docs
 from ss_app.models import PDFChunk
 
 NAMESPACE_PDF = "pdf_chunks"
 
+_WORD_RE = re.compile(r"\S+")
 
-def extract_text_from_pdf(pdf_path: str) -> Dict[str, List[str]]:
-    doc = fitz.open(pdf_path)
 
-    headings = []
-    paragraphs = []
-    tables = []
+class Chunk(NamedTuple):
+    text: str
+    token_start: int    # offset of the first token in the document's sentence stream
+    token_end: int      # exclusive
 
-    for page in doc:
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            if "lines" not in block:
-                continue
 
-            line_text = " ".join(
-                span["text"].strip()
-                for line in block["lines"]
-                for span in line["spans"]
-            ).strip()
+def iter_text_blocks(text_data: Dict[str, List[str]]) -> Iterator[str]:
+    """Blocks of extract_text_from_pdf output in chunking order: headings, paragraphs, tables."""
+    for h in text_data.get("headings", []):
+        yield f"HEADING: {h}"
+    yield from text_data.get("paragraphs", [])
+    for t in text_data.get("tables", []):
+        yield f"TABLE:\n{t}"
 
-            if not line_text:
-                continue
 
-            # crude heading detection
-            if (
-                line_text.isupper()
-                or len(line_text.split()) <= 6
-                or re.match(r"^\d+(\.\d+)*\s+", line_text)
-            ):
-                headings.append(line_text)
-            else:
-                paragraphs.append(line_text)
+def _whitespace_counts(texts: Sequence[str]) -> List[int]:
+    return [len(t.split()) for t in texts]
 
-        # table extraction
-        try:
-            tables_on_page = page.find_tables()
-            for table in tables_on_page.tables:
-                t_text = "\n".join([" | ".join(row) for row in table.extract()])
-                if t_text.strip():
-                    tables.append(t_text)
-        except Exception:
-            pass
 
-    return {
-        "headings": headings,
-        "paragraphs": paragraphs,
-        "tables": tables,
-    }
+def _whitespace_spans(text: str) -> List[Tuple[int, int]]:
+    return [m.span() for m in _WORD_RE.finditer(text)]
 
 
-def chunk_text(text_data: Dict[str, List[str]], max_tokens: int = 160, overlap_sentences: int = 2) -> List[str]:
-    combined = []
+def _token_tools() -> Tuple[Callable[[Sequence[str]], List[int]], Callable[[str], List[Tuple[int, int]]]]:
+    """Embedder tokenizer (exact counts) if it can be loaded, else whitespace words."""
+    try:
+        default_embedder.count_tokens(["probe"])
+        return default_embedder.count_tokens, default_embedder.token_spans
+    except Exception:
+        return _whitespace_counts, _whitespace_spans
 
-    # prepend headings
-    for h in text_data.get("headings", []):
-        combined.append(f"HEADING: {h}")
 
-    # main body
-    combined.extend(text_data.get("paragraphs", []))
+def _split_long(sentence: str, max_tokens: int, spans_fn) -> Iterator[Tuple[str, int]]:
+    """Cut a sentence longer than max_tokens into pieces of at most max_tokens tokens."""
+    spans = spans_fn(sentence)
+    for i in range(0, len(spans), max_tokens):
+        window = spans[i:i + max_tokens]
+        piece = sentence[window[0][0]:window[-1][1]].strip()
+        if piece:
+            yield piece, len(window)
 
-    # append table blocks
-    for t in text_data.get("tables", []):
-        combined.append(f"TABLE:\n{t}")
 
-    # sentence tokenize
-    sentences = []
-    for block in combined:
+def iter_chunks(
+    blocks: Iterable[str],
+    max_tokens: int = 160,
+    overlap_sentences: int = 2,
+    token_tools=None,
+) -> Iterator[Chunk]:
+    """
+    Stream chunks of at most max_tokens model tokens from text blocks.
+
+    Blocks are sentence-split and token-counted (one batched tokenizer call per
+    block) as they arrive, so consumers can embed early chunks while later blocks
+    are still being extracted. Consecutive chunks share up to overlap_sentences
+    sentences (fewer if they would not fit); sentences longer than max_tokens are
+    cut at token boundaries.
+    """
+    count_fn, spans_fn = token_tools or _token_tools()
+    window: Deque[Tuple[str, int, int]] = deque()   # (sentence, tokens, token offset)
+    curr = 0
+    pos = 0
+
+    def emit() -> Optional[Chunk]:
+        text = " ".join(s for s, _, _ in window).strip()
+        if not text:
+            return None
+        last = window[-1]
+        return Chunk(text, window[0][2], last[2] + last[1])
+
+    for block in blocks:
         try:
-            sentences.extend(sent_tokenize(block))
+            sentences = sent_tokenize(block)
         except Exception:
-            sentences.append(block)
-
-    # chunk construction
-    chunks = []
-    current = []
-    curr_len = 0
-
-    for sent in sentences:
-        token_est = len(sent.split())
-
-        if curr_len + token_est >= max_tokens:
-            chunks.append(" ".join(current))
-            current = current[-overlap_sentences:]
-            curr_len = sum(len(s.split()) for s in current)
-
-        current.append(sent)
-        curr_len += token_est
+            sentences = [block]
+        if not sentences:
+            continue
+        for sent, n in zip(sentences, count_fn(sentences)):
+            pieces = _split_long(sent, max_tokens, spans_fn) if n > max_tokens else ((sent, n),)
+            for piece, m in pieces:
+                if window and curr + m > max_tokens:
+                    chunk = emit()
+                    if chunk:
+                        yield chunk
+                    keep = list(window)[-overlap_sentences:] if overlap_sentences > 0 else []
+                    window = deque(keep)
+                    curr = sum(k[1] for k in keep)
+                    while window and curr + m > max_tokens:
+                        curr -= window.popleft()[1]
+                window.append((piece, m, pos))
+                curr += m
+                pos += m
+
+    if window:
+        chunk = emit()
+        if chunk:
+            yield chunk
 
-    if current:
-        chunks.append(" ".join(current))
 
-    return [c.strip() for c in chunks if c.strip()]
+def chunk_text(text_data: Dict[str, List[str]], max_tokens: int = 160, overlap_sentences: int = 2) -> List[str]:
+    """Chunk texts of extract_text_from_pdf output (see iter_chunks)."""
+    return [c.text for c in iter_chunks(iter_text_blocks(text_data), max_tokens, overlap_sentences)]
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Return a normalized float32 (n, dim) matrix; convert rows with .tolist() only when saving."""
     return default_embedder.generate_batch(texts)
 
 
 def pdf_search(query: str, top_k: int = 3, namespace: str = NAMESPACE_PDF):
     """
-    FAISS-only semantic search.
+    FAISS-only semantic search; repeated queries are served from the result cache
+    until the pdf_chunks corpus version is bumped by an upload.
     """
+    return cached_search(namespace, query, top_k, None, lambda: _pdf_search(query, top_k, namespace),
+                         embedding_model=default_embedder)
+
+
+def _pdf_search(query: str, top_k: int, namespace: str):
     q_emb = default_embedder.generate_embedding(query)
-    if not q_emb:
+    if q_emb is None:
         return []
 
+    # paraphrase of a recent query -> reuse its ranked chunks, no FAISS/DB work
+    version = query_cache.corpus_version(namespace)
+    cached = query_cache.lookup(namespace, q_emb, (top_k,), version=version)
+    if cached is not MISS:
+        return cached
+
     # Ensure FAISS index exists or build it once
-    faiss_manager.safe_build_from_db_if_empty(
+    faiss_manager.safe_sync_from_db(
         namespace,
-        lambda: list(
-            PDFChunk.objects.filter(embedding__isnull=False)
-            .values_list("id", "embedding")
-        )
+        PDFChunk.objects.filter(embedding__isnull=False).values_list("id", "embedding")
     )
 
     # FAISS vector search
-    candidates = faiss_manager.safe_search(namespace, q_emb, top_k=top_k)
+    candidates = faiss_manager.safe_search(namespace, q_emb, top_k=top_k, normalized=True)
 
     results = []
     if candidates:
-        ids = [c[0] for c in candidates]
-        chunks = {c.id: c for c in PDFChunk.objects.filter(id__in=ids)}
+        chunks = pdf_chunk_docs.get_many(c[0] for c in candidates)
 
         for rank, (obj_id, score) in enumerate(candidates, start=1):
             c = chunks.get(obj_id)
             if c:
                 results.append({
                     "rank": rank,
-                    "text": c.text,
+                    "text": c["text"],
                     "score": round(float(score), 4)
                 })
 
+    query_cache.store(namespace, q_emb, (top_k,), results, version=version)
     return results
@@ -0,0 +1,279 @@
+# ss_app/logic/pdf_extract.py
+"""
+PDF text extraction (headings / paragraphs / tables) with PyMuPDF.
+
+- Pages are processed in contiguous page ranges; large documents fan the ranges
+  out to a process pool where every worker opens the document itself (PyMuPDF
+  documents cannot be shared across processes). Ranges are merged back in page
+  order, so output is identical to a sequential walk; only a bounded number of
+  ranges is in flight, so results do not pile up ahead of a slow consumer.
+- Each page result also carries its blocks in reading order (headings prefixed
+  "HEADING: ", tables "TABLE:\n" after the page text) for streaming chunking.
+- Page results can be cached on disk (cache_path, e.g. keyed by the file's
+  sha256): gzip'd JSON lines, one page per line, written while streaming and
+  renamed into place only once every page was read, so re-chunking and
+  re-embedding a known file skip PyMuPDF entirely.
+- page.find_tables() is by far the slowest call and its default "lines" strategy
+  only finds tables drawn with vector ruling lines/rectangles, so it only runs on
+  pages whose drawings contain enough straight edges to form a grid.
+
+Deliberately free of Django imports so pool workers can import it cheaply.
+"""
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import fitz
+
+PARALLEL_MIN_PAGES = 24      # smaller documents are extracted in-process
+PAGES_PER_TASK = 16          # page-range size sent to one pool worker
+TABLE_MIN_EDGES = 4          # straight edges a page needs before table detection runs
+CACHE_FORMAT = 1             # bump when extraction output or the cache encoding changes
+
+_HEADING_NUM_RE = re.compile(r"^\d+(\.\d+)*\s+")
+
+# headings, paragraphs, tables, table check ran, blocks in reading order
+PageResult = Tuple[List[str], List[str], List[str], bool, List[str]]
+
+
+def _straight_edges(page, limit: int) -> int:
+    """Count line segments / rectangle edges in the page's vector drawings (stops at limit)."""
+    edges = 0
+    for path in page.get_cdrawings():
+        for item in path.get("items", ()):
+            kind = item[0]
+            if kind == "l":
+                edges += 1
+            elif kind in ("re", "qu"):
+                edges += 4
+            if edges >= limit:
+                return edges
+    return edges
+
+
+def _extract_page(page) -> PageResult:
+    headings: List[str] = []
+    paragraphs: List[str] = []
+    tables: List[str] = []
+    ordered: List[str] = []
+
+    blocks = page.get_text("dict")["blocks"]
+    for block in blocks:
+        if "lines" not in block:
+            continue
+
+        line_text = " ".join(
+            span["text"].strip()
+            for line in block["lines"]
+            for span in line["spans"]
+        ).strip()
+
+        if not line_text:
+            continue
+
+        # crude heading detection
+        if (
+            line_text.isupper()
+            or len(line_text.split()) <= 6
+            or _HEADING_NUM_RE.match(line_text)
+        ):
+            headings.append(line_text)
+            ordered.append(f"HEADING: {line_text}")
+        else:
+            paragraphs.append(line_text)
+            ordered.append(line_text)
+
+    # table extraction, only where ruling lines could form a table
+    checked = _straight_edges(page, TABLE_MIN_EDGES) >= TABLE_MIN_EDGES
+    if checked:
+        try:
+            tables_on_page = page.find_tables()
+            for table in tables_on_page.tables:
+                t_text = "\n".join([" | ".join(cell or "" for cell in row) for row in table.extract()])
+                if t_text.strip():
+                    tables.append(t_text)
+                    ordered.append(f"TABLE:\n{t_text}")
+        except Exception:
+            pass
+
+    return headings, paragraphs, tables, checked, ordered
+
+
+def _extract_range(pdf_path: str, start: int, stop: int) -> List[PageResult]:
+    with fitz.open(pdf_path) as doc:
+        return [_extract_page(doc[i]) for i in range(start, min(stop, doc.page_count))]
+
+
+def page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: callers (upload view, ingest worker) have torch loaded and
+    # run threads, and a forked child can inherit a lock held at fork time
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _iter_extracted(pdf_path: str, parallel: Optional[bool]) -> Iterator[PageResult]:
+    n_pages = page_count(pdf_path)
+    if parallel is None:
+        parallel = n_pages >= PARALLEL_MIN_PAGES
+    ranges = deque((s, s + PAGES_PER_TASK) for s in range(0, n_pages, PAGES_PER_TASK))
+    if parallel and len(ranges) > 1:
+        try:
+            pool = _get_pool()
+            inflight = deque([pool.submit(_extract_range, pdf_path, *ranges.popleft())])
+        except (OSError, RuntimeError):
+            pool = None   # pool unavailable: extract in-process
+        if pool is not None:
+            max_inflight = 2 * (os.cpu_count() or 1)
+            while inflight:
+                while ranges and len(inflight) < max_inflight:
+                    inflight.append(pool.submit(_extract_range, pdf_path, *ranges.popleft()))
+                yield from inflight.popleft().result()
+            return
+    for s, e in ranges:
+        yield from _extract_range(pdf_path, s, e)
+
+
+_KIND_PREFIX = (("h", "HEADING: "), ("t", "TABLE:\n"))
+
+
+def _encode_page(result: PageResult) -> str:
+    rows = []
+    for block in result[4]:
+        for kind, prefix in _KIND_PREFIX:
+            if block.startswith(prefix):
+                rows.append([kind, block[len(prefix):]])
+                break
+        else:
+            rows.append(["p", block])
+    return json.dumps([int(result[3]), rows], ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode_page(line: str) -> PageResult:
+    checked, rows = json.loads(line)
+    headings, paragraphs, tables, ordered = [], [], [], []
+    for kind, text in rows:
+        if kind == "h":
+            headings.append(text)
+            ordered.append(f"HEADING: {text}")
+        elif kind == "t":
+            tables.append(text)
+            ordered.append(f"TABLE:\n{text}")
+        else:
+            paragraphs.append(text)
+            ordered.append(text)
+    return headings, paragraphs, tables, bool(checked), ordered
+
+
+def _iter_cached(cache_path: str) -> Iterator[PageResult]:
+    with gzip.open(cache_path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            yield _decode_page(line)
+
+
+def _iter_and_cache(results: Iterator[PageResult], cache_path: str) -> Iterator[PageResult]:
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    complete = False
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+            for result in results:
+                fh.write(_encode_page(result) + "\n")
+                yield result
+        complete = True
+        os.replace(tmp, cache_path)
+    finally:
+        if not complete and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def iter_page_results(pdf_path: str, parallel: Optional[bool] = None,
+                      cache_path: Optional[str] = None) -> Iterator[PageResult]:
+    """
+    Yield per-page results in page order (page ranges run in the pool when parallel).
+    With cache_path, a complete cache file is replayed instead of parsing the PDF,
+    and a missing one is written as pages are extracted.
+    """
+    if cache_path and os.path.exists(cache_path):
+        return _iter_cached(cache_path)
+    results = _iter_extracted(pdf_path, parallel)
+    return _iter_and_cache(results, cache_path) if cache_path else results
+
+
+def _fill_stats(stats: Dict[str, float], pages: int, checked: int, seconds: float):
+    stats.update({
+        "pages": pages,
+        "table_pages_checked": checked,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages / seconds, 1) if seconds > 0 else float(pages),
+    })
+
+
+def iter_blocks(pdf_path: str, parallel: Optional[bool] = None,
+                stats: Optional[Dict[str, float]] = None,
+                cache_path: Optional[str] = None) -> Iterator[str]:
+    """
+    Stream text blocks page by page in reading order (see PageResult), for
+    chunking while later pages are still being extracted. stats, if given, is
+    filled like extract_text_from_pdf's once the generator is exhausted.
+    """
+    t0 = time.perf_counter()
+    cached = bool(cache_path and os.path.exists(cache_path))
+    pages = checked = 0
+    for _, _, _, ran, ordered in iter_page_results(pdf_path, parallel=parallel, cache_path=cache_path):
+        pages += 1
+        checked += ran
+        yield from ordered
+    if stats is not None:
+        _fill_stats(stats, pages, checked, time.perf_counter() - t0)
+        stats["cached"] = cached
+
+
+def extract_text_from_pdf(pdf_path: str, parallel: Optional[bool] = None,
+                          stats: Optional[Dict[str, float]] = None,
+                          cache_path: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Return {"headings", "paragraphs", "tables"} in document order.
+    parallel=None uses the process pool from PARALLEL_MIN_PAGES pages on.
+    stats, if given, is filled with pages, table_pages_checked, seconds, pages_per_sec, cached.
+    cache_path: see iter_page_results.
+    """
+    t0 = time.perf_counter()
+    cached = bool(cache_path and os.path.exists(cache_path))
+    headings: List[str] = []
+    paragraphs: List[str] = []
+    tables: List[str] = []
+    pages = checked = 0
+    for h, p, t, ran, _ in iter_page_results(pdf_path, parallel=parallel, cache_path=cache_path):
+        headings.extend(h)
+        paragraphs.extend(p)
+        tables.extend(t)
+        pages += 1
+        checked += ran
+
+    if stats is not None:
+        _fill_stats(stats, pages, checked, time.perf_counter() - t0)
+        stats["cached"] = cached
+
+    return {
+        "headings": headings,
+        "paragraphs": paragraphs,
+        "tables": tables,
+    }
@@ -0,0 +1,28 @@
+# ss_app/logic/pdf_workers.py
+"""
+Process-pool entry points for bulk PDF ingestion (ingest_pdfs command).
+
+Each task extracts one document (through the on-disk extraction cache) and
+chunks it; the parent process embeds and stores the chunks. This module does
+not import Django at module level so it can be unpickled in spawned workers;
+init_worker() sets Django up before pdf_core (which imports models) is loaded.
+"""
+from typing import Dict, List, Optional, Tuple
+
+ChunkRow = Tuple[str, int, int]   # text, token_start, token_end
+
+
+def init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def extract_and_chunk(pdf_path: str, cache_path: Optional[str] = None) -> Tuple[List[ChunkRow], Dict[str, float]]:
+    """Chunks of one PDF plus its extraction stats. Pages are read in-process: the pool is per file."""
+    from .pdf_core import iter_blocks, iter_chunks
+
+    stats: Dict[str, float] = {}
+    chunks = [tuple(c) for c in iter_chunks(iter_blocks(pdf_path, parallel=False, stats=stats, cache_path=cache_path))]
+    return chunks, stats
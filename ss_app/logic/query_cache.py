@@ -0,0 +1,140 @@
+# ss_app/logic/query_cache.py
+"""
+Semantic near-duplicate query cache.
+
+Paraphrased queries ("vpn not connecting" / "VPN connection failing") miss the
+exact-text result cache but embed to almost the same vector. Each corpus keeps a
+small FAISS index of recent query vectors; a new query within RADIUS cosine of a
+cached one (same search params, same corpus version, same guard) reuses that
+query's ready-to-serve hits, skipping FAISS search and ticket/chunk hydration.
+
+Settings (optional): SEMANTIC_QUERY_CACHE = {"RADIUS": 0.97, "CAPACITY": 256}
+"""
+import copy
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import faiss
+import numpy as np
+from django.conf import settings
+
+from .index_manager import EMBED_DIM
+from .result_cache import MISS, corpus_for_namespace, get_corpus_version
+
+DEFAULT_RADIUS = 0.97
+DEFAULT_CAPACITY = 256
+_PROBE = 8   # nearest cached queries checked per lookup
+
+
+class SemanticQueryCache:
+    def __init__(self, radius: float = DEFAULT_RADIUS, capacity: int = DEFAULT_CAPACITY, dim: int = EMBED_DIM):
+        self.radius = radius
+        self.capacity = capacity
+        self.dim = dim
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        # cache id -> (params, guard, payload), oldest first
+        self.entries: "OrderedDict[int, Tuple[Hashable, Hashable, Any]]" = OrderedDict()
+        self.version: Optional[int] = None
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def _reset(self, version: int):
+        self.index.reset()
+        self.entries.clear()
+        self.version = version
+
+    @staticmethod
+    def _row(q_vec: np.ndarray) -> np.ndarray:
+        # query vectors come from EmbeddingModel: normalized float32
+        return np.ascontiguousarray(q_vec, dtype=np.float32).reshape(1, -1)
+
+    def lookup(self, q_vec: np.ndarray, params: Hashable, version: int, guard: Hashable = None):
+        """Return the cached payload of a near-identical query, or MISS."""
+        with self.lock:
+            if self.version is None or version > self.version:
+                self._reset(version)
+            if self.index.ntotal:
+                D, I = self.index.search(self._row(q_vec), min(_PROBE, self.index.ntotal))
+                for score, cid in zip(D[0], I[0]):
+                    if cid < 0 or score < self.radius:
+                        break
+                    entry = self.entries.get(int(cid))
+                    if entry and entry[0] == params and entry[1] == guard:
+                        self.entries.move_to_end(int(cid))
+                        self.hits += 1
+                        return copy.deepcopy(entry[2])
+            self.misses += 1
+            return MISS
+
+    def store(self, q_vec: np.ndarray, params: Hashable, version: int, payload: Any, guard: Hashable = None):
+        with self.lock:
+            if self.version is not None and version < self.version:
+                return  # computed against an older corpus; never pin it
+            if version != self.version:
+                self._reset(version)
+            cid = self.next_id
+            self.next_id += 1
+            self.index.add_with_ids(self._row(q_vec), np.asarray([cid], dtype=np.int64))
+            self.entries[cid] = (params, guard, copy.deepcopy(payload))
+            while len(self.entries) > self.capacity:
+                old, _ = self.entries.popitem(last=False)
+                self.index.remove_ids(np.asarray([old], dtype=np.int64))
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self.entries),
+                "radius": self.radius,
+            }
+
+
+_caches: Dict[str, SemanticQueryCache] = {}
+_caches_lock = Lock()
+
+
+def get_query_cache(namespace: str) -> SemanticQueryCache:
+    corpus = corpus_for_namespace(namespace)
+    with _caches_lock:
+        cache = _caches.get(corpus)
+        if cache is None:
+            cfg = getattr(settings, "SEMANTIC_QUERY_CACHE", {}) or {}
+            cache = SemanticQueryCache(
+                radius=cfg.get("RADIUS", DEFAULT_RADIUS),
+                capacity=cfg.get("CAPACITY", DEFAULT_CAPACITY),
+            )
+            _caches[corpus] = cache
+        return cache
+
+
+def corpus_version(namespace: str) -> int:
+    return get_corpus_version(corpus_for_namespace(namespace))
+
+
+def lookup(namespace: str, q_vec: np.ndarray, params: Hashable, guard: Hashable = None,
+           version: Optional[int] = None):
+    """MISS or the payload cached for a near-duplicate query in this namespace's corpus."""
+    if version is None:
+        version = corpus_version(namespace)
+    return get_query_cache(namespace).lookup(q_vec, params, version, guard)
+
+
+def store(namespace: str, q_vec: np.ndarray, params: Hashable, payload: Any, guard: Hashable = None,
+          version: Optional[int] = None):
+    """Remember payload for q_vec; pass the version read before searching to avoid pinning stale hits."""
+    if version is None:
+        version = corpus_version(namespace)
+    get_query_cache(namespace).store(q_vec, params, version, payload, guard)
+
+
+def query_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-corpus hit/miss counts and hit rate for this process."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {corpus: cache.stats() for corpus, cache in caches.items()}
@@ -0,0 +1,266 @@
+# ss_app/logic/result_cache.py
+"""
+Versioned cache for ready-to-serve search payloads.
+
+- Key: (corpus, corpus version, embedding model, normalized query, top_k, threshold)
+- Pluggable backend via settings.SEARCH_RESULT_CACHE["BACKEND"]:
+  "lru" (in-process, default), "django" (Django cache framework, ALIAS),
+  "none", or a dotted path to a class with get(key) / set(key, value, timeout)
+- Corpus versions live in small files under INDEX_CACHE_DIR/versions, so an
+  ingest in any process (upload view, crawl command, ...) invalidates every
+  process's entries; stale payloads are never served, they just stop matching.
+- Rows changed in place (upserts) are also appended to a per-corpus change log,
+  so in-memory indices of other processes can replace just those vectors.
+"""
+import copy
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .utils import index_cache_path
+
+CORPUS_TICKETS = "tickets"
+CORPUS_PDF = "pdf_chunks"
+CORPUS_WEB = "web_paragraphs"
+
+# session-scoped FAISS namespaces share their corpus with the global one
+_SESSION_PREFIXES = {
+    "tickets_session_": CORPUS_TICKETS,
+    "pdf_session_": CORPUS_PDF,
+}
+
+DEFAULT_CONFIG = {
+    "BACKEND": "lru",
+    "MAX_ENTRIES": 1024,
+    "TIMEOUT": 3600,
+    "ALIAS": "default",
+}
+
+MISS = object()
+
+
+class LRUBackend:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024, **_):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        # callers may mutate what they serve; never hand out the stored object
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None):
+        expires = time.monotonic() + timeout if timeout else 0.0
+        with self._lock:
+            self._data[key] = (expires, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class DjangoCacheBackend:
+    """Delegates to settings.CACHES[alias] (e.g. Redis/Memcached shared by all workers)."""
+
+    def __init__(self, alias: str = "default", **_):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+
+    def get(self, key: str):
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None):
+        self.cache.set(key, value, timeout)
+
+
+class NullBackend:
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value: Any, timeout: Optional[float] = None):
+        pass
+
+
+_backend = None
+_backend_lock = Lock()
+
+
+def _config() -> Dict[str, Any]:
+    cfg = dict(DEFAULT_CONFIG)
+    cfg.update(getattr(settings, "SEARCH_RESULT_CACHE", {}) or {})
+    return cfg
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                cfg = _config()
+                name = cfg["BACKEND"]
+                if name == "lru":
+                    _backend = LRUBackend(max_entries=cfg["MAX_ENTRIES"])
+                elif name == "django":
+                    _backend = DjangoCacheBackend(alias=cfg["ALIAS"])
+                elif name in (None, "none"):
+                    _backend = NullBackend()
+                else:
+                    _backend = import_string(name)(max_entries=cfg["MAX_ENTRIES"], alias=cfg["ALIAS"])
+    return _backend
+
+
+# --- corpus versions ---
+
+_versions: Dict[str, Tuple[Tuple[int, int], int]] = {}   # corpus -> ((mtime, inode), version)
+
+
+def corpus_for_namespace(namespace: str) -> str:
+    for prefix, corpus in _SESSION_PREFIXES.items():
+        if namespace.startswith(prefix):
+            return corpus
+    return namespace
+
+
+def _version_path(corpus: str) -> str:
+    return index_cache_path("versions", corpus)
+
+
+def get_corpus_version(corpus: str) -> int:
+    """Current version of a corpus (0 if it was never bumped); one stat() per call."""
+    path = _version_path(corpus)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+    # every bump replaces the file, so the inode changes even within one mtime tick
+    stamp = (st.st_mtime_ns, st.st_ino)
+    cached = _versions.get(corpus)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="ascii") as fh:
+            version = int(fh.read().strip() or 0)
+    except (OSError, ValueError):
+        version = 0
+    _versions[corpus] = (stamp, version)
+    return version
+
+
+def bump_corpus_version(corpus: str) -> int:
+    """Mark a corpus as changed; call after every ingest that adds/changes/removes documents."""
+    # time-based so concurrent bumps from different processes can never collide
+    # with (or roll back to) a version an older cache entry was stored under
+    version = max(get_corpus_version(corpus) + 1, time.time_ns())
+    path = _version_path(corpus)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="ascii") as fh:
+        fh.write(str(version))
+    os.replace(tmp, path)
+    return version
+
+
+# --- change log (rows updated in place) ---
+
+def _changes_path(corpus: str) -> str:
+    return index_cache_path("changes", f"{corpus}.log")
+
+
+def record_changed_ids(corpus: str, object_ids: Iterable[int]):
+    """Append ids whose stored vectors/text changed; call before bump_corpus_version()."""
+    line = ",".join(str(int(i)) for i in object_ids)
+    if not line:
+        return
+    # one O_APPEND write per batch, so concurrent writers never interleave within a line
+    fd = os.open(_changes_path(corpus), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (line + "\n").encode("ascii"))
+    finally:
+        os.close(fd)
+
+
+def changes_offset(corpus: str) -> int:
+    """Current end of the change log; a reader starting here only sees later changes."""
+    try:
+        return os.stat(_changes_path(corpus)).st_size
+    except OSError:
+        return 0
+
+
+def read_changed_ids(corpus: str, offset: int) -> Tuple[List[int], int]:
+    """Ids logged after offset (complete lines only) and the offset to resume from."""
+    try:
+        with open(_changes_path(corpus), "rb") as fh:
+            fh.seek(offset)
+            data = fh.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    ids = {int(x) for line in data[:end].split(b"\n") if line for x in line.split(b",")}
+    return sorted(ids), offset + end
+
+
+# --- result cache ---
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def model_key(embedding_model) -> str:
+    """Cache-key name of an embedding model (EmbeddingModel.name, else its class)."""
+    return getattr(embedding_model, "name", None) or type(embedding_model).__name__
+
+
+def make_key(namespace: str, query: str, top_k: int, threshold: Optional[float] = None,
+             embedding_model=None, variant: str = "") -> str:
+    """variant distinguishes result shapes of the same query (e.g. collapsed duplicates)."""
+    corpus = corpus_for_namespace(namespace)
+    version = get_corpus_version(corpus)
+    model = model_key(embedding_model) if embedding_model is not None else ""
+    raw = f"{corpus}\x1f{version}\x1f{model}\x1f{normalize_query(query)}\x1f{top_k}\x1f{threshold}"
+    if variant:
+        raw += f"\x1f{variant}"
+    # fixed-length, whitespace-free key (Memcached-safe)
+    return f"search:{corpus}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def get_cached(key: str):
+    value = get_backend().get(key)
+    return MISS if value is None else value
+
+
+def set_cached(key: str, payload: Any):
+    get_backend().set(key, payload, _config()["TIMEOUT"])
+
+
+def cached_search(
+    namespace: str,
+    query: str,
+    top_k: int,
+    threshold: Optional[float],
+    compute: Callable[[], Any],
+    embedding_model=None,
+):
+    """Return the cached payload for this search, or compute() and store it."""
+    key = make_key(namespace, query, top_k, threshold, embedding_model)
+    payload = get_cached(key)
+    if payload is not MISS:
+        return payload
+    payload = compute()
+    set_cached(key, payload)
+    return payload
@@ -1,113 +1,204 @@
 # ss_app/logic/retriever_logic.py
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
 from ss_app.sub_models.webcrawl_models import Paragraph
 from ss_app.logic.embedding_model import default_embedder
 from ss_app.logic.index_manager import faiss_manager
+from ss_app.logic.bm25_index import PersistedBM25
+from ss_app.logic.docstore import web_page_docs, web_paragraph_docs
+from ss_app.logic.result_cache import cached_search, CORPUS_WEB
 
-from rank_bm25 import BM25Okapi
 import nltk
 from nltk.tokenize import word_tokenize, sent_tokenize
 import math
-import threading
 
 nltk.download("punkt", quiet=True)
 
-_lock = threading.Lock()
-_cached = {"bm25": None, "paras": None}
+BM25_FILE = "bm25_web_paragraphs.npz"
 
 
 def _tok(s):
     return [t.lower() for t in word_tokenize(s) if any(c.isalnum() for c in t)]
 
 
-def _load_bm25():
-    with _lock:
-        paras = list(Paragraph.objects.select_related("page"))
-        corpus = [_tok(p.text) for p in paras]
-        bm25 = BM25Okapi(corpus) if corpus else None
-        _cached["bm25"] = bm25
-        _cached["paras"] = paras
-        return bm25, paras
+def _paragraph_token_rows():
+    rows = Paragraph.objects.order_by("id").values_list("id", "text").iterator(chunk_size=2000)
+    return ((pid, _tok(text)) for pid, text in rows)
+
+
+def _token_id(tok: str) -> int:
+    """Stable (cross-process) 32-bit id for a token."""
+    return zlib.crc32(tok.encode("utf-8"))
+
+
+def _query_token_ids(tokens) -> np.ndarray:
+    return np.fromiter({_token_id(t) for t in tokens}, dtype=np.int64)
+
+
+def precompute_sentences(text: str) -> Dict[str, Any]:
+    """
+    Segment a paragraph once (at crawl time) into the Paragraph sentence_* fields:
+    flattened [start, end) char bounds, concatenated per-sentence token-id sets,
+    and offsets delimiting each sentence's ids (len == n_sentences + 1).
+    """
+    bounds: List[int] = []
+    ids: List[int] = []
+    offsets = [0]
+    cursor = 0
+    for s in sent_tokenize(text):
+        start = text.find(s, cursor)
+        if start < 0:
+            # punkt normally returns exact substrings; give up and use the slow path
+            return {"sentence_bounds": None, "sentence_token_ids": None, "sentence_token_offsets": None}
+        end = start + len(s)
+        cursor = end
+        bounds.extend((start, end))
+        ids.extend(sorted({_token_id(t) for t in _tok(s)}))
+        offsets.append(len(ids))
+    return {"sentence_bounds": bounds, "sentence_token_ids": ids, "sentence_token_offsets": offsets}
+
+
+def _best_sentence(para: Dict[str, Any], q_ids: np.ndarray) -> Tuple[Optional[str], int]:
+    """
+    Return (best sentence, query-token overlap) for a web_paragraph_docs record;
+    the first sentence wins ties.
+    """
+    text = para["text"]
+    if para["sentence_token_offsets"] is None:
+        pre = precompute_sentences(text)
+        if pre["sentence_token_offsets"] is None:
+            best_sent, best = None, -1
+            q = set(q_ids.tolist())
+            for s in sent_tokenize(text):
+                overlap = len({_token_id(t) for t in _tok(s)} & q)
+                if overlap > best:
+                    best, best_sent = overlap, s
+            return best_sent, best
+        bounds, ids, offsets = pre["sentence_bounds"], pre["sentence_token_ids"], pre["sentence_token_offsets"]
+    else:
+        bounds, ids, offsets = para["sentence_bounds"], para["sentence_token_ids"], para["sentence_token_offsets"]
+
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if offsets.shape[0] < 2:
+        return None, -1
+    hit = np.isin(np.asarray(ids, dtype=np.int64), q_ids)
+    cum = np.concatenate(([0], np.cumsum(hit, dtype=np.int64)))
+    overlaps = cum[offsets[1:]] - cum[offsets[:-1]]
+    i = int(np.argmax(overlaps))
+    return text[bounds[2 * i]:bounds[2 * i + 1]], int(overlaps[i])
+
+
+def _paragraph_docs(ids: List[int]) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    """Display records of paragraphs and their pages, from the docstores (no DB once warm)."""
+    paras = web_paragraph_docs.get_many(ids)
+    pages = web_page_docs.get_many({p["page_id"] for p in paras.values()})
+    return paras, pages
+
+
+_bm25 = PersistedBM25(BM25_FILE, _paragraph_token_rows, lambda: Paragraph.objects.count())
+
+
+def bm25_add_paragraphs(items: Iterable[Tuple[int, str]], persist: bool = True) -> int:
+    """Incrementally index (paragraph_id, text) pairs, e.g. right after a crawl stores them."""
+    return _bm25.add(((pid, _tok(text)) for pid, text in items), persist=persist)
+
+
+def bm25_remove_paragraphs(paragraph_ids: Iterable[int], persist: bool = True) -> int:
+    """Drop deleted/replaced paragraphs from the lexical index."""
+    return _bm25.remove(paragraph_ids, persist=persist)
+
+
+def bm25_persist():
+    """Write the in-process BM25 index to disk (no-op if it was never loaded)."""
+    _bm25.persist()
 
 
 def bm25_search(query: str, top_k: int):
-    bm25, paras = _cached["bm25"], _cached["paras"]
-    if not bm25:
-        bm25, paras = _load_bm25()
+    bm25 = _bm25.get()
 
     q = _tok(query)
-    scores = bm25.get_scores(q)
-    idxs = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
+    hits = bm25.search(q, top_k)
+    if not hits:
+        return []
+
+    paras, pages = _paragraph_docs([h[0] for h in hits])
+
+    q_ids = _query_token_ids(q)
 
     out = []
-    for i in idxs:
-        para = paras[i]
-        best_sent = None
-        best = -1
-        for s in sent_tokenize(para.text):
-            overlap = len(set(_tok(s)).intersection(q))
-            sc = overlap * math.log(1 + scores[i]) if scores[i] > 0 else overlap
-            if sc > best:
-                best = sc
-                best_sent = s
+    for pid, score in hits:
+        para = paras.get(pid)
+        page = pages.get(para["page_id"]) if para else None
+        if not page:
+            continue
+        # sentence score is overlap scaled by a per-paragraph constant,
+        # so the best sentence is simply the max-overlap one
+        best_sent, overlap = _best_sentence(para, q_ids)
+        if best_sent is None:
+            best = -1
+        else:
+            best = overlap * math.log(1 + score) if score > 0 else overlap
 
         out.append({
-            "paragraph_id": para.id,
-            "page_url": para.page.url,
-            "page_title": para.page.title,
-            "paragraph": para.text,
+            "paragraph_id": pid,
+            "page_url": page["url"],
+            "page_title": page["title"],
+            "paragraph": para["text"],
             "best_sentence": best_sent,
             "sentence_score": float(best),
-            "bm25_score": float(scores[i]),
+            "bm25_score": float(score),
         })
 
     return out
 
 
 def semantic_search(query: str, top_k: int = 5):
+    """FAISS paragraph search with BM25 fallback, served from the result cache when possible."""
+    return cached_search(CORPUS_WEB, query, top_k, None, lambda: _semantic_search(query, top_k),
+                         embedding_model=default_embedder)
+
+
+def _semantic_search(query: str, top_k: int):
     q_vec = default_embedder.generate_embedding(query)
-    if not q_vec:
+    if q_vec is None:
         return bm25_search(query, top_k)
 
-    # ensure FAISS index is ready
-    faiss_manager.safe_build_from_db_if_empty(
+    # ensure FAISS index is ready and caught up with other processes' crawls
+    faiss_manager.safe_sync_from_db(
         "web_paragraphs",
-        lambda: list(Paragraph.objects.filter(embedding__isnull=False)
-                     .values_list("id", "embedding"))
+        Paragraph.objects.filter(embedding__isnull=False).values_list("id", "embedding")
     )
 
     try:
-        hits = faiss_manager.safe_search("web_paragraphs", q_vec, top_k)
+        hits = faiss_manager.safe_search("web_paragraphs", q_vec, top_k, normalized=True)
     except Exception:
         return bm25_search(query, top_k)
 
     if not hits:
         return bm25_search(query, top_k)
 
-    ids = [h[0] for h in hits]
-    paras = {p.id: p for p in Paragraph.objects.filter(id__in=ids).select_related("page")}
+    paras, pages = _paragraph_docs([h[0] for h in hits])
 
     out = []
-    q_tokens = set(_tok(query))
+    q_ids = _query_token_ids(_tok(query))
 
     for pid, score in hits:
         p = paras.get(pid)
-        if not p:
+        page = pages.get(p["page_id"]) if p else None
+        if not page:
             continue
 
-        best_sent = None
-        best = -1
-        for s in sent_tokenize(p.text):
-            overlap = len(set(_tok(s)).intersection(q_tokens))
-            sc = overlap * (score + 1)
-            if sc > best:
-                best = sc
-                best_sent = s
+        best_sent, overlap = _best_sentence(p, q_ids)
+        best = overlap * (score + 1) if best_sent is not None else -1
 
         out.append({
-            "paragraph_id": p.id,
-            "page_url": p.page.url,
-            "page_title": p.page.title,
-            "paragraph": p.text,
+            "paragraph_id": pid,
+            "page_url": page["url"],
+            "page_title": page["title"],
+            "paragraph": p["text"],
             "best_sentence": best_sent,
             "semantic_score": float(score),
             "sentence_score": float(best),
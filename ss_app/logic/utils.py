@@ -1,6 +1,10 @@
 # ss_app/sub_models/utils.py
-from typing import List
+import os
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
 import numpy as np
+from django.conf import settings
 
 def normalize_vector(vec: List[float], dim: int = 768) -> List[float]:
     a = np.array(vec, dtype=float)
@@ -8,3 +12,60 @@ def normalize_vector(vec: List[float], dim: int = 768) -> List[float]:
     if norm == 0 or np.isnan(norm):
         return [0.0] * dim
     return (a / norm).tolist()
+
+def index_cache_path(*parts: str) -> str:
+    """Path under settings.INDEX_CACHE_DIR, creating parent directories as needed."""
+    base = getattr(settings, "INDEX_CACHE_DIR", None) or os.path.join(settings.BASE_DIR, "index_cache")
+    path = os.path.join(str(base), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+T = TypeVar("T")
+_DONE = object()
+
+
+def iter_in_background(iterable: Iterable[T], maxsize: int = 2, name: str = "stage") -> Iterator[T]:
+    """
+    Run iterable in a daemon thread, handing items over through a bounded queue.
+
+    Chaining calls builds a pipeline whose stages overlap while at most maxsize
+    items wait between two stages (backpressure). An exception in the producer
+    is re-raised in the consumer; if the consumer stops early the producer is
+    told to stop at its next put.
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    error: List[BaseException] = []
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as exc:
+            error.append(exc)
+        finally:
+            put(_DONE)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            yield item
+        if error:
+            raise error[0]
+    finally:
+        stop.set()
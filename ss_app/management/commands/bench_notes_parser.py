@@ -0,0 +1,78 @@
+# ss_app/management/commands/bench_notes_parser.py
+import random
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from ss_app.logic.notes_parser import (
+    parse_notes_column,
+    parse_resolution_notes,
+    parse_resolution_notes_regex,
+)
+
+_FILLER = (
+    "the service restarted and users reported intermittent failures on login "
+    "while the backend queue was draining slowly "
+)
+_FRAGMENTS = [
+    "Category:", "classification -", "Issue:", "Issue Description:", "issue", "RCA:", "rca",
+    "Cause -", "because", "Solution:", "solution", "Data Fix:", "Score:", "tissue:", ":", "-",
+    "VPN", "cert expired", "\n", "  ", _FILLER,
+]
+
+
+def _synthetic_notes(n: int, seed: int):
+    rng = random.Random(seed)
+    notes = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            notes.append(
+                f"Category: Network\nIssue: {_FILLER * rng.randint(1, 4)}\n"
+                f"RCA: {_FILLER * rng.randint(1, 3)}\nSolution: {_FILLER * rng.randint(1, 6)}"
+            )
+        else:
+            notes.append(" ".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, 14))))
+    return notes
+
+
+class Command(BaseCommand):
+    help = "Time the single-pass resolution-notes parser against the original regexes (equivalence: ss_app.tests)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="Excel/CSV export whose 'Resolution Notes' column is used")
+        parser.add_argument("--rows", type=int, default=20000, help="Synthetic notes when no --file is given")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        if opts["file"]:
+            path = opts["file"]
+            df = pd.read_csv(path, dtype=str) if path.lower().endswith(".csv") else pd.read_excel(path)
+            df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+            if "resolution_notes" not in df.columns:
+                raise CommandError("No 'Resolution Notes' column in file")
+            notes = df["resolution_notes"].fillna("").tolist()
+        else:
+            notes = _synthetic_notes(opts["rows"], opts["seed"])
+
+        t0 = time.perf_counter()
+        for n in notes:
+            parse_resolution_notes_regex(n)
+        regex_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for n in notes:
+            parse_resolution_notes(n)
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        parse_notes_column(notes, parallel=True)
+        pooled_s = time.perf_counter() - t0
+
+        self.stdout.write(f"Notes: {len(notes)}")
+        self.stdout.write(f"  regex (4 searches) : {regex_s:8.3f} s")
+        self.stdout.write(f"  single pass        : {single_s:8.3f} s")
+        self.stdout.write(f"  single pass + pool : {pooled_s:8.3f} s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Speed-up {regex_s / single_s if single_s else 0:.1f}x"
+        ))
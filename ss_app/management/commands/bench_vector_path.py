@@ -0,0 +1,97 @@
+# ss_app/management/commands/bench_vector_path.py
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ss_app.logic.index_manager import EMBED_DIM, FaissIndexManager, InMemoryFaissIndex
+
+
+def _legacy_query_prep(idx: InMemoryFaissIndex, row: np.ndarray) -> np.ndarray:
+    """Replicates the old per-query conversions: tolist -> ndarray -> renormalize -> validate + normalize."""
+    emb = row.tolist()                                  # _embed_batch(...).tolist()
+    arr = np.array(emb, dtype="float32")                # chatbot_core._normalize_vector_safe
+    arr = (arr / np.linalg.norm(arr)).astype("float32")
+    return idx._prepare_query(arr)                      # converts + normalizes again
+
+
+def _ndarray_query_prep(idx: InMemoryFaissIndex, row: np.ndarray) -> np.ndarray:
+    return idx._prepare_query(row, normalized=True)
+
+
+def _best_per_call(fn, args_list, rounds: int) -> float:
+    """Fastest of `rounds` passes over args_list, in seconds per call."""
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for args in args_list:
+            fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(args_list)
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark the embedder -> FAISS vector path (legacy list round trips vs ndarray). "
+        "Query conversions are timed apart from the FAISS search both paths share: next to a flat "
+        "search they are within run-to-run noise, so end-to-end query timings cannot show them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vectors", type=int, default=20000, help="Vectors in the synthetic index")
+        parser.add_argument("--queries", type=int, default=2000, help="Queries to time per path")
+        parser.add_argument("--top-k", type=int, default=15)
+        parser.add_argument("--rounds", type=int, default=5, help="Timed passes per path; the fastest is kept")
+
+    def handle(self, *args, **opts):
+        rng = np.random.default_rng(0)
+
+        def normalized(n):
+            m = rng.standard_normal((n, EMBED_DIM)).astype(np.float32)
+            m /= np.linalg.norm(m, axis=1, keepdims=True)
+            return m
+
+        base = normalized(opts["vectors"])
+        queries = normalized(opts["queries"])
+        top_k = opts["top_k"]
+
+        manager = FaissIndexManager()
+        ns = "bench"
+
+        # ingestion: per-row lists (old embedder output) vs one normalized matrix
+        sample = base[:2000]
+        ids = list(range(sample.shape[0]))
+
+        t0 = time.perf_counter()
+        manager.add(ns, ids, [r.tolist() for r in sample])
+        legacy_add = (time.perf_counter() - t0) / sample.shape[0]
+        manager.safe_pop(ns)
+
+        t0 = time.perf_counter()
+        manager.add(ns, ids, sample, normalized=True)
+        fast_add = (time.perf_counter() - t0) / sample.shape[0]
+        manager.safe_pop(ns)
+
+        manager.add(ns, list(range(base.shape[0])), base, normalized=True)
+
+        idx = manager.get(ns)
+        rows = [(idx, row) for row in queries]
+        rounds = opts["rounds"]
+        _legacy_query_prep(idx, queries[0])   # warm-up
+        _ndarray_query_prep(idx, queries[0])
+        legacy_prep = _best_per_call(_legacy_query_prep, rows, rounds)
+        fast_prep = _best_per_call(_ndarray_query_prep, rows, rounds)
+        prepared = [(idx._prepare_query(row, normalized=True), top_k) for row in queries]
+        search = _best_per_call(lambda q, k: idx.index.search(q, k), prepared, rounds)
+
+        overhead = legacy_prep - fast_prep
+        self.stdout.write(f"Index: {base.shape[0]} x {EMBED_DIM}, queries: {queries.shape[0]}, top_k: {top_k}")
+        self.stdout.write(f"  add   legacy  : {legacy_add * 1e6:9.1f} us/vector")
+        self.stdout.write(f"  add   ndarray : {fast_add * 1e6:9.1f} us/vector")
+        self.stdout.write(f"  query prep legacy  : {legacy_prep * 1e6:9.1f} us/query")
+        self.stdout.write(f"  query prep ndarray : {fast_prep * 1e6:9.1f} us/query")
+        self.stdout.write(f"  faiss search       : {search * 1e6:9.1f} us/query (same for both paths)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Per-vector add savings: {(legacy_add - fast_add) * 1e6:.1f} us; "
+            f"per-query savings: {overhead * 1e6:.1f} us ({overhead / (legacy_prep + search):.1%} of a query)"
+        ))
@@ -1,18 +1,21 @@
 # ss_app/management/commands/build_vector_indices.py
 
+import time
+
 from django.core.management.base import BaseCommand
-from ss_app.models import Ticket, PDFChunk
+from ss_app.logic.index_builds import REBUILD_SOURCES, rebuild_index
 from ss_app.logic.index_manager import faiss_manager
 
 class Command(BaseCommand):
-    help = "Rebuild FAISS vector indices for tickets and pdf chunks (safe 768-d version)."
+    help = "Rebuild FAISS vector indices (blue/green: built aside, then swapped in)."
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--names",
             type=str,
             default="tickets,pdf_chunks",
-            help="Comma-separated namespaces to rebuild (default: tickets,pdf_chunks)",
+            help=f"Comma-separated namespaces to rebuild (default: tickets,pdf_chunks; "
+                 f"known: {','.join(REBUILD_SOURCES)})",
         )
 
     def handle(self, *args, **options):
@@ -21,29 +24,26 @@ class Command(BaseCommand):
         for ns in namespaces:
             self.stdout.write(f"\nRebuilding namespace: {ns}")
 
-            if ns == "tickets":
-                items = list(
-                    Ticket.objects.filter(embedding__isnull=False)
-                    .values_list("id", "embedding")
-                )
-            elif ns == "pdf_chunks":
-                items = list(
-                    PDFChunk.objects.filter(embedding__isnull=False)
-                    .values_list("id", "embedding")
-                )
-            else:
+            if ns not in REBUILD_SOURCES:
                 self.stdout.write(self.style.ERROR(f"Unknown namespace: {ns}"))
                 continue
 
-            # Clear old index safely
-            faiss_manager.safe_pop(ns)
-
-            # Rebuild safely
-            faiss_manager.safe_build_from_db_if_empty(ns, lambda: items)
-
+            status = rebuild_index(ns)
+            while status["rebuild"]["state"] == "building":
+                time.sleep(1.0)
+                status = faiss_manager.rebuild_status(ns)
+                build = status["rebuild"]
+                if build["total"]:
+                    self.stdout.write(f"  {build['done']}/{build['total']} rows")
+
+            build, active = status["rebuild"], status["active"]
+            if build["state"] == "failed":
+                self.stdout.write(self.style.ERROR(f"Rebuild of '{ns}' failed: {build['error']}"))
+                continue
             self.stdout.write(
                 self.style.SUCCESS(
                     f"Successfully rebuilt FAISS index for namespace '{ns}' "
-                    f"with {len(items)} vectors."
+                    f"with {active['objects']} objects ({active['vectors']} distinct vectors) "
+                    f"in {build['seconds']}s, generation {active['generation']}."
                 )
             )
@@ -9,18 +9,45 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("start_url", type=str)
         parser.add_argument("--max-pages", type=int, default=20)
-        parser.add_argument("--delay", type=float, default=0.5)
+        parser.add_argument("--delay", type=float, default=0.5,
+                            help="Minimum seconds between requests to the same host")
+        parser.add_argument("--concurrency", type=int, default=None,
+                            help="Parallel fetches (default: settings.CRAWLER['CONCURRENCY'])")
+        parser.add_argument("--parse-workers", type=int, default=None,
+                            help="HTML parsing threads (default: settings.CRAWLER['PARSE_WORKERS'])")
+        parser.add_argument("--queue-size", type=int, default=None,
+                            help="Pages buffered between stages (default: settings.CRAWLER['QUEUE_SIZE'])")
+        parser.add_argument("--persist-frontier", action="store_true",
+                            help="Keep the frontier in the DB; re-running resumes an unfinished crawl")
+        parser.add_argument("--restart", action="store_true",
+                            help="With --persist-frontier: discard a saved frontier and start over")
 
     def handle(self, *args, **opts):
         res = crawl_site(
             start_url=opts["start_url"],
             max_pages=opts["max_pages"],
-            delay=opts["delay"]
+            delay=opts["delay"],
+            concurrency=opts["concurrency"],
+            parse_workers=opts["parse_workers"],
+            queue_size=opts["queue_size"],
+            persist_frontier=opts["persist_frontier"],
+            restart=opts["restart"],
         )
 
+        if res["resumed_from"]:
+            self.stdout.write(f"Resumed saved frontier ({res['resumed_from']} URLs pending)")
+
         self.stdout.write(self.style.SUCCESS(
-            f"Crawled {res['pages_crawled']} pages, created {res['paragraphs_created']} paragraphs."
+            f"Crawled {res['pages_crawled']} pages, created {res['paragraphs_created']} paragraphs "
+            f"in {res['seconds']}s ({res['pages_per_sec']} pages/s)."
         ))
+        if res["embeddings_skipped_boilerplate"] or res["boilerplate_paragraphs_removed"]:
+            self.stdout.write(
+                f"Boilerplate: {res['embeddings_skipped_boilerplate']} paragraph embeddings skipped, "
+                f"{res['boilerplate_paragraphs_removed']} earlier copies removed"
+            )
+        if res["frontier_pending"]:
+            self.stdout.write(f"{res['frontier_pending']} URLs left in the frontier")
 
         if res["errors"]:
             self.stdout.write(self.style.WARNING("Errors:"))
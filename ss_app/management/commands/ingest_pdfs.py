@@ -0,0 +1,67 @@
+# ss_app/management/commands/ingest_pdfs.py
+import glob
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ss_app.logic.data_ingest import PDF_BATCH_SIZE, ingest_pdf_paths
+
+
+def _resolve_paths(target: str, recursive: bool):
+    if os.path.isdir(target):
+        pattern = os.path.join(target, "**", "*.pdf") if recursive else os.path.join(target, "*.pdf")
+        paths = glob.glob(pattern, recursive=recursive)
+        paths += glob.glob(pattern[:-4] + ".PDF", recursive=recursive)
+    else:
+        paths = glob.glob(target, recursive=True)
+    return sorted({p for p in paths if os.path.isfile(p)})
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-ingest PDFs from a directory or glob: parallel extraction/chunking, shared batched "
+        "embedding, bulk inserts, one pdf_chunks index build. Re-runs skip ingested files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", type=str, help="Directory of PDFs or a glob such as 'pdfs/**/*.pdf'")
+        parser.add_argument("--recursive", action="store_true", help="Also walk subdirectories of a directory")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Extraction processes (default: CPU count - 1)")
+        parser.add_argument("--batch-size", type=int, default=PDF_BATCH_SIZE,
+                            help="Chunks embedded and inserted per batch")
+        parser.add_argument("--user", type=str, default=None, help="Username recorded as uploader")
+
+    def handle(self, *args, **opts):
+        paths = _resolve_paths(opts["target"], opts["recursive"])
+        if not paths:
+            raise CommandError(f"No PDF files match {opts['target']!r}")
+
+        user = None
+        if opts["user"]:
+            user = User.objects.filter(username=opts["user"]).first()
+            if user is None:
+                raise CommandError(f"Unknown user {opts['user']!r}")
+
+        self.stdout.write(f"Ingesting {len(paths)} PDF file(s)")
+        res = ingest_pdf_paths(
+            paths,
+            workers=opts["workers"],
+            batch_size=max(1, opts["batch_size"]),
+            user=user,
+            log=lambda msg: self.stdout.write(f" - {msg}"),
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {res['docs_ingested']} document(s), {res['chunk_count']} chunks "
+            f"({res['docs_skipped']} skipped as already ingested) in {res['wall_seconds']}s: "
+            f"{res['docs_per_sec']} docs/s, {res['chunks_per_sec']} chunks/s"
+        ))
+        self.stdout.write(f"Stage timings: {res['timings']}; extraction: {res['extraction']}")
+        self.stdout.write(f"pdf_chunks: {res['embedded_chunks_total']} embedded chunks in the DB")
+
+        if res["errors"]:
+            self.stdout.write(self.style.WARNING("Errors:"))
+            for e in res["errors"]:
+                self.stdout.write(f" - {e}")
@@ -0,0 +1,75 @@
+# ss_app/management/commands/run_ingest_worker.py
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ss_app.logic.ingest_jobs import claim_next_job, requeue_stale_jobs, run_job
+
+DEFAULT_CONFIG = {
+    "CONCURRENCY": 2,
+    "POLL_INTERVAL": 2.0,
+    "STALE_AFTER": 900,
+}
+
+
+class Command(BaseCommand):
+    help = "Process queued Excel/PDF ingestion jobs with bounded concurrency."
+
+    def add_arguments(self, parser):
+        cfg = dict(DEFAULT_CONFIG)
+        cfg.update(getattr(settings, "INGEST_WORKER", {}) or {})
+        parser.add_argument("--concurrency", type=int, default=cfg["CONCURRENCY"],
+                            help="Jobs processed at the same time by this worker")
+        parser.add_argument("--poll-interval", type=float, default=cfg["POLL_INTERVAL"],
+                            help="Seconds between queue polls when idle")
+        parser.add_argument("--stale-after", type=float, default=cfg["STALE_AFTER"],
+                            help="Requeue running jobs without a progress/heartbeat write for this many seconds")
+        parser.add_argument("--once", action="store_true", help="Drain the queue, then exit")
+
+    def _finished(self, future):
+        job = future.result()
+        if job.status == job.STATUS_DONE:
+            self.stdout.write(self.style.SUCCESS(f"Job #{job.id} done: {job.units_done} {job.unit} ({job.filename})"))
+        else:
+            self.stdout.write(self.style.ERROR(f"Job #{job.id} failed: {job.error}"))
+
+    def handle(self, *args, **opts):
+        concurrency = max(1, opts["concurrency"])
+        poll = opts["poll_interval"]
+
+        requeued = requeue_stale_jobs(opts["stale_after"])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)"))
+        self.stdout.write(f"Ingest worker started (concurrency={concurrency})")
+
+        running = set()
+        last_stale_check = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ingest") as pool:
+            try:
+                while True:
+                    # top up to the concurrency limit
+                    while len(running) < concurrency:
+                        job = claim_next_job()
+                        if job is None:
+                            break
+                        self.stdout.write(f"Job #{job.id} started: {job.kind} {job.filename}")
+                        running.add(pool.submit(run_job, job, heartbeat=opts["stale_after"] / 3))
+
+                    if not running:
+                        if opts["once"]:
+                            break
+                        time.sleep(poll)
+                    else:
+                        done, running = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._finished(future)
+
+                    if time.monotonic() - last_stale_check > opts["stale_after"]:
+                        requeue_stale_jobs(opts["stale_after"])
+                        last_stale_check = time.monotonic()
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING("Stopping: waiting for running jobs to finish"))
+                for future in running:
+                    self._finished(future)
@@ -1,7 +1,8 @@
 from .sub_models.ticket_models import Ticket
 from .sub_models.auto_ticket_models import AutoTicket
 from .sub_models.pdf_models import PDFDocument, PDFChunk
-from .sub_models.webcrawl_models import Page, Paragraph
+from .sub_models.webcrawl_models import Page, Paragraph, CrawlFrontierEntry
+from .sub_models.ingest_models import IngestCheckpoint, IngestJob
 __all__ = [
     "Ticket",
     "AutoTicket",
@@ -9,4 +10,7 @@ __all__ = [
     "PDFChunk",
     "Page",
     "Paragraph",
+    "CrawlFrontierEntry",
+    "IngestCheckpoint",
+    "IngestJob",
 ]
@@ -0,0 +1,74 @@
+# ss_app/sub_models/ingest_models.py
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class IngestCheckpoint(models.Model):
+    """
+    Progress of a streamed ticket export, committed together with each batch so a
+    crashed ingest can resume after the last committed batch.
+    """
+    source_hash = models.CharField(max_length=64, unique=True)   # sha256 of the file
+    filename = models.CharField(max_length=512, blank=True)
+    uploaded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    rows_committed = models.IntegerField(default=0)
+    batches_committed = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ingest_checkpoints"
+
+    def __str__(self):
+        return f"{self.filename} ({self.rows_committed} rows)"
+
+
+class IngestJob(models.Model):
+    """
+    A queued upload processed by the run_ingest_worker command instead of the
+    HTTP request. units_done/units_total are rows (ticket exports) or chunks (PDFs).
+    """
+    KIND_TICKETS = "tickets"
+    KIND_PDF = "pdf"
+    KIND_CHOICES = [(KIND_TICKETS, "Ticket export"), (KIND_PDF, "PDF document")]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    upload = models.FileField(upload_to="ingest_uploads/", blank=True)   # ticket exports
+    pdf_document = models.ForeignKey(
+        "ss_app.PDFDocument", null=True, blank=True, on_delete=models.SET_NULL, related_name="ingest_jobs"
+    )
+    filename = models.CharField(max_length=512, blank=True)
+    uploaded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    units_done = models.IntegerField(default=0)
+    units_total = models.IntegerField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "ingest_jobs"
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.filename} ({self.status})"
+
+    @property
+    def unit(self) -> str:
+        return "rows" if self.kind == self.KIND_TICKETS else "chunks"
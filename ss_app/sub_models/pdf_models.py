@@ -9,6 +9,9 @@ class PDFDocument(models.Model):
     title = models.CharField(max_length=512)
     pdf_file = models.FileField(upload_to="pdfs/")
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # sha256 of the file bytes: duplicate uploads resolve to the existing document
+    file_hash = models.CharField(max_length=64, null=True, blank=True, unique=True)
+    ingested_at = models.DateTimeField(null=True, blank=True)   # set once every chunk is stored
 
     class Meta:
         db_table = "pdf_documents"
@@ -15,6 +15,9 @@ class Ticket(models.Model):
     uploaded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     embedding = ArrayField(models.FloatField(), size=768, null=True, blank=True)
+    # upsert identity: export ticket number if present, else "content:" + content_hash
+    natural_key = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=64, null=True, blank=True)   # sha256 of TICKET_FIELDS
 
     class Meta:
         db_table = "tickets_final"
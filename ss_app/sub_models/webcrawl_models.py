@@ -7,6 +7,14 @@ class Page(models.Model):
     url = models.URLField(unique=True)
     title = models.CharField(max_length=500)
 
+    # re-crawl state: validators for conditional GET, out-links (a 304 has no body)
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=64, blank=True, default="")
+    links = ArrayField(models.TextField(), null=True, blank=True)
+    # every paragraph hash of the last 200, boilerplate included: 304s count for detection
+    paragraph_hashes = ArrayField(models.CharField(max_length=40), null=True, blank=True)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         db_table = "web_pages"
 
@@ -18,13 +26,50 @@ class Paragraph(models.Model):
     page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name="paragraphs")
     text = models.TextField()
     order = models.IntegerField()
+    text_hash = models.CharField(max_length=40, null=True, blank=True, db_index=True)   # sha1 of text
 
     # store 768-dim embedding from your global embedder
     embedding = ArrayField(models.FloatField(), size=768, null=True, blank=True)
 
+    # sentence segmentation precomputed at crawl time (see retriever_logic.precompute_sentences)
+    # bounds: flattened [start, end) char offsets; token ids: per-sentence sets, concatenated;
+    # token offsets: start of each sentence's ids within sentence_token_ids, plus the end
+    sentence_bounds = ArrayField(models.IntegerField(), null=True, blank=True)
+    sentence_token_ids = ArrayField(models.BigIntegerField(), null=True, blank=True)
+    sentence_token_offsets = ArrayField(models.IntegerField(), null=True, blank=True)
+
     class Meta:
         db_table = "web_paragraphs"
         ordering = ("page_id", "order")
 
     def __str__(self):
         return f"{self.page.title} [{self.order}]"
+
+
+class CrawlFrontierEntry(models.Model):
+    """
+    One URL of a persisted crawl frontier (see logic/crawl_frontier.py), so an
+    interrupted crawl_site can resume. seed is the canonical start URL.
+    """
+    STATE_PENDING = "pending"
+    STATE_DONE = "done"
+    STATE_FAILED = "failed"
+    STATE_CHOICES = [
+        (STATE_PENDING, "Pending"),
+        (STATE_DONE, "Done"),
+        (STATE_FAILED, "Failed"),
+    ]
+
+    seed = models.URLField(max_length=2048, db_index=True)
+    url = models.URLField(max_length=2048)
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default=STATE_PENDING)
+    discovered_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "web_crawl_frontier"
+        unique_together = ("seed", "url")
+        indexes = [models.Index(fields=["seed", "state"])]
+
+    def __str__(self):
+        return f"{self.url} ({self.state})"
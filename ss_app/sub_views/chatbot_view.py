@@ -26,11 +26,9 @@ def _ensure_session_namespace(request) -> str:
     faiss_manager.safe_get_or_create(ns)
 
     # SAFE build from DB if empty
-    faiss_manager.safe_build_from_db_if_empty(
+    faiss_manager.safe_sync_from_db(
         ns,
-        lambda: list(
-            Ticket.objects.filter(embedding__isnull=False).values_list("id", "embedding")
-        )
+        Ticket.objects.filter(embedding__isnull=False).values_list("id", "embedding")
     )
     return ns
 
@@ -0,0 +1,17 @@
+# ss_app/sub_views/ingest_job_view.py
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
+
+from ss_app.models import IngestJob
+from ss_app.logic.ingest_jobs import job_progress
+
+
+@login_required
+@require_GET
+def api_ingest_job(request, job_id: int):
+    """Progress of an upload job: processed/total rows or chunks, throughput and ETA."""
+    job = IngestJob.objects.filter(pk=job_id).first()
+    if job is None or (job.uploaded_by_id != request.user.id and not request.user.is_staff):
+        return JsonResponse({"error": "Job not found"}, status=404)
+    return JsonResponse(job_progress(job))
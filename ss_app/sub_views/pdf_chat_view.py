@@ -29,12 +29,9 @@ def _ensure_pdf_namespace(request):
     faiss_manager.safe_get_or_create(namespace)
 
     # Build index safely if empty
-    faiss_manager.safe_build_from_db_if_empty(
+    faiss_manager.safe_sync_from_db(
         namespace,
-        lambda: list(
-            PDFChunk.objects.filter(embedding__isnull=False)
-            .values_list("id", "embedding")
-        )
+        PDFChunk.objects.filter(embedding__isnull=False).values_list("id", "embedding")
     )
 
     return namespace
@@ -3,11 +3,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
-from ss_app.logic.pdf_core import extract_text_from_pdf, chunk_text, embed_texts
-from ss_app.models import PDFDocument, PDFChunk
-from ss_app.logic.index_manager import faiss_manager
-
-NAMESPACE_PDF_BASE = "pdf_session_"
+from ss_app.logic.data_ingest import register_pdf_upload
+from ss_app.logic.ingest_jobs import active_pdf_job, enqueue_pdf_document
 
 @login_required
 def upload_pdf_view(request):
@@ -17,32 +14,29 @@ def upload_pdf_view(request):
             messages.error(request, "Please upload a valid PDF.")
             return redirect("ss_app:upload_pdf")
 
-        pdf_doc = PDFDocument.objects.create(
-            uploaded_by=request.user, title=pdf_file.name, pdf_file=pdf_file
-        )
-
-        # Extract → chunk → embed
-        text = extract_text_from_pdf(pdf_doc.pdf_file.path)
-        chunks = chunk_text(text)
-        embeddings = embed_texts(chunks)
-
-        new_ids = []
-        new_vectors = []
-
-        for t, e in zip(chunks, embeddings):
-            chunk = PDFChunk.objects.create(document=pdf_doc, text=t, embedding=e)
-            new_ids.append(chunk.id)
-            new_vectors.append(e)
-
-        # Add to any active pdf session indices
-        for ns in list(faiss_manager.indices.keys()):
-            if ns.startswith(NAMESPACE_PDF_BASE):
-                # SAFETY PATCH: replace .add with safe_add
-                faiss_manager.safe_add(ns, new_ids, new_vectors)
+        pdf_doc, created = register_pdf_upload(pdf_file, request.user)
+        if not created:
+            if pdf_doc.ingested_at is not None:
+                messages.info(
+                    request,
+                    f"ℹ️ {pdf_file.name} was already uploaded as \"{pdf_doc.title}\"; using the existing document."
+                )
+                return redirect("ss_app:pdf_chat")
+            active = active_pdf_job(pdf_doc)
+            if active is not None:
+                messages.info(
+                    request,
+                    f"ℹ️ {pdf_file.name} is already being processed as \"{pdf_doc.title}\" (job #{active.id})."
+                )
+                return redirect("ss_app:pdf_chat")
+            # stored earlier but never finished (failed job or legacy row): ingest it again
+
+        # Extract → chunk → embed → index runs in the run_ingest_worker process
+        job = enqueue_pdf_document(pdf_doc, request.user)
 
         messages.success(
             request,
-            f"✅ {pdf_file.name} uploaded and processed successfully!"
+            f"✅ {pdf_file.name} uploaded and queued for processing (job #{job.id})."
         )
         return redirect("ss_app:pdf_chat")
 
@@ -0,0 +1,13 @@
+# ss_app/sub_views/search_stats_view.py
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
+
+from ss_app.logic.query_cache import query_cache_stats
+
+
+@login_required
+@require_GET
+def api_search_cache_stats(request):
+    """Per-namespace near-duplicate query cache hit rates (this worker process)."""
+    return JsonResponse({"query_cache": query_cache_stats()})
@@ -3,13 +3,14 @@ from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.contrib import messages
+from django.urls import reverse
 
-from ss_app.logic.data_ingest import ingest_excel_file
-from ss_app.logic.index_manager import faiss_manager
+from ss_app.logic.ingest_jobs import enqueue_ticket_upload
 
 @login_required
 def upload_view(request):
     message = ""
+    progress_url = None
     if request.method == "POST":
         excel_file = request.FILES.get("file")
         if not excel_file:
@@ -19,26 +20,18 @@ def upload_view(request):
             return render(request, "ss_app/upload.html", {"message": message})
 
         try:
-            res = ingest_excel_file(excel_file, request.user)
-            message = f"✅ Uploaded. Inserted {res.get('created_count', 0)} rows."
-
-            # Incrementally add new embeddings to any active session-scoped indices
-            ids = res.get("ids", [])
-            if ids:
-                from ss_app.models import Ticket
-                rows = list(Ticket.objects.filter(id__in=ids).values_list("id", "embedding"))
-
-                # For each active index whose namespace starts with tickets_session_
-                for ns in list(faiss_manager.indices.keys()):
-                    if ns.startswith("tickets_session_"):
-                        object_ids = [r[0] for r in rows if r[1]]
-                        vectors = [r[1] for r in rows if r[1]]
-                        if object_ids and vectors:
-                            # SAFETY PATCH: use safe_add instead of add
-                            faiss_manager.safe_add(ns, object_ids, vectors)
+            # parsing/embedding/indexing happens in the run_ingest_worker process
+            job = enqueue_ticket_upload(excel_file, request.user)
+            progress_url = reverse("ss_app:api_ingest_job", args=[job.id])
+            message = f"✅ Uploaded. Queued as job #{job.id}."
 
             if request.content_type == "application/json" or request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"message": message})
+                return JsonResponse({
+                    "message": message,
+                    "job_id": job.id,
+                    "status": job.status,
+                    "progress_url": progress_url,
+                }, status=202)
 
         except Exception as e:
             message = f"❌ Error: {e}"
@@ -46,4 +39,4 @@ def upload_view(request):
                 return JsonResponse({"error": message}, status=500)
             messages.error(request, message)
 
-    return render(request, "ss_app/upload.html", {"message": message})
+    return render(request, "ss_app/upload.html", {"message": message, "progress_url": progress_url})
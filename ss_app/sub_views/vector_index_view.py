@@ -0,0 +1,23 @@
+# ss_app/sub_views/vector_index_view.py
+from django.http import JsonResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
+
+from ss_app.logic.index_builds import REBUILD_SOURCES, index_status, rebuild_index
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def api_vector_indices(request):
+    """
+    GET: rebuild progress and active generation/version of each FAISS namespace
+    (this worker process). POST namespace=<name> (staff): start a blue/green rebuild.
+    """
+    if request.method == "GET":
+        return JsonResponse({"indices": index_status()})
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    namespace = request.POST.get("namespace", "")
+    if namespace not in REBUILD_SOURCES:
+        return JsonResponse({"error": f"Unknown namespace: {namespace}"}, status=400)
+    return JsonResponse(rebuild_index(namespace), status=202)
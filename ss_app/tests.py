@@ -1,3 +1,610 @@
-from django.test import TestCase
+import hashlib
+import math
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ss_app.logic import chatbot_core, crawler_logic, data_ingest, docstore
+from ss_app.logic.bm25_index import PersistedBM25
+from ss_app.logic.boilerplate import BoilerplateDetector
+from ss_app.logic.crawl_frontier import PersistentCrawlFrontier
+from ss_app.logic.crawler_logic import (
+    CrawledPage,
+    CrawlError,
+    HostRateLimiter,
+    KnownPage,
+    NotModifiedPage,
+    iter_crawl,
+)
+from ss_app.logic.index_manager import EMBED_DIM, FaissIndexManager, InMemoryFaissIndex
+from ss_app.logic.notes_parser import (
+    parse_notes_column,
+    parse_resolution_notes,
+    parse_resolution_notes_regex,
+)
+from ss_app.logic.result_cache import bump_corpus_version
+from ss_app.models import IngestCheckpoint, Ticket
+from ss_app.sub_models.webcrawl_models import CrawlFrontierEntry
+
+
+class TempCacheDirMixin:
+    """Points INDEX_CACHE_DIR (docstores, corpus versions, lexical indices) at a temp dir."""
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        override = override_settings(INDEX_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+
+
+def fake_embed(texts):
+    """Deterministic normalized vectors, one per text (no model)."""
+    out = np.empty((len(texts), EMBED_DIM), dtype=np.float32)
+    for i, text in enumerate(texts):
+        seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+        out[i] = np.random.default_rng(seed).standard_normal(EMBED_DIM)
+    return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+class NotesParserTests(SimpleTestCase):
+    """The single-pass parser must reproduce the original per-field regexes exactly."""
+
+    FRAGMENTS = [
+        "Category:", "classification -", "Issue:", "Issue Description:", "issue", "RCA:", "rca",
+        "Cause -", "because", "Solution:", "solution", "Data Fix:", "Score:", "tissue:", ":", "-",
+        "VPN", "cert expired", "\n", "  ", "ſolution:", "ÉTAT", "users saw timeouts",
+    ]
+
+    def _random_notes(self, n, seed=0):
+        rng = random.Random(seed)
+        return [" ".join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(0, 14))) for _ in range(n)]
+
+    def assertMatchesRegex(self, notes):
+        for note in notes:
+            with self.subTest(note=note):
+                self.assertEqual(parse_resolution_notes(note), parse_resolution_notes_regex(note))
+
+    def test_structured_notes(self):
+        self.assertMatchesRegex([
+            "Category: Network\nIssue: VPN drops\nRCA: cert expired\nSolution: renewed cert",
+            "classification - DB issue description: slow query cause: missing index data fix: added index",
+            "Solution: restart. Score: 5",
+            "no keywords at all",
+        ])
+
+    def test_random_fragments(self):
+        self.assertMatchesRegex(self._random_notes(3000))
+
+    def test_empty_and_non_string_cells(self):
+        # Excel/CSV cells arrive as None, NaN, numbers or empty strings
+        self.assertMatchesRegex([None, float("nan"), math.inf, 0, 12345, 3.5, "", "   "])
+        self.assertEqual(parse_resolution_notes(None), ("", "", "", ""))
+        self.assertEqual(parse_resolution_notes(0), ("", "", "", ""))
+
+    def test_pooled_column_matches_rows(self):
+        notes = self._random_notes(1200, seed=1) + [None, float("nan"), 7]
+        self.assertEqual(
+            parse_notes_column(notes, parallel=True),
+            [parse_resolution_notes(n) for n in notes],
+        )
+
+
+class FixtureSite:
+    """
+    Local HTTP site: page i links to every page, carries two content paragraphs and
+    a shared footer, and answers If-None-Match with 304 until it is changed.
+    """
+
+    FOOTER = "Copyright Example Corp. All rights reserved, see the terms of use for details."
+
+    def __init__(self, pages=12):
+        self.pages = pages
+        self.changed = set()
+        self.requests = []   # (monotonic time, path, If-None-Match)
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.requests.append((time.monotonic(), self.path, self.headers.get("If-None-Match")))
+                try:
+                    i = int(self.path.lstrip("/p") or 0)
+                except ValueError:
+                    i = -1
+                if not 0 <= i < site.pages:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                etag = f'"p{i}-{int(i in site.changed)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = site.html(i).encode("utf-8")
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, i):
+        return f"{self.base}/p{i}"
+
+    def html(self, i):
+        paras = [
+            f"How to configure feature number {i}: open the settings panel and choose option {i}.",
+            f"This is unique content for the documentation on page number {i} of the site.",
+        ]
+        if i in self.changed:
+            paras.append(f"Release note added to page {i} after the first crawl of the site.")
+        links = "".join(f'<a href="/p{j}#top">p{j}</a>' for j in range(self.pages))
+        links += '<a href="http://other.invalid/elsewhere">elsewhere</a>'
+        body = "".join(f"<p>{p}</p>" for p in paras + [self.FOOTER])
+        return f"<html><head><title>Page {i}</title></head><body>{body}{links}</body></html>"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CrawlerTests(SimpleTestCase):
+    """iter_crawl against a local site: no model (embed_fn) and no database (known_pages)."""
+
+    def setUp(self):
+        self.site = FixtureSite()
+        self.addCleanup(self.site.close)
+        self.store = {}
+
+    def known_pages(self, urls):
+        return {u: self.store[u] for u in urls if u in self.store}
+
+    def crawl(self, detector=None, **kwargs):
+        kwargs.setdefault("max_pages", 50)
+        kwargs.setdefault("delay", 0)
+        results = list(iter_crawl(self.site.url(0), embed_fn=fake_embed, known_pages=self.known_pages,
+                                  boilerplate=detector, **kwargs))
+        for r in results:
+            if isinstance(r, CrawledPage):
+                self.store[r.url] = KnownPage(r.etag, r.last_modified, frozenset(r.hashes), r.links,
+                                              r.page_hashes)
+        return results
+
+    def test_crawls_same_domain_pages_once(self):
+        results = self.crawl()
+        self.assertTrue(all(isinstance(r, CrawledPage) for r in results))
+        self.assertEqual(sorted(r.url for r in results), sorted(self.site.url(i) for i in range(self.site.pages)))
+        page = results[0]
+        self.assertEqual(len(page.texts), 3)
+        self.assertEqual(page.new_idx, [0, 1, 2])
+        self.assertEqual(page.vectors.shape, (3, EMBED_DIM))
+        self.assertFalse(any("other.invalid" in path for _, path, _ in self.site.requests))
+
+    def test_recrawl_uses_validators(self):
+        self.crawl()
+        self.site.changed.add(3)
+        self.site.requests.clear()
+        results = self.crawl()
+
+        self.assertTrue(all(etag for _, _, etag in self.site.requests))
+        not_modified = [r for r in results if isinstance(r, NotModifiedPage)]
+        crawled = [r for r in results if isinstance(r, CrawledPage)]
+        self.assertEqual(len(not_modified), self.site.pages - 1)
+        self.assertEqual([r.url for r in crawled], [self.site.url(3)])
+        # only the paragraph that was not stored before gets embedded
+        self.assertEqual([crawled[0].texts[i] for i in crawled[0].new_idx],
+                         ["Release note added to page 3 after the first crawl of the site."])
+
+    def test_boilerplate_is_exact_and_counts_not_modified_pages(self):
+        detector = BoilerplateDetector(fraction=0.5, min_pages=5)
+        results = self.crawl(detector)
+        footer = hashlib.sha1(FixtureSite.FOOTER.encode("utf-8")).hexdigest()
+        self.assertEqual(detector.boilerplate_hashes(), {footer})
+        # template-like content paragraphs are all kept
+        kept = [t for r in results for t in r.texts if t != FixtureSite.FOOTER]
+        self.assertEqual(len(kept), 2 * self.site.pages)
+
+        self.site.changed.add(3)
+        detector = BoilerplateDetector(fraction=0.5, min_pages=5)
+        results = self.crawl(detector)
+        self.assertEqual(sum(isinstance(r, NotModifiedPage) for r in results), self.site.pages - 1)
+        self.assertEqual(detector.pages, self.site.pages)
+        self.assertEqual(detector.boilerplate_hashes(), {footer})
+
+    def test_stage_errors_become_crawl_errors(self):
+        def flaky_embed(texts):
+            if any("page number 3 " in t for t in texts):
+                raise ValueError("bad batch")
+            return fake_embed(texts)
+
+        results = list(iter_crawl(self.site.url(0), max_pages=50, delay=0, embed_fn=flaky_embed))
+        errors = [r for r in results if isinstance(r, CrawlError)]
+        self.assertEqual([(e.url, e.message.split()[0]) for e in errors], [(self.site.url(3), "EMBED_FAIL")])
+        self.assertEqual(sum(isinstance(r, CrawledPage) for r in results), self.site.pages - 1)
+
+    def test_dead_stage_thread_does_not_hang(self):
+        class Crash(BaseException):
+            pass
+
+        def crash(url, html):
+            raise Crash()
+
+        with mock.patch.object(crawler_logic, "_parse", crash), \
+                mock.patch.object(crawler_logic, "LIVENESS_CHECK_SECONDS", 0.1), \
+                mock.patch("threading.excepthook"):
+            results = list(iter_crawl(self.site.url(0), max_pages=50, delay=0, embed_fn=fake_embed))
+        self.assertTrue(results)
+        self.assertTrue(all(isinstance(r, CrawlError) and r.message.startswith("WORKER_DIED") for r in results))
+
+    def test_per_host_rate_limit(self):
+        self.crawl(max_pages=6, delay=0.05, concurrency=4)
+        times = sorted(t for t, _, _ in self.site.requests)
+        self.assertEqual(len(times), 6)
+        gaps = np.diff(times)
+        self.assertGreaterEqual(gaps.min(), 0.04)
+
+    def test_rate_limiter_is_per_host(self):
+        limiter = HostRateLimiter(0.2)
+        t0 = time.monotonic()
+        limiter.wait("a.example")
+        limiter.wait("b.example")
+        self.assertLess(time.monotonic() - t0, 0.1)
+        limiter.wait("a.example")
+        self.assertGreaterEqual(time.monotonic() - t0, 0.19)
+
+
+class CrawlFrontierPersistenceTests(TestCase):
+    def setUp(self):
+        self.site = FixtureSite(pages=8)
+        self.addCleanup(self.site.close)
+
+    def crawl(self, frontier, max_pages):
+        return list(iter_crawl(self.site.url(0), max_pages=max_pages, delay=0, concurrency=1,
+                               embed_fn=fake_embed, frontier=frontier))
+
+    def test_interrupted_crawl_resumes(self):
+        seed = self.site.url(0)
+        first = self.crawl(PersistentCrawlFrontier(seed, flush_every=2), max_pages=3)
+        self.assertEqual(len(first), 3)
+        entries = CrawlFrontierEntry.objects.filter(seed=seed)
+        self.assertEqual(entries.count(), self.site.pages)
+        self.assertEqual(entries.filter(state=CrawlFrontierEntry.STATE_DONE).count(), 3)
+
+        frontier = PersistentCrawlFrontier(seed)
+        self.assertEqual(frontier.resumed, self.site.pages - 3)
+        second = self.crawl(frontier, max_pages=50)
+        self.assertEqual({r.url for r in first} | {r.url for r in second},
+                         {self.site.url(i) for i in range(self.site.pages)})
+        self.assertFalse({r.url for r in first} & {r.url for r in second})
+        self.assertFalse(entries.filter(state=CrawlFrontierEntry.STATE_PENDING).exists())
+
+    def test_restart_discards_frontier(self):
+        seed = self.site.url(0)
+        self.crawl(PersistentCrawlFrontier(seed), max_pages=3)
+        frontier = PersistentCrawlFrontier(seed, restart=True)
+        self.assertEqual(frontier.resumed, 0)
+        self.assertEqual(len(frontier), 1)
+
+
+@mock.patch.object(data_ingest, "_embed_texts_batched", fake_embed)
+class TicketUpsertTests(TempCacheDirMixin, TestCase):
+    HEADER = "Number,Short Description,Description,Resolution Notes\n"
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("uploader")
+
+    def ingest(self, body, name="export.csv", header=None, **kwargs):
+        data = ((header if header is not None else self.HEADER) + body).encode("utf-8")
+        return data_ingest.ingest_excel_file(SimpleUploadedFile(name, data), self.user, **kwargs)
+
+    def test_reupload_updates_by_ticket_number(self):
+        self.ingest(
+            "INC1,VPN drops,users disconnected,RCA: cert expired Solution: renew cert\n"
+            "INC2,Disk full,server alerts,RCA: logs Solution: rotate logs\n"
+        )
+        res = self.ingest(
+            "INC1,VPN drops,users disconnected,RCA: cert expired Solution: renew cert\n"
+            "INC2,Disk full,server alerts,RCA: logs Solution: rotate and compress logs\n"
+            "INC3,Printer offline,queue stuck,RCA: spooler Solution: restart spooler\n"
+        )
+        self.assertEqual((res["inserted"], res["updated"], res["reembedded"], res["skipped"]), (1, 1, 0, 1))
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.assertIn("compress", Ticket.objects.get(natural_key="INC2").solution)
+
+        res = self.ingest("INC3,Printer offline,jobs never print,RCA: spooler Solution: restart spooler\n")
+        self.assertEqual((res["updated"], res["reembedded"]), (1, 1))
+
+    def test_numberless_rows_keyed_by_content(self):
+        header = "Short Description,Description,Resolution Notes\n"
+        rows = ("Login fails,SSO error,RCA: expired cert Solution: renew\n"
+                "Login fails,SSO error,RCA: locked account Solution: unlock\n")
+        res = self.ingest(rows, header=header)
+        # same description, different rca/solution: two tickets, not one upserted row
+        self.assertEqual(res["inserted"], 2)
+        self.assertTrue(all(k.startswith(data_ingest.CONTENT_KEY_PREFIX)
+                            for k in Ticket.objects.values_list("natural_key", flat=True)))
+        res = self.ingest(rows + "Login fails,SSO error,RCA: clock skew Solution: sync ntp\n", header=header)
+        self.assertEqual((res["inserted"], res["skipped"]), (1, 2))
+
+    def test_legacy_rows_are_backfilled(self):
+        Ticket.objects.create(short_description="Login fails", description="SSO error", rca="expired cert",
+                              solution="renew", category="", issue="", keywords="")
+        Ticket.objects.create(short_description="Disk full", description="alerts", rca="logs",
+                              solution="rotate", category="", issue="", keywords="", natural_key="text:abc")
+        res = self.ingest("Login fails,SSO error,RCA: expired cert Solution: renew\n",
+                          header="Short Description,Description,Resolution Notes\n")
+        self.assertEqual((res["inserted"], res["skipped"]), (0, 1))
+        self.assertFalse(Ticket.objects.filter(natural_key__isnull=True).exists())
+        self.assertFalse(Ticket.objects.filter(natural_key__startswith="text:").exists())
+
+    def test_crashed_ingest_resumes_from_checkpoint(self):
+        body = "".join(f"INC{i},Issue {i},details {i},Solution: fix {i}\n" for i in range(5))
+        calls = []
+
+        def flaky_embed(texts):
+            calls.append(len(texts))
+            if len(calls) == 2:
+                raise RuntimeError("embedding service down")
+            return fake_embed(texts)
+
+        with mock.patch.object(data_ingest, "_embed_texts_batched", flaky_embed):
+            with self.assertRaises(RuntimeError):
+                self.ingest(body, batch_size=2)
+        checkpoint = IngestCheckpoint.objects.get()
+        self.assertEqual((checkpoint.rows_committed, checkpoint.completed), (2, False))
+        self.assertEqual(Ticket.objects.count(), 2)
+
+        res = self.ingest(body, batch_size=2)
+        self.assertEqual((res["resumed_from"], res["inserted"]), (2, 3))
+        self.assertEqual(Ticket.objects.count(), 5)
+        self.assertTrue(self.ingest(body, batch_size=2)["already_ingested"])
+
+
+class DocStoreTests(TempCacheDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = {i: (f"title {i}", i * 10) for i in range(1, 101)}
+        self.fetched = []
+        self.store = self.make_store()
+
+    def make_store(self):
+        def fetch(ids):
+            self.fetched.append(list(ids))
+            return [(i, *self.db[i]) for i in ids if i in self.db]
+        return docstore.DocStore("test", ("title", "score"), fetch)
+
+    def test_hydration_fetches_missing_ids_once(self):
+        docs = self.store.get_many([1, 2, 3])
+        self.assertEqual(docs[2], {"title": "title 2", "score": 20})
+        self.assertEqual(self.fetched, [[1, 2, 3]])
+        self.store.get_many([3, 2, 1])
+        self.assertEqual(len(self.fetched), 1)
+        # another process (a second store object) reads the same file
+        self.assertEqual(self.make_store().get_many([1])[1]["title"], "title 1")
+        self.assertEqual(len(self.fetched), 1)
+
+    def test_updates_and_tombstones(self):
+        self.store.put_many([(1, "old", 1), (2, "two", 2)])
+        self.store.put_many([(1, "new", 1)])
+        self.store.discard([2])
+        del self.db[2]
+        docs = self.store.get_many([1, 2])
+        self.assertEqual(docs, {1: {"title": "new", "score": 1}})
+
+    def test_compaction_keeps_latest_records(self):
+        with mock.patch.object(docstore, "COMPACT_MIN_BYTES", 4096):
+            for rnd in range(20):
+                self.store.put_many([(i, f"v{rnd}-{i}", rnd) for i in range(1, 41)])
+            self.store.discard(range(1, 11))
+        reader = self.make_store()
+        docs = reader.get_many(range(11, 41))
+        self.assertTrue(all(d["title"].startswith("v19-") for d in docs.values()))
+        self.assertEqual(self.fetched, [])
+        self.assertLess(len(open(self.store.path, "rb").read()), 20 * 40 * 20)
+
+    def test_concurrent_appends_survive_compaction(self):
+        def writer(k):
+            for rnd in range(60):
+                self.store.put_many([(k * 1000 + i, f"{rnd}", rnd) for i in range(10)])
+            self.store.discard(range(k * 1000, k * 1000 + 5))
+
+        with mock.patch.object(docstore, "COMPACT_MIN_BYTES", 2048):
+            threads = [threading.Thread(target=writer, args=(k,)) for k in range(1, 5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        docs = self.make_store().get_many(k * 1000 + i for k in range(1, 5) for i in range(10))
+        self.assertEqual(sorted(docs), sorted(k * 1000 + i for k in range(1, 5) for i in range(5, 10)))
+        self.assertTrue(all(d["title"] == "59" for d in docs.values()))
+
+
+class FakeRows:
+    """Stands in for values_list("id", "embedding") querysets of the index manager."""
+
+    def __init__(self, rows, gate=None):
+        self.rows = rows
+        self.gate = gate   # threading.Event the iterator waits for before yielding
+
+    def filter(self, id__in=None, id__gt=None):
+        if id__in is not None:
+            keep = set(id__in)
+            return FakeRows({i: v for i, v in self.rows.items() if i in keep}, self.gate)
+        return FakeRows({i: v for i, v in self.rows.items() if i > id__gt}, self.gate)
+
+    def order_by(self, *fields):
+        return self
+
+    def count(self):
+        return len(self.rows)
+
+    def iterator(self, chunk_size=2000):
+        if self.gate is not None:
+            self.gate.wait(5)
+        for i in sorted(self.rows):
+            yield i, self.rows[i]
+
+    __iter__ = iterator
+
+
+class IndexSwapTests(TempCacheDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = FaissIndexManager()
+        self.rows = {i: v for i, v in enumerate(fake_embed([f"ticket {i}" for i in range(1, 41)]), start=1)}
+
+    def wait_for_rebuild(self, ns):
+        for _ in range(200):
+            if self.manager.rebuild_status(ns)["rebuild"]["state"] != "building":
+                return
+            time.sleep(0.02)
+        self.fail("rebuild did not finish")
+
+    def test_searches_use_old_index_until_swap(self):
+        self.manager.start_rebuild("tickets", FakeRows(self.rows), background=False)
+        old = self.manager.get("tickets")
+        self.assertEqual(self.manager.generations["tickets"], 1)
+
+        self.rows[99] = fake_embed(["ticket 99"])[0]
+        gate = threading.Event()
+        status = self.manager.start_rebuild("tickets", FakeRows(self.rows, gate))
+        self.assertEqual(status["rebuild"]["state"], "building")
+        hits = self.manager.safe_search("tickets", self.rows[99], top_k=1, normalized=True)
+        self.assertNotEqual(hits[0][0], 99)
+        self.assertIs(self.manager.get("tickets"), old)
+
+        gate.set()
+        self.wait_for_rebuild("tickets")
+        self.assertIsNot(self.manager.get("tickets"), old)
+        self.assertEqual(self.manager.generations["tickets"], 2)
+        self.assertEqual(self.manager.safe_search("tickets", self.rows[99], top_k=1, normalized=True)[0][0], 99)
+        self.assertEqual(old.size, 40)   # in-flight searches keep a complete index
+
+    def test_sync_rebuilds_aside_on_count_mismatch(self):
+        self.manager.safe_sync_from_db("tickets", FakeRows(self.rows))
+        live = self.manager.get("tickets")
+        # a row deleted without a change-log entry: catch-up cannot fix the count
+        del self.rows[5]
+        bump_corpus_version("tickets")
+        gate = threading.Event()
+        self.manager.safe_sync_from_db("tickets", FakeRows(self.rows, gate))
+        self.assertIs(self.manager.get("tickets"), live)
+        self.assertEqual(live.size, 40)
+
+        gate.set()
+        self.wait_for_rebuild("tickets")
+        self.assertEqual(self.manager.get("tickets").size, 39)
+        generation = self.manager.generations["tickets"]
+        self.manager.safe_sync_from_db("tickets", FakeRows(self.rows))
+        self.assertEqual(self.manager.generations["tickets"], generation)
+
+    def test_sync_waits_for_running_build_of_empty_index(self):
+        gate = threading.Event()
+        self.manager.start_rebuild("tickets", FakeRows(self.rows, gate))
+        sync = threading.Thread(target=self.manager.safe_sync_from_db, args=("tickets", FakeRows(self.rows)))
+        sync.start()
+        sync.join(0.2)
+        self.assertTrue(sync.is_alive())   # blocked on the build, not returning an empty index
+        gate.set()
+        sync.join(5)
+        self.assertFalse(sync.is_alive())
+        self.assertEqual(self.manager.get("tickets").size, 40)
+        self.assertEqual(self.manager.generations["tickets"], 1)
+
+    def test_sync_build_failure_raises(self):
+        class BrokenRows(FakeRows):
+            def iterator(self, chunk_size=2000):
+                raise RuntimeError("db went away")
+
+        with self.assertRaises(RuntimeError):
+            self.manager.safe_sync_from_db("tickets", BrokenRows(self.rows))
+        self.assertEqual(self.manager.rebuild_status("tickets")["rebuild"]["state"], "failed")
+
+    def test_removal_keeps_row_maps_consistent(self):
+        idx = InMemoryFaissIndex()
+        rng = random.Random(0)
+        vectors = fake_embed([f"text {i}" for i in range(30)])
+        live = {}
+        for _ in range(200):
+            ids = rng.sample(range(100), 6)
+            if rng.random() < 0.5:
+                vecs = vectors[[rng.randrange(30) for _ in ids]]
+                idx.add(ids, vecs, normalized=True)
+                live.update(zip(ids, vecs))
+            else:
+                idx.remove(ids)
+                for oid in ids:
+                    live.pop(oid, None)
+            self.assertEqual(idx.size, len(live))
+            self.assertEqual(idx.index.ntotal, len(idx.postings))
+            for oid, vec in live.items():
+                row = idx._row_of_id[oid]
+                self.assertIn(oid, idx.postings[row])
+                np.testing.assert_allclose(idx.index.reconstruct(row), vec, atol=1e-6)
+
+
+class PersistedBM25Tests(TempCacheDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = {i: ["doc", f"term{i}"] for i in range(1, 6)}
+
+    def handle(self):
+        # one handle per simulated process, sharing the file
+        return PersistedBM25("bm25_test.npz", lambda: list(self.db.items()), lambda: len(self.db))
+
+    def ids(self, index):
+        return {obj_id for obj_id, _ in index.search(["doc"], top_k=100)}
+
+    def test_concurrent_writers_merge(self):
+        a, b = self.handle(), self.handle()
+        self.assertEqual(self.ids(a.get()), set(range(1, 6)))
+        self.assertEqual(self.ids(b.get()), set(range(1, 6)))
+
+        self.db[6] = ["doc", "term6"]
+        b.add([(6, self.db[6])], persist=False)
+        self.db[7] = ["doc", "term7"]
+        a.add([(7, self.db[7])])
+        del self.db[2]
+        a.remove([2])
+        b.persist()   # b last saved before a: must keep a's changes
+
+        self.assertEqual(self.ids(b.get()), {1, 3, 4, 5, 6, 7})
+        self.assertEqual(self.ids(a.get()), {1, 3, 4, 5, 6, 7})
+        self.assertEqual(self.ids(self.handle().get()), {1, 3, 4, 5, 6, 7})
+
+
+class SearchPoolTests(SimpleTestCase):
+    def test_saturated_pool_skips_branches_instead_of_queueing(self):
+        release = threading.Event()
+        slow = [chatbot_core._submit_branch(release.wait, 5) for _ in range(chatbot_core.SEARCH_POOL_WORKERS)]
+        self.assertTrue(all(f is not None for f in slow))
+        self.assertIsNone(chatbot_core._submit_branch(lambda: "late"))
+
+        release.set()
+        wait(slow, timeout=5)
+        future = None
+        for _ in range(100):   # slots are released by done-callbacks, right after the result
+            future = chatbot_core._submit_branch(lambda: "ok")
+            if future is not None:
+                break
+            time.sleep(0.01)
+        self.assertEqual(future.result(timeout=5), "ok")
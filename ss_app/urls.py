@@ -12,6 +12,9 @@ from .sub_views.pdf_chat_view import pdf_chat_view
 from .sub_views.ticket_view import generate_ticket_from_chat, auto_ticket_summary_view
 from ss_app.sub_views.crawl_view import crawl_site_view
 from ss_app.sub_views.webchat_view import webchat_view
+from ss_app.sub_views.search_stats_view import api_search_cache_stats
+from ss_app.sub_views.ingest_job_view import api_ingest_job
+from ss_app.sub_views.vector_index_view import api_vector_indices
 # optional API views (import safely)
 try:
     from .sub_views.api_chat_view import api_chat
@@ -35,6 +38,7 @@ urlpatterns = [
     # Uploads
     path("upload/", upload_view, name="upload"),
     path("upload-pdf/", upload_pdf_view, name="upload_pdf"),
+    path("api/ingest-jobs/<int:job_id>/", api_ingest_job, name="api_ingest_job"),
 
     # Chat UI
     path("chatbot/", chatbot_view, name="chatbot"),
@@ -52,6 +56,10 @@ urlpatterns = [
     # NEW — Crawl Site
     path("crawl-site/", crawl_site_view, name="crawl_site"),
 
+    # Search cache statistics
+    path("api/search-cache-stats/", api_search_cache_stats, name="api_search_cache_stats"),
+    path("api/vector-indices/", api_vector_indices, name="api_vector_indices"),
+
 ]
 
 # Add optional API routes if modules are present
@@ -23,6 +23,9 @@ from .sub_views.ticket_view import generate_ticket_from_chat, auto_ticket_summar
 
 from ss_app.sub_views.webchat_view import webchat_view
 from .sub_views.crawl_view import crawl_site_view
+from .sub_views.search_stats_view import api_search_cache_stats
+from .sub_views.ingest_job_view import api_ingest_job
+from .sub_views.vector_index_view import api_vector_indices
 # Optional API views — import if present (fail gracefully if not)
 try:
     from .sub_views.api_chat_view import api_chat
@@ -48,7 +51,10 @@ __all__ = [
     "generate_ticket_from_chat",
     "auto_ticket_summary_view",
     "webchat_view",
-    "crawl_site_view"
+    "crawl_site_view",
+    "api_search_cache_stats",
+    "api_ingest_job",
+    "api_vector_indices",
 
 ]
 